@@ -0,0 +1,84 @@
+# audio_upload.py compares the old WAV-on-disk capture path with the in-memory FLAC path
+#
+# Usage (from the repository root):
+#   python -m benchmarks.audio_upload --wav speech.wav --uplink-mbps 10
+
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from utils.voice_assistant import RECORDING_RATE
+
+
+def resample(data, rate, target):
+    if rate == target:
+        return data
+    positions = np.linspace(0, len(data) - 1, int(len(data) * target / rate))
+    return np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+
+
+def old_path(recording, fs, directory):
+    # What record_audio_vad + transcribe_audio used to do: write output.wav, then reopen it to upload
+    filename = os.path.join(directory, "output.wav")
+    sf.write(filename, recording, fs)
+    with open(filename, "rb") as audio_file:
+        return audio_file.read()
+
+
+def new_path(recording, fs):
+    buffer = io.BytesIO()
+    sf.write(buffer, recording, fs, format="FLAC", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def time_it(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bytes uploaded and time saved per voice turn.")
+    parser.add_argument("--wav", required=True, help="Speech sample standing in for a capture")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Capture length (the app records 5 s)")
+    parser.add_argument("--uplink-mbps", type=float, default=10.0, help="Upload bandwidth used to estimate transfer time")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    data, rate = sf.read(args.wav, dtype="float32", always_2d=True)
+    data = data.mean(axis=1)
+
+    old_fs = 44100
+    old_recording = np.zeros(int(args.seconds * old_fs), dtype=np.float32)
+    clip = resample(data, rate, old_fs)[:len(old_recording)]
+    old_recording[:len(clip)] = clip
+    new_recording = np.zeros(int(args.seconds * RECORDING_RATE), dtype=np.float32)
+    clip = resample(data, rate, RECORDING_RATE)[:len(new_recording)]
+    new_recording[:len(clip)] = clip
+
+    directory = tempfile.mkdtemp(prefix="upload-bench-")
+    old_bytes, old_ms = time_it(lambda: old_path(old_recording, old_fs, directory), args.repeat)
+    new_bytes, new_ms = time_it(lambda: new_path(new_recording, RECORDING_RATE), args.repeat)
+
+    bytes_per_ms = args.uplink_mbps * 1e6 / 8 / 1000
+    old_upload = len(old_bytes) / bytes_per_ms
+    new_upload = len(new_bytes) / bytes_per_ms
+
+    print(f"{'':<28}{'bytes':>12}{'encode+io ms':>15}{'upload ms':>12}")
+    print(f"{'WAV 44.1 kHz via disk':<28}{len(old_bytes):>12}{old_ms * 1000:>15.2f}{old_upload:>12.1f}")
+    print(f"{'FLAC 16 kHz in memory':<28}{len(new_bytes):>12}{new_ms * 1000:>15.2f}{new_upload:>12.1f}")
+    saved = (old_ms * 1000 + old_upload) - (new_ms * 1000 + new_upload)
+    print(f"Upload shrinks {len(old_bytes) / max(len(new_bytes), 1):.1f}x; about {saved:.0f} ms saved per turn at {args.uplink_mbps} Mbit/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# barge_in_replay.py replays overlap scenarios built from WAV files through BargeInDetector
+#
+# Usage (from the repository root):
+#   python -m benchmarks.barge_in_replay --reply assistant_reply.wav --user user_speech.wav
+#
+# Each scenario mixes the assistant's reply, as the mic would hear it through the speakers,
+# with the user's speech starting at a given offset. The run exits non-zero if a scenario
+# misses a barge-in, triggers on echo alone, or takes longer than --max-latency-ms to react.
+
+import argparse
+import sys
+
+import numpy as np
+import soundfile as sf
+
+from utils.barge_in import BargeInDetector, FRAME_MS
+
+# name, user speech onset in seconds (None = user stays quiet), echo gain, echo delay in ms
+SCENARIOS = [
+    ("echo only, quiet room", None, 0.3, 40),
+    ("echo only, loud speakers", None, 0.8, 80),
+    ("overlap at 0.5 s", 0.5, 0.3, 40),
+    ("overlap at 1.5 s, loud speakers", 1.5, 0.8, 80),
+    ("overlap at 1.0 s, long echo path", 1.0, 0.5, 150),
+]
+
+
+def load_mono(path, rate=None):
+    data, file_rate = sf.read(path, dtype="float32", always_2d=True)
+    data = data.mean(axis=1)
+    if rate and rate != file_rate:
+        positions = np.linspace(0, len(data) - 1, int(len(data) * rate / file_rate))
+        data = np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+        file_rate = rate
+    return data, file_rate
+
+
+def build_mic(reply, user, rate, onset, echo_gain, delay_ms, noise_level, seed=0):
+    delay = int(rate * delay_ms / 1000)
+    length = len(reply) + delay
+    if onset is not None:
+        length = max(length, int(onset * rate) + len(user))
+    mic = np.random.default_rng(seed).normal(0, noise_level, length).astype(np.float32)
+    mic[delay:delay + len(reply)] += echo_gain * reply
+    if onset is not None:
+        start = int(onset * rate)
+        mic[start:start + len(user)] += user
+    played = np.zeros(length, dtype=np.float32)
+    played[:len(reply)] = reply
+    return mic, played
+
+
+def run_scenario(reply, user, rate, onset, echo_gain, delay_ms, noise_level):
+    mic, played = build_mic(reply, user, rate, onset, echo_gain, delay_ms, noise_level)
+    detector = BargeInDetector(rate)
+    block = detector.frame_len  # Same block size the playback callback uses
+    for start in range(0, len(mic) - block + 1, block):
+        if detector.process(mic[start:start + block], played[start:start + block]):
+            break
+    if not detector.triggered:
+        return None
+    return detector.triggered_at_frame * FRAME_MS / 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay barge-in overlap scenarios.")
+    parser.add_argument("--reply", required=True, help="WAV of the assistant's reply (the output signal)")
+    parser.add_argument("--user", required=True, help="WAV of the user speaking")
+    parser.add_argument("--noise", type=float, default=0.002, help="Mic noise floor (RMS, full scale = 1.0)")
+    parser.add_argument("--max-latency-ms", type=float, default=100.0, help="Allowed delay from speech onset to stop")
+    args = parser.parse_args(argv)
+
+    reply, rate = load_mono(args.reply)
+    user, _ = load_mono(args.user, rate)
+
+    failures = 0
+    for name, onset, echo_gain, delay_ms in SCENARIOS:
+        triggered_at = run_scenario(reply, user, rate, onset, echo_gain, delay_ms, args.noise)
+        if onset is None:
+            ok = triggered_at is None
+            detail = "no trigger" if ok else f"false trigger at {triggered_at:.2f} s"
+        elif triggered_at is None:
+            ok, detail = False, "missed"
+        else:
+            latency_ms = (triggered_at - onset) * 1000
+            ok = 0 <= latency_ms <= args.max_latency_ms
+            detail = f"stopped {latency_ms:.0f} ms after onset"
+        failures += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {name:<36} {detail}")
+
+    print(f"{len(SCENARIOS) - failures}/{len(SCENARIOS)} scenarios passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
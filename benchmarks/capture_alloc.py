@@ -0,0 +1,70 @@
+# capture_alloc.py measures the memory each screenshot allocates, for the old per-call path and the pooled capture service
+#
+# Usage (from the repository root):
+#   python -m benchmarks.capture_alloc --width 2560 --height 1440 --captures 20
+#
+# Grabs are simulated with a BGRA buffer in mss's layout, so both paths start from the same bytes and
+# no display is needed. tracemalloc sees Python-level buffers: copies of the grab, BytesIO contents
+# and base64 strings. Pillow's pixel storage is allocated in C and does not show up here.
+
+import argparse
+import base64
+import io
+import time
+import tracemalloc
+
+from PIL import Image, ImageDraw
+
+from utils.screen_capture import ScreenCapture
+
+
+def fake_grab(width, height):
+    image = Image.new("RGB", (width, height), (245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    for y in range(20, height - 20, 22):
+        draw.text((30, y), f"line {y} of a document on the screen, with some words to compress", fill="black")
+    return bytearray(image.tobytes("raw", "BGRX")), width, height
+
+
+def legacy_capture(raw, width, height):
+    # capture_screenshot() before the capture service: a fresh copy, image, buffer and strings every call
+    bgra = bytes(raw)  # mss's ScreenShot.bgra
+    img = Image.frombytes("RGB", (width, height), bgra, "raw", "BGRX")
+    buffered = io.BytesIO()
+    img.save(buffered, format="PNG", compress_level=1)
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
+def measure(capture, captures):
+    capture()  # Warm-up: the pooled path allocates its frame and buffers once here
+    tracemalloc.start()
+    peaks = []
+    start = time.perf_counter()
+    for _ in range(captures):
+        tracemalloc.reset_peak()
+        capture()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return max(peaks), elapsed / captures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-capture allocations of the old and the pooled screenshot paths.")
+    parser.add_argument("--width", type=int, default=2560)
+    parser.add_argument("--height", type=int, default=1440)
+    parser.add_argument("--captures", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    frame = fake_grab(args.width, args.height)
+    service = ScreenCapture()
+    print(f"{args.width}x{args.height}, {len(frame[0]) / 1e6:.1f} MB per grab (allocated by mss on both paths, not counted)")
+    print(f"{'path':<10}{'traced peak MB':>16}{'ms':>8}")
+    for name, capture in (("legacy", lambda: legacy_capture(*frame)), ("pooled", lambda: service.encode_shots([frame]))):
+        peak, seconds = measure(capture, args.captures)
+        print(f"{name:<10}{peak / 1e6:>16.2f}{seconds * 1000:>8.1f}")
+    service.close()
+
+
+if __name__ == "__main__":
+    main()
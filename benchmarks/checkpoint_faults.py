@@ -0,0 +1,280 @@
+# checkpoint_faults.py kills a checkpointing timer at random moments and checks that every restart resumes correctly
+#
+# Usage (from the repository root):
+#   python -m benchmarks.checkpoint_faults --trials 200
+#
+# Each trial runs a fast PomodoroSession in a child process that checkpoints the way the app does:
+# a plain periodic save plus an fsynced save after every transition. The parent SIGKILLs the child at
+# a random time, then restores the checkpoint, catches up and compares the position with where an
+# uninterrupted timer would be. It also times both kinds of save.
+#
+# The app trials do the same through PomodoroApp's own session_state() and restore_session(), on a
+# headless stand-in for the window, with conversation turns arriving the way remember_reply() reports
+# them. Their timer counts whole seconds like the app's, so its periods are seconds long, and every
+# restore must bring back the last turn whose save had returned before the kill.
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+import logging
+
+from pomodoro import PomodoroApp
+from utils.checkpoint import SessionCheckpoint
+from utils.session import PomodoroSession
+
+LENGTHS = {"focus_length": 0.4, "short_break": 0.15, "long_break_length": 0.3}
+APP_LENGTHS = {"focus_length": 4, "short_break": 3, "long_break_length": 3}
+CONVERSATION = [["user", "What should I work on next?"], ["assistant", "Finish the report draft before lunch."]] * 5
+TASKS = ["write report", "review PR"]
+MAX_HISTORY = 10  # VoiceAssistant.max_history_length
+TURN_EVERY = 0.3  # Mean seconds between conversation turns in the app trials
+
+
+class Widget:
+    def __init__(self, **options):
+        self.options = options
+
+    def config(self, **options):
+        self.options.update(options)
+
+    def cget(self, key):
+        return self.options.get(key)
+
+
+class HeadlessApp:
+    """The attributes and callbacks PomodoroApp's checkpoint methods touch, with plain lists for the task frames."""
+
+    session_state = PomodoroApp.session_state
+    restore_session = PomodoroApp.restore_session
+
+    def __init__(self, conversation=()):
+        self.focus_length = APP_LENGTHS["focus_length"]
+        self.short_break = APP_LENGTHS["short_break"]
+        self.long_break_length = APP_LENGTHS["long_break_length"]
+        self.max_work_sessions = 4
+        self.max_break_sessions = 4
+        self.work_cycles_completed = 0
+        self.work_sessions_completed = 0
+        self.break_sessions_completed = 0
+        self.is_focus_time = True
+        self.running = False
+        self.remaining_time = self.focus_length
+        self.paused_time = None
+        self.todo_frame = []
+        self.completed_frame = []
+        self.progress = {}
+        self.settings_manager = self
+        self.work_session_label = Widget()
+        self.break_session_label = Widget()
+        self.start_button = Widget(text="Start")
+        self.reset_button = Widget()
+        self.skip_button = Widget()
+        self.voice_assistant = self
+        # As VoiceAssistant(history=...) does with the checkpoint's "conversation"
+        self.conversation_history = [{"role": "system", "content": ""}]
+        self.conversation_history += [{"role": role, "content": content} for role, content in conversation]
+
+    def mirror(self, session):
+        """Copies the position of a running PomodoroSession, as the app's once-a-second tick would have it."""
+        self.is_focus_time = session.phase == "focus"
+        self.work_sessions_completed = session.work_sessions_completed
+        self.break_sessions_completed = session.break_sessions_completed
+        self.work_cycles_completed = session.work_cycles_completed
+        self.running = session.running
+        self.remaining_time = int(round(session.remaining()))
+
+    def add_turn(self, number):
+        self.conversation_history.append({"role": "user", "content": f"Question {number}"})
+        self.conversation_history.append({"role": "assistant", "content": f"Answer {number}"})
+        self.conversation_history = self.conversation_history[:1] + self.conversation_history[1:][-MAX_HISTORY:]
+
+    def task_texts(self, frame):
+        return list(frame)
+
+    def add_task_row(self, text):
+        self.todo_frame.append(text)
+
+    def add_completed_row(self, text):
+        self.completed_frame.append(text)
+
+    def resume_pomodoro(self):
+        self.running = True
+
+    def update_setting(self, key, value):
+        pass
+
+    def save_settings(self):
+        pass
+
+    def update_work_cycles_display(self):
+        pass
+
+    def update_display(self, remaining):
+        pass
+
+    def update_state_indicator(self, state):
+        pass
+
+
+def run_timer(path, started_at, interval, ready):
+    # Same schedule as the parent's reference timer: the first period started at started_at (wall clock)
+    session = PomodoroSession(**LENGTHS)
+    session.tasks = ["write report", "review PR"]
+    session.start(now=time.monotonic() - (time.time() - started_at))
+    checkpoint = SessionCheckpoint(path)
+    checkpoint.save({**session.to_dict(), "conversation": CONVERSATION}, fsync=True)
+    ready.set()
+    while True:
+        transitions = session.advance()
+        checkpoint.save({**session.to_dict(), "conversation": CONVERSATION}, fsync=bool(transitions))
+        time.sleep(interval)
+
+
+def run_app(path, started_at, interval, ready, acked):
+    session = PomodoroSession(**APP_LENGTHS)
+    session.start(now=time.monotonic() - (time.time() - started_at))
+    app = HeadlessApp()
+    app.todo_frame = list(TASKS)
+    app.mirror(session)
+    checkpoint = SessionCheckpoint(path)
+    checkpoint.save(app.session_state(), fsync=True)
+    ready.set()
+    turns = 0
+    while True:
+        transitions = session.advance()
+        app.mirror(session)
+        new_turn = random.random() < interval / TURN_EVERY
+        if new_turn:
+            app.add_turn(turns)
+        # A new turn requests a checkpoint, which is fsynced like one after a transition
+        checkpoint.save(app.session_state(), fsync=bool(transitions) or new_turn)
+        if new_turn:
+            acked.value = turns
+            turns += 1
+        time.sleep(interval)
+
+
+def expected_session(started_at, wall, lengths=LENGTHS):
+    session = PomodoroSession(**lengths)
+    session.start(now=0.0)
+    session.advance(wall - started_at)
+    return session, wall - started_at
+
+
+def compare(restored, now, expected, elapsed, slack):
+    fields = ("phase", "work_sessions_completed", "break_sessions_completed", "work_cycles_completed")
+    if any(getattr(restored, field) != getattr(expected, field) for field in fields):
+        # A deadline within slack of the restore can land either side of it
+        if abs(restored.remaining(now) - expected.remaining(elapsed)) < expected.length_of(expected.phase) - slack:
+            return "mismatch", None
+        return "ok", 0.0
+    return "ok", abs(restored.remaining(now) - expected.remaining(elapsed))
+
+
+def kill_and_load(path, target, started_at, interval, max_runtime, *extra):
+    ready = multiprocessing.Event()
+    child = multiprocessing.Process(target=target, args=(path, started_at, interval, ready, *extra), daemon=True)
+    child.start()
+    ready.wait()
+    time.sleep(random.uniform(0, max_runtime))
+    child.kill()
+    child.join()
+    time.sleep(random.uniform(0, 0.3))  # Downtime, during which periods may end
+
+    try:
+        with open(path, "r") as f:
+            json.load(f)
+    except ValueError:
+        return None
+    return SessionCheckpoint(path).load()
+
+
+def trial(path, interval, max_runtime):
+    started_at = time.time()
+    state = kill_and_load(path, run_timer, started_at, interval, max_runtime)
+    if state is None:
+        return "corrupt", None
+    restored = PomodoroSession.from_dict(state)
+    now, wall = time.monotonic(), time.time()
+    restored.advance(now)
+    expected, elapsed = expected_session(started_at, wall)
+    return compare(restored, now, expected, elapsed, 0.005 * expected.length_of(expected.phase))
+
+
+def app_trial(path, interval, max_runtime):
+    started_at = time.time()
+    acked = multiprocessing.Value("i", -1)
+    state = kill_and_load(path, run_app, started_at, interval, max_runtime, acked)
+    if state is None:
+        return "corrupt", None
+    # What PomodoroApp.__init__ does with a checkpoint
+    app = HeadlessApp(conversation=state.get("conversation"))
+    app.restore_session(state)
+    if acked.value >= 0 and app.conversation_history[-1]["content"] != f"Answer {acked.value}":
+        return "lost_turn", None
+    if app.todo_frame != TASKS:
+        return "mismatch", None
+    # Read the restored position back through session_state(), which is how the next checkpoint would see it
+    restored = PomodoroSession.from_dict(app.session_state())
+    now, wall = time.monotonic(), time.time()
+    expected, elapsed = expected_session(started_at, wall, APP_LENGTHS)
+    # The save and the restore each round the remaining time and the deadline to whole seconds
+    return compare(restored, now, expected, elapsed, 2.0)
+
+
+def save_costs(path, count):
+    session = PomodoroSession(**LENGTHS)
+    checkpoint = SessionCheckpoint(path)
+    costs = {}
+    for fsync in (False, True):
+        samples = []
+        for i in range(count):
+            session.work_sessions_completed = i  # A real change, so nothing is skipped
+            start = time.perf_counter()
+            checkpoint.save({**session.to_dict(), "conversation": CONVERSATION}, fsync=fsync)
+            samples.append(time.perf_counter() - start)
+        costs[fsync] = statistics.median(samples)
+    start = time.perf_counter()
+    for _ in range(count):
+        checkpoint.save({**session.to_dict(), "conversation": CONVERSATION})
+    costs["unchanged"] = (time.perf_counter() - start) / count
+    return costs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crash-restore correctness and cost of session checkpoints.")
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between the child's periodic saves")
+    parser.add_argument("--max-runtime", type=float, default=2.0, help="Longest a child runs before it is killed")
+    parser.add_argument("--app-trials", type=int, default=20, help="Kills of the app harness, whose periods last seconds")
+    parser.add_argument("--app-max-runtime", type=float, default=8.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR, force=True)  # pomodoro configures INFO on import
+    path = os.path.join(tempfile.mkdtemp(prefix="checkpoint-faults-"), "session_state.json")
+    for label, run, trials, max_runtime in (("session", trial, args.trials, args.max_runtime),
+                                            ("app", app_trial, args.app_trials, args.app_max_runtime)):
+        outcomes = {"ok": 0, "corrupt": 0, "mismatch": 0, "lost_turn": 0}
+        errors = []
+        for _ in range(trials):
+            outcome, error = run(path, args.interval, max_runtime)
+            outcomes[outcome] += 1
+            if error is not None:
+                errors.append(error)
+
+        print(f"{label}: {trials} kills: {outcomes['ok']} resumed correctly, {outcomes['corrupt']} unreadable checkpoints, "
+              f"{outcomes['mismatch']} resumed in the wrong period or with the wrong tasks, {outcomes['lost_turn']} lost a conversation turn")
+        if errors:
+            print(f"{label}: position error after restore: median {statistics.median(errors) * 1000:.1f} ms, max {max(errors) * 1000:.1f} ms")
+    costs = save_costs(path, 200)
+    print(f"Save cost: {costs[False] * 1000:.3f} ms plain, {costs[True] * 1000:.3f} ms with fsync, "
+          f"{costs['unchanged'] * 1000:.3f} ms when unchanged (skipped)")
+
+
+if __name__ == "__main__":
+    main()
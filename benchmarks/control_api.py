@@ -0,0 +1,139 @@
+# control_api.py load-tests the daemon's control API: SSE fan-out to many clients and JSON command latency
+#
+# Usage (from the repository root):
+#   python -m benchmarks.control_api --subscribers 1000 --tick 0.01 --seconds 10 --commanders 20
+#
+# The real SessionService and ControlServer run in a child process with short periods and a fast
+# tick, so transitions happen during the run. Delivery latency is measured from the wall-clock
+# timestamp the server puts in each event, so it includes the clients' own parsing time.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+import logging
+
+from utils.control_api import ControlServer, EventHub
+from utils.session import PomodoroSession
+from utils.session_service import SessionService
+
+
+def serve(conn, tick, max_buffer):
+    """Runs in a child process so the server and the clients don't share one interpreter lock."""
+    async def run():
+        session = PomodoroSession(focus_length=3, short_break=1, long_break_length=2)
+        service = SessionService(session, EventHub(max_buffer=max_buffer), tick_seconds=tick)
+        server = await ControlServer(service.routes(), port=0).start()
+        ticker = asyncio.create_task(service.run())
+        conn.send(server.port)
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)  # Waits for the parent to finish
+        ticker.cancel()
+        await server.close()
+        conn.send({"published": service.hub.published, "dropped": service.hub.dropped})
+
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(run())
+
+
+async def http(reader, writer, method, path):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: 0\r\n\r\n".encode())
+    await writer.drain()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return json.loads(await reader.readexactly(length))
+
+
+async def subscriber(port, stop_at, latencies, counts):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await writer.drain()
+    received = 0
+
+    async def read():
+        nonlocal received
+        async for line in reader:
+            if line.startswith(b"data: "):
+                received += 1
+                sent = json.loads(line[6:]).get("t")
+                if sent is not None:
+                    latencies.append(time.time() - sent)
+
+    try:
+        await asyncio.wait_for(read(), stop_at - time.time())
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        writer.close()
+        counts.append(received)
+
+
+async def commander(port, stop_at, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            await http(reader, writer, "GET", "/state")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def load(port, subscribers, commanders, seconds):
+    stop_at = time.time() + seconds
+    event_latencies, counts, command_latencies = [], [], []
+    tasks = [subscriber(port, stop_at, event_latencies, counts) for _ in range(subscribers)]
+    tasks += [commander(port, stop_at, command_latencies) for _ in range(commanders)]
+    # Starts the timer once everyone is connected
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await asyncio.sleep(0.5)
+    await http(reader, writer, "POST", "/start")
+    writer.close()
+    await asyncio.gather(*tasks)
+    return event_latencies, counts, command_latencies
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Events per second and latency of the daemon's control API.")
+    parser.add_argument("--subscribers", type=int, default=1000, help="Concurrent SSE clients")
+    parser.add_argument("--commanders", type=int, default=20, help="Concurrent keep-alive JSON clients")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tick", type=float, default=0.01, help="Tick interval; the daemon uses 1 s")
+    parser.add_argument("--max-buffer", type=int, default=64 * 1024, help="Unsent bytes per client before it is dropped")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve, args=(child_conn, args.tick, args.max_buffer), daemon=True)
+    server.start()
+    port = conn.recv()
+    event_latencies, counts, command_latencies = asyncio.run(load(port, args.subscribers, args.commanders, args.seconds))
+    conn.send("stop")
+    stats = conn.recv()
+    server.join()
+
+    delivered = sum(counts)
+    print(f"{args.subscribers} subscribers, {args.commanders} command clients, {args.seconds:.0f} s, tick {args.tick * 1000:.0f} ms")
+    print(f"Events published {stats['published']}; delivered {delivered} ({delivered / args.seconds:,.0f}/s); "
+          f"clients dropped {stats['dropped']}")
+    print(f"Event latency  p50 {percentile(event_latencies, 0.5) * 1000:7.2f} ms  p99 {percentile(event_latencies, 0.99) * 1000:7.2f} ms")
+    if command_latencies:
+        print(f"GET /state     {len(command_latencies) / args.seconds:,.0f} req/s  "
+              f"p50 {statistics.median(command_latencies) * 1000:7.2f} ms  p99 {percentile(command_latencies, 0.99) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
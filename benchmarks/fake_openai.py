@@ -0,0 +1,165 @@
+# fake_openai.py is a local OpenAI-compatible server used by the benchmarks
+
+import io
+import json
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class FakeOpenAIConfig:
+    def __init__(self, transcription_latency=0.3, chat_latency=0.6, speech_latency=0.4,
+                 token_delay=0.02, speech_chunk_delay=0.01, speech_seconds=2.0, speech_char_latency=0.0,
+                 transcript="What should I work on next?",
+                 reply="Start with the smallest task on your list and ride the momentum."):
+        self.transcription_latency = transcription_latency  # Seconds before the transcript is returned
+        self.chat_latency = chat_latency  # Seconds before the first chat token (or full reply)
+        self.speech_latency = speech_latency  # Seconds before the first speech byte
+        self.token_delay = token_delay  # Seconds between streamed chat tokens
+        self.speech_chunk_delay = speech_chunk_delay  # Seconds between streamed speech chunks
+        self.speech_seconds = speech_seconds  # Length of the generated speech clip
+        self.speech_char_latency = speech_char_latency  # Extra seconds before the first speech byte per input character
+        self.transcript = transcript
+        self.reply = reply
+
+
+def make_speech_clip(seconds, frame_rate=24000):
+    """Returns an mp3 clip (bytes) standing in for a tts-1 reply."""
+    from pydub.generators import Sine
+    clip = Sine(220).to_audio_segment(duration=int(seconds * 1000)).set_frame_rate(frame_rate).set_channels(1)
+    buffered = io.BytesIO()
+    clip.export(buffered, format="mp3")
+    return buffered.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        config = self.server.config
+        body = self._read_body()
+        path = self.path.split("?")[0].rstrip("/")
+        self.server.count(path)
+
+        if path.endswith("/audio/transcriptions"):
+            time.sleep(config.transcription_latency)
+            self._send_json({"text": config.transcript})
+        elif path.endswith("/chat/completions"):
+            request = json.loads(body or b"{}")
+            self._chat(request, config)
+        elif path.endswith("/audio/speech"):
+            text = json.loads(body or b"{}").get("input", "")
+            time.sleep(config.speech_latency + config.speech_char_latency * len(text))
+            self._start_chunked("audio/mpeg")
+            clip = self.server.speech_clip
+            for i in range(0, len(clip), 4096):
+                self._write_chunk(clip[i:i + 4096])
+                time.sleep(config.speech_chunk_delay)
+            self._end_chunked()
+        else:
+            self.send_error(404)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "fake-model", "object": "model", "created": 0, "owned_by": "bench"}]})
+        else:
+            self.send_error(404)
+
+    def _chat(self, request, config):
+        model = request.get("model", "fake-model")
+        reply = config.reply
+        time.sleep(config.chat_latency)
+        if not request.get("stream"):
+            self._send_json({
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [
+                    {"index": i, "finish_reason": "stop", "message": {"role": "assistant", "content": reply if i == 0 else f"{reply} ({i + 1})"}}
+                    for i in range(request.get("n") or 1)
+                ],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(reply.split()), "total_tokens": len(reply.split())},
+            })
+            return
+
+        self._start_chunked("text/event-stream")
+        for word in reply.split(" "):
+            chunk = {
+                "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            time.sleep(config.token_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.config = config or FakeOpenAIConfig()
+        self.speech_clip = make_speech_clip(self.config.speech_seconds)
+        self.request_counts = {}
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, path):
+        with self._count_lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake OpenAI server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = FakeOpenAIServer(port=8765).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,96 @@
+# history_retention.py simulates a year of conversations and compares the unbounded history with the compacted one
+#
+# Usage (from the repository root):
+#   python -m benchmarks.history_retention --days 365 --turns-per-day 40
+#
+# Both databases get the same messages with day-by-day timestamps. The unbounded one keeps the old
+# schema (no index, no archive); the compacted one runs a compaction pass at the end of every
+# simulated day with the default retention limits. Afterwards the script reports file size, what is
+# live and archived, the startup read of the last ten messages, and reading one week back from the archive.
+
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from utils.database import ConversationDatabase
+
+WORDS = ("focus report budget slides meeting review draft email plan sprint deadline break coffee "
+         "client design launch notes research idea outline task finish start tired stuck help next").split()
+
+
+def message(rng, low, high):
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+    return text.capitalize() + "."
+
+
+def timed(func, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="File size and query time of the conversation history after a simulated year.")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--turns-per-day", type=int, default=40, help="User and assistant message pairs per day")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    workdir = tempfile.mkdtemp(prefix="history-retention-")
+    legacy = sqlite3.connect(os.path.join(workdir, "unbounded.db"))
+    legacy.execute('CREATE TABLE conversations (id INTEGER PRIMARY KEY, role TEXT, content TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)')
+    db = ConversationDatabase(os.path.join(workdir, "compacted.db"))
+    conn = db.get_connection()
+
+    start_day = datetime.datetime(2025, 1, 1, 9, 0, tzinfo=datetime.timezone.utc)
+    compaction = []
+    for day in range(args.days):
+        rows = []
+        for turn in range(args.turns_per_day):
+            at = (start_day + datetime.timedelta(days=day, minutes=turn * 12)).strftime('%Y-%m-%d %H:%M:%S')
+            rows.append(("user", message(rng, 4, 30), at))
+            rows.append(("assistant", message(rng, 12, 40), at))
+        insert = 'INSERT INTO conversations (role, content, timestamp) VALUES (?, ?, ?)'
+        legacy.executemany(insert, rows)
+        legacy.commit()
+        with db.lock:
+            conn.executemany(insert, rows)
+            conn.commit()
+        end_of_day = (start_day + datetime.timedelta(days=day + 1)).timestamp()
+        started = time.perf_counter()
+        db.compact(now=end_of_day)
+        compaction.append(time.perf_counter() - started)
+
+    messages = args.days * args.turns_per_day * 2
+    stats = db.stats()
+    legacy_recent = timed(lambda: legacy.execute('SELECT role, content FROM conversations ORDER BY timestamp DESC LIMIT 10').fetchall(), args.repeats)
+    recent = timed(lambda: db.get_conversation_history(10), args.repeats)
+    last_day = start_day + datetime.timedelta(days=args.days)
+    week = ((last_day - datetime.timedelta(days=60)).strftime('%Y-%m-%d %H:%M:%S'),
+            (last_day - datetime.timedelta(days=53)).strftime('%Y-%m-%d %H:%M:%S'))
+    archive_week = timed(lambda: db.get_archived(*week), max(1, args.repeats // 5))
+    legacy_size = os.path.getsize(os.path.join(workdir, "unbounded.db"))
+
+    print(f"{args.days} days, {messages:,} messages")
+    print(f"{'':<11}{'file MB':>9}{'live rows':>11}{'last 10 ms':>12}")
+    print(f"{'unbounded':<11}{legacy_size / 1e6:>9.2f}{messages:>11,}{legacy_recent:>12.3f}")
+    print(f"{'compacted':<11}{stats['file_bytes'] / 1e6:>9.2f}{stats['live_messages']:>11,}{recent:>12.3f}")
+    print(f"Archive: {stats['archived_messages']:,} messages in {stats['archive_blobs']} blobs, "
+          f"{stats['archive_ratio']}x smaller than their JSON, {stats['free_pages']} free pages left in the file")
+    print(f"Reading one week from 60 days back out of the archive: {archive_week:.1f} ms ({len(db.get_archived(*week))} messages)")
+    print(f"Daily compaction pass: median {statistics.median(compaction) * 1000:.1f} ms, worst {max(compaction) * 1000:.1f} ms")
+    legacy.close()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
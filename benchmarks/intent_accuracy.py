@@ -0,0 +1,80 @@
+# intent_accuracy.py scores the local timer-command recognizer against a labeled set of transcripts
+#
+# Usage (from the repository root):
+#   python -m benchmarks.intent_accuracy --verbose
+#
+# Each line of the labeled set is {"text": ..., "intent": name or null, "task": ...}; null means the
+# utterance is open-ended and must reach the dialogue model. A command run for an open-ended request
+# is the costly mistake, so false commands are reported apart from missed ones. The fuzzy threshold
+# is swept to show the trade-off, and the recognizer's own latency is measured at the default.
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from utils.intents import MATCH_THRESHOLD, IntentRecognizer
+
+DEFAULT_LABELS = os.path.join(os.path.dirname(__file__), "data", "intents.jsonl")
+
+
+def score(recognizer, labels):
+    counts = {"correct": 0, "false_command": 0, "missed": 0, "wrong_intent": 0, "wrong_task": 0}
+    errors = []
+    for label in labels:
+        result = recognizer.match(label["text"])
+        name, argument = result if result is not None else (None, None)
+        if name == label["intent"] and (name != "add_task" or argument == label["task"]):
+            counts["correct"] += 1
+            continue
+        if label["intent"] is None:
+            kind = "false_command"
+        elif name is None:
+            kind = "missed"
+        elif name != label["intent"]:
+            kind = "wrong_intent"
+        else:
+            kind = "wrong_task"
+        counts[kind] += 1
+        errors.append((kind, label["text"], result))
+    return counts, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accuracy and latency of the local intent recognizer.")
+    parser.add_argument("--labels", default=DEFAULT_LABELS, help="JSONL of labeled transcripts")
+    parser.add_argument("--repeats", type=int, default=200, help="Passes over the set when timing")
+    parser.add_argument("--verbose", action="store_true", help="List the misclassified transcripts")
+    args = parser.parse_args(argv)
+
+    with open(args.labels, "r") as f:
+        labels = [json.loads(line) for line in f if line.strip()]
+    commands = sum(1 for label in labels if label["intent"] is not None)
+    print(f"{len(labels)} transcripts, {commands} commands, {len(labels) - commands} open-ended")
+
+    print(f"{'threshold':>9}{'accuracy':>10}{'false cmd':>11}{'missed':>8}{'wrong':>7}{'bad task':>10}")
+    for threshold in (0.7, 0.75, 0.8, MATCH_THRESHOLD, 0.85, 0.9, 0.95):
+        counts, _ = score(IntentRecognizer(threshold=threshold), labels)
+        print(f"{threshold:>9.2f}{counts['correct'] / len(labels):>10.1%}{counts['false_command']:>11}"
+              f"{counts['missed']:>8}{counts['wrong_intent']:>7}{counts['wrong_task']:>10}")
+
+    recognizer = IntentRecognizer()
+    samples = []
+    for _ in range(args.repeats):
+        for label in labels:
+            start = time.perf_counter()
+            recognizer.match(label["text"])
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"Latency per transcript at {MATCH_THRESHOLD}: mean {statistics.mean(samples) * 1e6:.0f} us, "
+          f"p50 {samples[len(samples) // 2] * 1e6:.0f} us, p99 {samples[int(len(samples) * 0.99)] * 1e6:.0f} us")
+
+    if args.verbose:
+        _, errors = score(recognizer, labels)
+        for kind, text, result in errors:
+            print(f"  {kind:<14}{text!r} -> {result}")
+
+
+if __name__ == "__main__":
+    main()
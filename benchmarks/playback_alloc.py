@@ -0,0 +1,86 @@
+# playback_alloc.py compares memory and CPU of the old copy-and-scale playback path with the PCM source
+#
+# Usage (from the repository root):
+#   python -m benchmarks.playback_alloc --seconds 20 --channels 2
+#
+# The old path is what playback used to do before handing samples to sd.play: widen the pydub
+# samples to a NumPy array, multiply by the volume in float64, and cast back to int16. The new path
+# takes a view of pydub's buffer and scales it block by block inside the (simulated) output callback.
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from pydub.generators import Sine
+
+from utils.playback import PCMQueueSource, pcm_view
+
+BLOCK = 480  # 20 ms at 24 kHz, the block size the barge-in stream uses
+
+
+def old_path(audio, volume):
+    samples = np.array(audio.get_array_of_samples())
+    return (samples * volume).astype(np.int16)
+
+
+def new_path(audio, volume):
+    source = PCMQueueSource(audio.channels, audio.frame_rate, gain=volume)
+    source.push(pcm_view(audio))
+    source.close()
+    return source
+
+
+def drain(source, out):
+    timings = []
+    while not source.done:
+        start = time.perf_counter()
+        source.fill(out)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def peak_allocation(func):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Allocations and CPU per reply for the playback paths.")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--rate", type=int, default=24000)
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--volume", type=float, default=0.7)
+    args = parser.parse_args(argv)
+
+    audio = Sine(220).to_audio_segment(duration=int(args.seconds * 1000)).set_frame_rate(args.rate).set_channels(args.channels)
+    pcm_bytes = len(audio.raw_data)
+
+    start = time.process_time()
+    _, old_peak = peak_allocation(lambda: old_path(audio, args.volume))
+    old_cpu = time.process_time() - start
+
+    start = time.process_time()
+    source, new_peak = peak_allocation(lambda: new_path(audio, args.volume))
+    new_cpu = time.process_time() - start
+
+    out = np.zeros((BLOCK, args.channels), dtype=np.float32)
+    start = time.process_time()
+    timings, callback_peak = peak_allocation(lambda: drain(source, out))
+    callback_cpu = time.process_time() - start
+
+    print(f"Reply: {args.seconds:.0f} s, {args.channels} channel(s), {pcm_bytes / 1e6:.2f} MB of PCM")
+    print(f"{'':<30}{'peak alloc MB':>15}{'CPU ms':>10}")
+    print(f"{'old copy-and-scale':<30}{old_peak / 1e6:>15.2f}{old_cpu * 1000:>10.1f}")
+    print(f"{'new view + source':<30}{new_peak / 1e6:>15.2f}{new_cpu * 1000:>10.1f}")
+    print(f"{'new callbacks (whole reply)':<30}{callback_peak / 1e6:>15.2f}{callback_cpu * 1000:>10.1f}")
+    print(f"Callback: median {statistics.median(timings) * 1e6:.1f} us, max {max(timings) * 1e6:.1f} us per {BLOCK}-frame block")
+
+
+if __name__ == "__main__":
+    main()
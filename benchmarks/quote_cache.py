@@ -0,0 +1,70 @@
+# quote_cache.py replays a day of Pomodoro cycles against the fake server with and without the quote cache
+#
+# Usage (from the repository root):
+#   python -m benchmarks.quote_cache --cycles 16 --chat-latency 2.0
+#
+# The task list is edited every few cycles (a task added, a typo fixed) so the shingle match is
+# exercised, and the refill requests run in the background just as they do in the app.
+
+import argparse
+import time
+import logging
+
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+from utils.ai_provider import AIProvider
+from utils.ai_utils import AIUtils
+from utils.async_runtime import AsyncRuntime
+from utils.quote_cache import QuoteCache
+
+TASK_LISTS = [
+    "Write the quarterly report, Review pull requests",
+    "Write the quarterly report, Review pull requests",
+    "Write the quartely report, Review pull requests",
+    "Review pull requests, Write the quarterly report, Reply to emails",
+]
+
+
+def replay(base_url, cycles, cache, pause):
+    runtime = AsyncRuntime(name="quote-bench")
+    provider = AIProvider(api_key="bench", base_url=base_url, max_retries=0)
+    ai_utils = AIUtils(provider, "Alex", "software engineer", runtime, quote_cache=cache)
+    latencies = []
+    for cycle in range(cycles):
+        todo = TASK_LISTS[(cycle // 4) % len(TASK_LISTS)]
+        for_break = cycle % 2 == 1
+        is_long_break = for_break and cycle % 8 == 7
+        start = time.perf_counter()
+        ai_utils.fetch_motivational_quote(for_break, todo, is_long_break)
+        latencies.append(time.perf_counter() - start)
+        time.sleep(pause)  # Stands in for the session itself, giving refills time to land
+    runtime.run(provider.close(), timeout=2)
+    runtime.shutdown()
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hit rate and latency saved by the motivational-quote cache.")
+    parser.add_argument("--cycles", type=int, default=16)
+    parser.add_argument("--chat-latency", type=float, default=2.0, help="Fake server seconds per completion")
+    parser.add_argument("--pause", type=float, default=2.5, help="Seconds between cycles")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = FakeOpenAIServer(FakeOpenAIConfig(chat_latency=args.chat_latency)).start()
+    try:
+        uncached = replay(server.base_url, args.cycles, None, args.pause)
+        cache = QuoteCache()
+        cached = replay(server.base_url, args.cycles, cache, args.pause)
+    finally:
+        server.stop()
+
+    stats = cache.stats()
+    print(f"{'':<12}{'total s':>10}{'mean s':>10}{'max s':>10}")
+    for name, values in (("no cache", uncached), ("cache", cached)):
+        print(f"{name:<12}{sum(values):>10.2f}{sum(values) / len(values):>10.2f}{max(values):>10.2f}")
+    print(f"Hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses); "
+          f"estimated latency saved {stats['latency_saved_s']:.1f} s; measured {sum(uncached) - sum(cached):.1f} s")
+
+
+if __name__ == "__main__":
+    main()
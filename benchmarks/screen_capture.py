@@ -0,0 +1,64 @@
+# screen_capture.py times encoding one to four monitors for the vision model, serially and in parallel
+#
+# Usage (from the repository root):
+#   python -m benchmarks.screen_capture --width 2560 --height 1440 --repeats 5
+#
+# Monitors are simulated with BGRA buffers in the same layout mss returns, filled with rendered text,
+# so no display is needed. Each layout is encoded with one worker and with the default pool, and the
+# payload size is reported next to the time.
+
+import argparse
+import random
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from utils.screen_capture import ENCODE_WORKERS, ScreenCapture
+
+WORDS = "focus report revenue design review budget sprint draft meeting notes roadmap invoice deploy".split()
+
+
+def fake_monitor(width, height, seed):
+    random.seed(seed)
+    image = Image.new("RGB", (width, height), (245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, width, 40), fill=(40, 60, 90))
+    for y in range(60, height - 20, 22):
+        draw.text((30, y), " ".join(random.choice(WORDS) for _ in range(random.randint(3, 20))), fill="black")
+    return image.tobytes("raw", "BGRX"), width, height  # What mss hands back for a grab
+
+
+def time_encode(capture, frames, layout, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        images = capture.encode_shots(frames, layout)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), sum(len(image["url"]) for image in images), len(images)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encode time and payload size for multi-monitor screenshots.")
+    parser.add_argument("--width", type=int, default=2560)
+    parser.add_argument("--height", type=int, default=1440)
+    parser.add_argument("--monitors", type=int, default=4, help="Largest number of monitors to simulate")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    serial, parallel = ScreenCapture(workers=1), ScreenCapture()
+    monitors = [fake_monitor(args.width, args.height, seed) for seed in range(args.monitors)]
+    print(f"{'monitors':>8} {'layout':<9}{'images':>7}{'KB':>8}{'1 worker ms':>13}{f'{ENCODE_WORKERS} workers ms':>14}{'speedup':>9}")
+    for count in range(1, args.monitors + 1):
+        for layout in ("tiled", "separate"):
+            if count == 1 and layout == "separate":
+                continue  # A single screen is always sent as one full-detail image
+            one, size, images = time_encode(serial, monitors[:count], layout, args.repeats)
+            many, _, _ = time_encode(parallel, monitors[:count], layout, args.repeats)
+            print(f"{count:>8} {layout:<9}{images:>7}{size / 1024:>8,.0f}{one * 1000:>13.1f}{many * 1000:>14.1f}{one / many:>8.2f}x")
+    serial.close()
+    parallel.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# screen_index.py measures the per-capture CPU cost of the local screen history and the speed of its index
+#
+# Usage (from the repository root):
+#   python -m benchmarks.screen_index --width 1920 --height 1080 --frames 30
+#
+# Frames are synthetic desktops with real rendered text, so no display is needed. Each scenario
+# changes a different amount of the screen between captures; the OCR column is only filled in when
+# tesseract and pytesseract are installed. The index is then filled with a working week of captures
+# and timed on searches and "what was I doing at..." lookups.
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from utils.screen_index import ChangeDetector, ScreenIndex, SCREEN_INDEX_INTERVAL, ocr_available, ocr_regions
+
+WORDS = ("focus report revenue design review budget sprint draft meeting notes roadmap invoice "
+         "deploy server latency pomodoro customer email schedule quarterly planning").split()
+
+
+def render_desktop(width, height, lines, offset=0):
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines[offset:offset + height // 24]):
+        draw.text((40, 20 + i * 24), line, fill="black")
+    rgb = np.asarray(image)
+    bgra = np.empty((height, width, 4), dtype=np.uint8)
+    bgra[..., 0], bgra[..., 1], bgra[..., 2], bgra[..., 3] = rgb[..., 2], rgb[..., 1], rgb[..., 0], 255
+    return bgra
+
+
+def random_line():
+    return " ".join(random.choice(WORDS) for _ in range(random.randint(4, 12)))
+
+
+def scenario_frames(name, width, height, count):
+    lines = [random_line() for _ in range(400)]
+    frames = []
+    for i in range(count):
+        if name == "typing":
+            lines[10] = lines[10] + " " + random.choice(WORDS)  # One line grows per capture
+            frames.append(render_desktop(width, height, lines))
+        elif name == "scrolling":
+            frames.append(render_desktop(width, height, lines, offset=i * 5))
+        else:
+            frames.append(render_desktop(width, height, lines))
+    return frames
+
+
+def measure(frames, use_ocr):
+    detector = ChangeDetector()
+    detector.regions(frames[0])  # The first capture reads the whole screen; steady state is what matters
+    detect, ocr, pixels, words = [], [], 0, 0
+    for frame in frames[1:]:
+        start = time.process_time()
+        regions = detector.regions(frame)
+        detect.append(time.process_time() - start)
+        pixels += sum(width * height for _, width, height in regions)
+        if use_ocr and regions:
+            text, cpu = ocr_regions(regions)
+            ocr.append(cpu)
+            words += len(text.split())
+    captures = len(frames) - 1
+    return sum(detect) / captures, (sum(ocr) / captures if ocr else None), pixels / captures, words / captures
+
+
+def benchmark_index(captures, queries):
+    path = os.path.join(tempfile.mkdtemp(prefix="screen-index-"), "screen_history.db")
+    index = ScreenIndex(path)
+    now = time.time()
+    start = time.perf_counter()
+    for i in range(captures):
+        text = random_line() if i % 3 == 0 else ""  # Most captures only change the title
+        index.add(now - (captures - i) * SCREEN_INDEX_INTERVAL, f"s{i // 25}", random.choice(WORDS),
+                  f"{random.choice(WORDS)} - Editor", text)
+    insert = (time.perf_counter() - start) / captures
+    start = time.perf_counter()
+    hits = sum(len(index.search(random.choice(WORDS))) for _ in range(queries))
+    search = (time.perf_counter() - start) / queries
+    start = time.perf_counter()
+    for _ in range(queries):
+        index.describe(now - random.uniform(0, captures * SCREEN_INDEX_INTERVAL))
+    describe = (time.perf_counter() - start) / queries
+    size = os.path.getsize(path)
+    index.close()
+    return insert, search, describe, hits / queries, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-capture CPU of screen history and speed of its index.")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=30, help="Captures per scenario")
+    parser.add_argument("--captures", type=int, default=5 * 8 * 60, help="Index rows: a week of 8-hour days at one per minute")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    use_ocr = ocr_available()
+    if not use_ocr:
+        print("tesseract/pytesseract not installed: OCR cost is not measured.")
+    print(f"{'scenario':<12}{'detect ms':>10}{'OCR ms':>9}{'OCR px':>10}{'words':>7}{'CPU % @ ' + str(SCREEN_INDEX_INTERVAL) + 's':>12}")
+    for name in ("static", "typing", "scrolling"):
+        frames = scenario_frames(name, args.width, args.height, args.frames)
+        detect, ocr, pixels, words = measure(frames, use_ocr)
+        per_capture = detect + (ocr or 0.0)
+        ocr_ms = f"{ocr * 1000:.1f}" if ocr is not None else "-"
+        print(f"{name:<12}{detect * 1000:>10.2f}{ocr_ms:>9}{pixels:>10,.0f}{words:>7.0f}{per_capture / SCREEN_INDEX_INTERVAL * 100:>12.3f}")
+
+    insert, search, describe, hits, size = benchmark_index(args.captures, args.queries)
+    print(f"Index of {args.captures} captures ({size / 1024:,.0f} KB): insert {insert * 1000:.2f} ms, "
+          f"search {search * 1000:.2f} ms ({hits:.1f} hits), time lookup {describe * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# soundscapes.py measures synthesis time, memory and playback CPU of the focus soundscapes
+#
+# Usage (from the repository root):
+#   python -m benchmarks.soundscapes --rate 48000 --seconds 60
+#
+# Playback drives the real AudioMixer callback with a NumPy output buffer instead of a sound card,
+# so the CPU figure is what the audio thread spends per second of sound.
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.mixer import AudioMixer, MIXER_BLOCK
+from utils.playback import LoopSource
+from utils.soundscapes import SOUNDSCAPES, soundscape
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cost of generating and looping each focus soundscape.")
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Audio rendered per soundscape")
+    args = parser.parse_args(argv)
+
+    print(f"{'sound':<10}{'synth ms':>10}{'cached ms':>11}{'MB':>7}{'CPU %':>8}")
+    for kind in SOUNDSCAPES[1:]:
+        start = time.perf_counter()
+        samples = soundscape(kind, args.rate)
+        synth = time.perf_counter() - start
+        start = time.perf_counter()
+        soundscape(kind, args.rate)
+        cached = time.perf_counter() - start
+
+        mixer = AudioMixer(rate=args.rate, channels=2)
+        mixer.play("ambient", LoopSource(samples, args.rate))
+        mixer.set_channel_gain("ambient", 0.3)
+        outdata = np.zeros((MIXER_BLOCK, 2), dtype=np.float32)
+        blocks = int(args.seconds * args.rate / MIXER_BLOCK)
+        start = time.process_time()
+        for _ in range(blocks):
+            mixer._callback(outdata, MIXER_BLOCK, None, None)
+        cpu = time.process_time() - start
+
+        print(f"{kind:<10}{synth * 1000:>10.1f}{cached * 1000:>11.3f}{samples.nbytes / 1e6:>7.2f}{cpu / args.seconds * 100:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
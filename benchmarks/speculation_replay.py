@@ -0,0 +1,116 @@
+# speculation_replay.py replays recorded partial-transcript timelines to tune when replies are speculated
+#
+# Usage (from the repository root):
+#   python -m benchmarks.speculation_replay --llm-ms 700
+#   python -m benchmarks.speculation_replay --wav-dir path/to/wavs --save my_partials.jsonl   # record fixtures
+#
+# Each fixture line holds the partials a turn produced as [seconds after transcription started, text]
+# and the final transcript in the same form. For every policy setting the replay reports how often a
+# speculation was committed, how many requests were cancelled and the tokens they wasted, and the
+# reply latency won. The LLM is modelled as a fixed latency, so no server is needed.
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from utils.speculation import SpeculationPolicy, normalize
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "data", "speculation_partials.jsonl")
+
+
+def record(wav_dir, model, path):
+    """Runs each WAV through the local backend and saves its partial timeline."""
+    import soundfile as sf
+    from utils.stt import LocalWhisperBackend
+
+    backend = LocalWhisperBackend(model)
+    backend.warm_up()
+    with open(path, "w") as f:
+        for wav in sorted(glob.glob(os.path.join(wav_dir, "*.wav"))):
+            recording, fs = sf.read(wav, dtype="float32")
+            start = time.perf_counter()
+            partials, final = [], None
+            for text, is_final in backend.transcribe_stream(recording, fs):
+                stamp = [round(time.perf_counter() - start, 3), text]
+                if is_final:
+                    final = stamp
+                else:
+                    partials.append(stamp)
+            f.write(json.dumps({"wav": os.path.basename(wav), "partials": partials, "final": final}) + "\n")
+            print(f"{os.path.basename(wav)}: {len(partials)} partials, final at {final[0]:.2f} s: {final[1]}")
+
+
+def replay(fixtures, policy, llm, prompt_tokens, reply_tokens):
+    totals = {"started": 0, "committed": 0, "cancelled": 0, "wasted_tokens": 0, "latency_won": 0.0}
+    for fixture in fixtures:
+        policy.reset()
+        current = None  # (normalized text, start time)
+
+        def cancel(at):
+            totals["cancelled"] += 1
+            totals["wasted_tokens"] += prompt_tokens + (reply_tokens if at >= current[1] + llm else 0)
+
+        for at, text in fixture["partials"]:
+            target = policy.update(text)
+            if target is not None and (current is None or current[0] != target):
+                if current is not None:
+                    cancel(at)
+                current = (target, at)
+                totals["started"] += 1
+        final_at, final = fixture["final"]
+        if current is None:
+            continue
+        if normalize(final) == current[0]:
+            totals["committed"] += 1
+            totals["latency_won"] += min(llm, final_at - current[1])
+        else:
+            cancel(final_at)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune speculative replies against recorded partial transcripts.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="JSONL of partial timelines")
+    parser.add_argument("--wav-dir", help="Record fixtures from these WAVs with the local backend instead")
+    parser.add_argument("--save", default="speculation_partials.jsonl", help="Where --wav-dir writes its fixtures")
+    parser.add_argument("--local-model", default="base.en")
+    parser.add_argument("--llm-ms", type=float, default=700, help="Time the dialogue model takes to reply")
+    parser.add_argument("--prompt-tokens", type=int, default=450, help="System prompt plus history, billed per request")
+    parser.add_argument("--reply-tokens", type=int, default=30)
+    parser.add_argument("--max-wasted-tokens", type=float, default=150, help="Budget per turn for the recommendation")
+    args = parser.parse_args(argv)
+
+    if args.wav_dir:
+        record(args.wav_dir, args.local_model, args.save)
+        return
+    with open(args.fixtures, "r") as f:
+        fixtures = [json.loads(line) for line in f if line.strip()]
+    turns = len(fixtures)
+    llm = args.llm_ms / 1000
+
+    print(f"{turns} turns, LLM {args.llm_ms:.0f} ms")
+    print(f"{'min words':>9}{'repeats':>8}{'sentence end':>13}{'committed':>11}{'cancelled':>11}{'wasted tok/turn':>17}{'won ms/turn':>13}")
+    results = []
+    for min_words in (1, 2, 3, 4, 6):
+        for stable_partials in (1, 2):
+            for on_sentence_end in (True, False):
+                policy = SpeculationPolicy(min_words, stable_partials, on_sentence_end)
+                totals = replay(fixtures, policy, llm, args.prompt_tokens, args.reply_tokens)
+                wasted = totals["wasted_tokens"] / turns
+                won = totals["latency_won"] / turns * 1000
+                results.append((won, wasted, min_words, stable_partials, on_sentence_end))
+                print(f"{min_words:>9}{stable_partials:>8}{str(on_sentence_end):>13}{totals['committed']:>11}"
+                      f"{totals['cancelled']:>11}{wasted:>17.0f}{won:>13.0f}")
+
+    within = [r for r in results if r[1] <= args.max_wasted_tokens]
+    if within:
+        won, wasted, min_words, stable_partials, on_sentence_end = max(within, key=lambda r: (r[0], -r[1]))
+        print(f"Best within {args.max_wasted_tokens:.0f} wasted tokens per turn: min_words={min_words}, "
+              f"stable_partials={stable_partials}, on_sentence_end={on_sentence_end} "
+              f"({won:.0f} ms won, {wasted:.0f} tokens wasted per turn)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# stt_backends.py compares the remote and local speech-to-text backends on fixture WAVs
+#
+# Usage (from the repository root):
+#   python -m benchmarks.stt_backends --fixtures path/to/wavs --local-model base.en
+#
+# The remote path runs against the local fake server unless --remote-base-url and
+# --api-key point it at a real endpoint.
+
+import argparse
+import glob
+import os
+import statistics
+import tempfile
+import time
+import logging
+
+import soundfile as sf
+
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+from benchmarks.voice_roundtrip import BenchApp
+from utils.stt import LocalWhisperBackend, RemoteWhisperBackend
+
+
+def measure(backend, recording, fs):
+    start = time.perf_counter()
+    first_partial = None
+    text = ""
+    for text, is_final in backend.transcribe_stream(recording, fs):
+        if first_partial is None and text:
+            first_partial = time.perf_counter() - start
+    return text, time.perf_counter() - start, first_partial
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Real-time factor and latency of the STT backends.")
+    parser.add_argument("--fixtures", required=True, help="Directory of WAV files")
+    parser.add_argument("--local-model", default="base.en")
+    parser.add_argument("--remote-base-url", help="Real OpenAI-compatible endpoint (defaults to the fake server)")
+    parser.add_argument("--api-key", default="bench")
+    parser.add_argument("--transcription-latency", type=float, default=0.3, help="Fake server latency")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    wavs = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    if not wavs:
+        parser.error(f"No WAV files in {args.fixtures}")
+
+    server = None
+    base_url = args.remote_base_url
+    if base_url is None:
+        server = FakeOpenAIServer(FakeOpenAIConfig(transcription_latency=args.transcription_latency)).start()
+        base_url = server.base_url
+
+    os.chdir(tempfile.mkdtemp(prefix="stt-bench-"))
+    from utils.voice_assistant import VoiceAssistant
+    app = BenchApp({"STT_BACKEND": "remote"}, base_url, api_key=args.api_key)
+    assistant = VoiceAssistant(app)
+
+    local = LocalWhisperBackend(args.local_model)
+    load_start = time.perf_counter()
+    local.warm_up()
+    print(f"Local model '{args.local_model}' load + warm-up: {time.perf_counter() - load_start:.2f} s")
+
+    backends = [RemoteWhisperBackend(assistant), local]
+    rows = {backend.name: [] for backend in backends}
+    print(f"{'file':<28}{'backend':<9}{'audio s':>9}{'latency s':>11}{'first partial s':>17}{'RTF':>7}  transcript")
+    for path in wavs:
+        recording, fs = sf.read(path, dtype="float32", always_2d=True)
+        recording = recording.mean(axis=1)
+        duration = len(recording) / fs
+        for backend in backends:
+            text, latency, first_partial = measure(backend, recording, fs)
+            rows[backend.name].append((latency, latency / duration))
+            partial = f"{first_partial:.2f}" if first_partial is not None else "-"
+            print(f"{os.path.basename(path)[:27]:<28}{backend.name:<9}{duration:>9.2f}{latency:>11.2f}{partial:>17}{latency / duration:>7.2f}  {text[:40]}")
+
+    for name, values in rows.items():
+        print(f"{name:<8} median latency {statistics.median(v[0] for v in values):.2f} s, median RTF {statistics.median(v[1] for v in values):.2f}")
+
+    assistant.db.close()
+    app.task_pool.shutdown()
+    app.ai_runtime.shutdown()
+    if server is not None:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# timer_server.py load-tests the team timer server with tens of thousands of running timers
+#
+# Usage (from the repository root):
+#   python -m benchmarks.timer_server --timers 20000 --subscribers 500 --seconds 20
+#
+# The server runs in a child process. Every timer gets short, randomized periods so thousands of
+# transitions land each second; SSE clients follow random timers and measure delivery latency. At the
+# end the saved snapshot is reloaded in this process to time restart recovery.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import logging
+
+from benchmarks.control_api import http, percentile
+from utils.control_api import ControlServer
+from utils.timer_server import TimerServer
+
+
+def serve(conn, state_file):
+    async def run():
+        timers = TimerServer(state_file, save_interval=2.0)
+        server = await ControlServer(timers.routes(), port=0).start()
+        runner = asyncio.create_task(timers.run())
+        conn.send(server.port)
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)  # Writes the final snapshot
+        await server.close()
+        conn.send("stopped")
+
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(run())
+
+
+async def post(reader, writer, path, payload):
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return json.loads(await reader.readexactly(length))
+
+
+async def create_timers(port, count, connections):
+    async def worker(ids):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for timer_id in ids:
+            await post(reader, writer, "/timers", {
+                "id": timer_id,
+                "start": True,
+                "focus_length": random.uniform(1.0, 3.0),
+                "short_break": random.uniform(0.5, 1.5),
+                "long_break_length": random.uniform(1.0, 2.0),
+            })
+        writer.close()
+
+    ids = [f"t{i}" for i in range(count)]
+    await asyncio.gather(*(worker(ids[i::connections]) for i in range(connections)))
+    return ids
+
+
+async def follow(port, timer_id, stop_at, latencies, counts):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /timers/{timer_id}/events HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    received = 0
+
+    async def read():
+        nonlocal received
+        async for line in reader:
+            if line.startswith(b"data: "):
+                sent = json.loads(line[6:]).get("t")
+                if sent is not None:
+                    received += 1
+                    latencies.append(time.time() - sent)
+
+    try:
+        await asyncio.wait_for(read(), stop_at - time.time())
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        writer.close()
+        counts.append(received)
+
+
+async def stats(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    result = await http(reader, writer, "GET", "/stats")
+    writer.close()
+    return result
+
+
+async def load(port, timers, subscribers, connections, seconds):
+    start = time.perf_counter()
+    ids = await create_timers(port, timers, connections)
+    created_in = time.perf_counter() - start
+    before = await stats(port)
+    latencies, counts = [], []
+    stop_at = time.time() + seconds
+    await asyncio.gather(*(follow(port, random.choice(ids), stop_at, latencies, counts) for _ in range(subscribers)))
+    after = await stats(port)
+    return created_in, before, after, latencies, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput, lateness and recovery time of the team timer server.")
+    parser.add_argument("--timers", type=int, default=20000)
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--connections", type=int, default=16, help="Keep-alive connections used to create the timers")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    state_file = os.path.join(tempfile.mkdtemp(prefix="timer-bench-"), "timers.json")
+    conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve, args=(child_conn, state_file), daemon=True)
+    server.start()
+    port = conn.recv()
+    created_in, before, after, latencies, counts = asyncio.run(
+        load(port, args.timers, args.subscribers, args.connections, args.seconds)
+    )
+    conn.send("stop")
+    conn.recv()
+    server.join()
+
+    transitions = after["transitions"] - before["transitions"]
+    cpu = after["cpu_seconds"] - before["cpu_seconds"]
+    print(f"{args.timers} timers created and started in {created_in:.1f} s ({args.timers / created_in:,.0f}/s)")
+    print(f"{transitions} transitions in {args.seconds:.0f} s ({transitions / args.seconds:,.0f}/s); "
+          f"server CPU {cpu / args.seconds:.0%} of one core; worst deadline lateness {after['max_lateness_ms']:.1f} ms")
+    print(f"{args.subscribers} subscribers received {sum(counts)} events; "
+          f"delivery p50 {percentile(latencies, 0.5) * 1000:.2f} ms  p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+    # Restart recovery: load the snapshot the server wrote on shutdown
+    start = time.perf_counter()
+    restored = TimerServer(state_file)
+    restored.load()
+    print(f"Restored {len(restored.timers)} timers ({os.path.getsize(state_file) / 1024:,.0f} KB snapshot) "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# tts_chunking.py measures time to first audio for one-shot vs sentence-chunked speech synthesis
+#
+# Usage (from the repository root):
+#   python -m benchmarks.tts_chunking --max-sentences 8 --char-latency 0.004
+#
+# The fake server's first-byte latency grows with the input length, as tts-1's does. The chunked
+# path is played through a real-time drain so underruns between chunks are counted.
+
+import argparse
+import os
+import tempfile
+import time
+import logging
+
+import numpy as np
+
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+from benchmarks.voice_roundtrip import BenchApp
+from utils.playback import decode_mp3
+from utils.tts_scheduler import SpeechScheduler, split_for_speech
+
+SENTENCES = [
+    "Alex, you just wrapped up four full sessions, which is more than most people manage before lunch.",
+    "Take a proper break of twenty minutes and step away from the screen.",
+    "A brisk walk gets blood moving to the parts of your brain that spreadsheets have been starving.",
+    "Your quarterly report will still be there when you get back, loyal as ever.",
+    "Research on attention restoration shows that even a short stretch outside sharpens focus afterwards.",
+    "Leave your phone on the desk; the notifications can learn some patience too.",
+    "When you return, start with the smallest open item to get the momentum going again.",
+    "Every cycle you finish is one more brick in the wall, so keep stacking them.",
+]
+
+
+def realtime_player(speed):
+    def play(source):
+        block = np.zeros((480, source.channels), dtype=np.float32)
+        while not source.done:
+            source.fill(block)
+            time.sleep(len(block) / source.output_rate / speed)
+        play.underruns = source.underruns
+        return False
+    play.underruns = 0
+    return play
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time to first audio vs paragraph length for chunked TTS.")
+    parser.add_argument("--max-sentences", type=int, default=len(SENTENCES))
+    parser.add_argument("--speech-latency", type=float, default=0.3, help="Fake server base first-byte latency")
+    parser.add_argument("--char-latency", type=float, default=0.004, help="Fake server extra latency per character")
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--playback-speed", type=float, default=4.0, help="Drain faster than real time to keep runs short")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = FakeOpenAIServer(FakeOpenAIConfig(speech_latency=args.speech_latency, speech_char_latency=args.char_latency)).start()
+    os.chdir(tempfile.mkdtemp(prefix="tts-bench-"))
+    from utils.voice_assistant import VoiceAssistant
+    app = BenchApp({"BARGE_IN": False}, server.base_url)
+    assistant = VoiceAssistant(app)
+    scheduler = SpeechScheduler(assistant, max_concurrency=args.concurrency)
+
+    print(f"{'sentences':>9}{'chars':>7}{'chunks':>8}{'one-shot TTFA s':>17}{'chunked TTFA s':>16}{'underruns':>11}")
+    try:
+        for count in range(1, min(args.max_sentences, len(SENTENCES)) + 1):
+            text = " ".join(SENTENCES[:count])
+
+            start = time.perf_counter()
+            decode_mp3(assistant.synthesize_speech(text, "alloy"))
+            one_shot = time.perf_counter() - start
+
+            first_audio = {}
+            player = realtime_player(args.playback_speed)
+            start = time.perf_counter()
+            scheduler.speak(text, "alloy", play=player, on_first_audio=lambda: first_audio.setdefault("t", time.perf_counter()))
+            chunked = first_audio["t"] - start
+
+            print(f"{count:>9}{len(text):>7}{len(split_for_speech(text)):>8}{one_shot:>17.2f}{chunked:>16.2f}{player.underruns:>11}")
+    finally:
+        assistant.db.close()
+        app.task_pool.shutdown()
+        app.ai_runtime.shutdown()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
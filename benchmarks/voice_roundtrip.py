@@ -0,0 +1,271 @@
+# voice_roundtrip.py drives VoiceAssistant.handle_voice_command end to end against local fakes
+#
+# Usage (from the repository root):
+#   python -m benchmarks.voice_roundtrip --wav speech.wav --turns 5 --users 4
+
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import logging
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+from utils.task_pool import TaskPool
+from utils.async_runtime import AsyncRuntime
+from utils.ai_provider import AIProvider
+
+logger = logging.getLogger(__name__)
+
+
+class _NullStream:
+    """Drains a playback callback as fast as it will go, like a sound card with no latency."""
+
+    def __init__(self, audio, callback, channels, blocksize=None, finished_callback=None, duplex=False, **kwargs):
+        self.audio = audio
+        self.callback = callback
+        self.blocksize = blocksize or 480
+        self.input_channels, self.output_channels = channels if isinstance(channels, tuple) else (0, channels)
+        self.finished_callback = finished_callback
+        self.duplex = duplex
+        self._aborted = False
+        self._thread = None
+
+    def _run(self):
+        indata = np.zeros((self.blocksize, max(1, self.input_channels)), dtype="float32")
+        outdata = np.zeros((self.blocksize, self.output_channels), dtype="float32")
+        try:
+            while not self._aborted:
+                if self.duplex:
+                    self.callback(indata, outdata, self.blocksize, None, None)
+                else:
+                    self.callback(outdata, self.blocksize, None, None)
+        except NullAudio.CallbackStop:
+            pass
+        finally:
+            if self.finished_callback is not None:
+                self.finished_callback()
+
+    def __enter__(self):
+        self.audio.record_play()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.abort()
+
+    def abort(self):
+        self._aborted = True
+
+
+class NullAudio:
+    """Stands in for the sounddevice module: the microphone replays a WAV file and playback is discarded."""
+
+    class CallbackStop(Exception):
+        pass
+
+    def __init__(self, wav_path):
+        self.recording, self.recording_rate = sf.read(wav_path, dtype="float32", always_2d=True)
+        self.default = type("Default", (), {"device": [None, None]})()
+        self.play_events = []  # (thread ident, perf_counter) for every playback start
+        self._lock = threading.Lock()
+
+    def rec(self, frames, samplerate=None, channels=1, device=None, **kwargs):
+        # Replay the fixture as if it had just been captured, padded or trimmed to the requested length
+        data = self.recording[:, :channels]
+        if samplerate and samplerate != self.recording_rate:
+            positions = np.linspace(0, len(data) - 1, int(len(data) * samplerate / self.recording_rate))
+            data = np.stack([np.interp(positions, np.arange(len(data)), data[:, c]) for c in range(channels)], axis=1)
+        out = np.zeros((frames, channels), dtype="float32")
+        out[:min(frames, len(data))] = data[:frames]
+        return out
+
+    def record_play(self):
+        with self._lock:
+            self.play_events.append((threading.get_ident(), time.perf_counter()))
+
+    def play(self, samples, samplerate=None, **kwargs):
+        self.record_play()
+
+    def check_output_settings(self, **kwargs):
+        pass  # Every rate is accepted
+
+    def OutputStream(self, **kwargs):
+        return _NullStream(self, **kwargs)
+
+    def Stream(self, **kwargs):
+        return _NullStream(self, duplex=True, **kwargs)
+
+    def wait(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def first_play_after(self, ident, t0):
+        with self._lock:
+            return next((t for i, t in self.play_events if i == ident and t >= t0), None)
+
+
+class _BenchMaster:
+    def after(self, ms, func=None, *args):
+        if func is not None:
+            func(*args)
+
+
+class _BenchSettings:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get_setting(self, key, default=None):
+        return self.settings.get(key, default)
+
+
+class _BenchVar:
+    def set(self, value):
+        pass
+
+
+class BenchApp:
+    """The slice of PomodoroApp that VoiceAssistant talks to, with a null UI."""
+
+    def __init__(self, settings, base_url, workers=2, api_key="bench"):
+        self.master = _BenchMaster()
+        self.task_pool = TaskPool(max_workers=workers)
+        self.ai_runtime = AsyncRuntime()
+        self.provider = AIProvider(api_key=api_key, base_url=base_url, max_retries=0)
+        self.mixer = None  # Speech plays on its own stream, as it does without an output device
+        self.settings_manager = _BenchSettings(settings)
+        self.user_feedback_var = _BenchVar()
+        self.done = threading.Event()
+        self.worker_ident = None
+
+    def update_user_feedback(self, message):
+        pass
+
+    def enable_talk_to_ai_button(self):
+        self.worker_ident = threading.get_ident()
+        self.done.set()
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_user(user_id, turns, audio, settings, results, workdir, workers, pool_metrics, base_url):
+    from utils.voice_assistant import VoiceAssistant
+
+    app = BenchApp(settings, base_url, workers)
+    assistant = VoiceAssistant(app)
+    assistant.input_device = None
+    # Give every simulated user its own debug directory, as separate installs would have
+    assistant.audiofiles_dir = os.path.join(workdir, f"user{user_id}")
+    os.makedirs(assistant.audiofiles_dir, exist_ok=True)
+
+    for turn in range(turns):
+        app.done.clear()
+        t0 = time.perf_counter()
+        assistant.handle_voice_command()
+        app.done.wait()
+        t_end = time.perf_counter()
+        first_audio = audio.first_play_after(app.worker_ident, t0)
+        results.append({
+            "user": user_id,
+            "turn": turn,
+            "time_to_first_audio": (first_audio - t0) if first_audio else None,
+            "turn_time": t_end - t0,
+        })
+    assistant.db.close()
+    pool_metrics.append(app.task_pool.metrics())
+    app.task_pool.shutdown()
+    app.ai_runtime.run(app.provider.close())
+    app.ai_runtime.shutdown()
+
+
+def summarize(label, values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return f"{label:<22}: n/a"
+    values.sort()
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return f"{label:<22}: mean {statistics.mean(values) * 1000:8.1f} ms  p50 {statistics.median(values) * 1000:8.1f} ms  p95 {p95 * 1000:8.1f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end voice round-trip benchmark with local fakes.")
+    parser.add_argument("--wav", required=True, help="WAV file that stands in for the microphone")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per simulated user")
+    parser.add_argument("--users", type=int, default=1, help="Concurrent simulated users")
+    parser.add_argument("--workers", type=int, default=2, help="Task pool workers per simulated user")
+    parser.add_argument("--transcription-latency", type=float, default=0.3)
+    parser.add_argument("--chat-latency", type=float, default=0.6)
+    parser.add_argument("--speech-latency", type=float, default=0.4)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--speech-chunk-delay", type=float, default=0.01)
+    parser.add_argument("--screen-vision", action="store_true", help="Include a screenshot in every turn")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    config = FakeOpenAIConfig(
+        transcription_latency=args.transcription_latency,
+        chat_latency=args.chat_latency,
+        speech_latency=args.speech_latency,
+        token_delay=args.token_delay,
+        speech_chunk_delay=args.speech_chunk_delay,
+    )
+    server = FakeOpenAIServer(config).start()
+    wav_path = os.path.abspath(args.wav)
+
+    workdir = tempfile.mkdtemp(prefix="pomodoro-bench-")
+    os.chdir(workdir)  # Keep the conversation database out of the repository
+
+    import utils.voice_assistant as voice_assistant_module
+    audio = NullAudio(wav_path)
+    voice_assistant_module.sd = audio
+    # The null sink replaces sd.play, so measure the half-duplex playback path
+    settings = {"AI_VOICE": "onyx", "AI_SCREEN_VISION": args.screen_vision, "BARGE_IN": False}
+
+    results = []
+    pool_metrics = []
+    cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+    users = [
+        threading.Thread(target=run_user, args=(i, args.turns, audio, settings, results, workdir, args.workers, pool_metrics, server.base_url))
+        for i in range(args.users)
+    ]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+    server.stop()
+
+    total_turns = len(results)
+    print(f"Users: {args.users}  Turns: {total_turns}  Wall: {wall:.2f} s  Threads alive at end: {threading.active_count()}")
+    print(summarize("Time to first audio", [r["time_to_first_audio"] for r in results]))
+    print(summarize("Total turn time", [r["turn_time"] for r in results]))
+    print(f"{'CPU per turn':<22}: {cpu / max(total_turns, 1) * 1000:8.1f} ms")
+    print(f"{'Peak RSS':<22}: {peak_rss_mb():8.1f} MB")
+    print(f"{'Throughput':<22}: {total_turns / wall:8.2f} turns/s")
+    print(f"{'Fake server requests':<22}: {server.request_counts}")
+    for key in ("submitted", "completed", "failed", "cancelled", "rejected"):
+        print(f"{'Pool ' + key:<22}: {sum(m[key] for m in pool_metrics)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# wake_word_idle.py measures the idle CPU and per-frame allocations of the wake word listener
+#
+# Usage (from the repository root):
+#   python -m benchmarks.wake_word_idle --seconds 30
+#
+# Frames are fed at real-time pace through the same path the audio callback uses, so the
+# result is the listener's own cost without depending on a microphone being present.
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from utils.wake_word import WakeWordListener, FRAME_LEN, FRAME_MS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Idle CPU benchmark for the wake word listener.")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Simulated listening time")
+    parser.add_argument("--noise", type=float, default=0.002, help="Room noise level (RMS, full scale = 1.0)")
+    parser.add_argument("--budget", type=float, default=2.0, help="Allowed idle CPU in percent of one core")
+    args = parser.parse_args(argv)
+
+    listener = WakeWordListener(on_wake=lambda: None, templates_dir=tempfile.mkdtemp(prefix="wake-bench-"))
+    n_frames = int(args.seconds * 1000 / FRAME_MS)
+    # Pre-generate the room noise so the benchmark doesn't measure its own allocations
+    rng = np.random.default_rng(0)
+    noise = (rng.normal(0, args.noise, (256, FRAME_LEN)) * 32767).astype(np.int16)
+
+    # Warm up, then count allocations over a burst of idle frames
+    for i in range(50):
+        listener.process_frame(noise[i % len(noise)])
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(1000):
+        listener.process_frame(noise[i % len(noise)])
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    leaked = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+
+    frame_period = FRAME_MS / 1000
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    next_frame = wall_start
+    busy = 0.0
+    for i in range(n_frames):
+        t0 = time.perf_counter()
+        listener.process_frame(noise[i % len(noise)])
+        busy += time.perf_counter() - t0
+        next_frame += frame_period
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    cpu_percent = cpu / wall * 100
+    print(f"Frames: {n_frames} ({FRAME_MS} ms)  Gate openings: {listener.gate_openings}")
+    print(f"Process CPU while idle : {cpu_percent:.2f}% of one core (budget {args.budget}%)")
+    print(f"Listener time per frame: {busy / n_frames * 1e6:.1f} us")
+    print(f"Net bytes retained over 1000 idle frames: {leaked}")
+    return 0 if cpu_percent <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
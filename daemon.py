@@ -0,0 +1,228 @@
+# daemon.py runs the timer, the voice assistant and the motivational quotes without a window,
+# controlled through a local HTTP/JSON API with a server-sent event stream
+#
+# Usage:
+#   python daemon.py [--host 127.0.0.1] [--port 8765]
+#   python pomodoroctl.py start
+
+import argparse
+import asyncio
+import queue
+import signal
+import logging
+from concurrent.futures import CancelledError
+
+import sounddevice as sd
+
+from utils.ai_provider import AIProvider
+from utils.ai_utils import AIUtils
+from utils.async_runtime import AsyncRuntime
+from utils.audio_utils import play_sound
+from utils.control_api import DEFAULT_HOST, DEFAULT_PORT, ControlServer, HTTPError
+from utils.mixer import AudioMixer
+from utils.quote_cache import QuoteCache
+from utils.session import PomodoroSession
+from utils.session_service import SessionService
+from utils.settings import APIKeyManager, SettingsManager
+from utils.task_pool import PRIORITY_QUOTE, TaskPool
+from utils.voice_assistant import VoiceAssistant
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class LoopMaster:
+    """Stands in for the Tk root: after() runs the callback on the daemon's event loop, from any thread."""
+
+    def __init__(self, loop):
+        self.loop = loop
+
+    def after(self, ms, func, *args):
+        self.loop.call_soon_threadsafe(self.loop.call_later, ms / 1000, func, *args)
+
+
+class FeedbackVar:
+    """Stands in for the Tk StringVar behind the Talk button; the value is published to event clients."""
+
+    def __init__(self, daemon):
+        self.daemon = daemon
+        self.value = "Press to Talk"
+
+    def set(self, value):
+        self.value = value
+        self.daemon.publish("feedback", {"message": value})
+
+    def get(self):
+        return self.value
+
+
+class PomodoroDaemon:
+    """The parts of PomodoroApp that matter without a screen, wired to a SessionService."""
+
+    def __init__(self, loop, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.loop = loop
+        self.master = LoopMaster(loop)
+        self.api_key_manager = APIKeyManager()
+        self.settings_manager = SettingsManager()
+        self.task_pool = TaskPool(max_workers=2, max_queue=8)
+        self.ai_runtime = AsyncRuntime()
+        self.quote_cache = QuoteCache()
+        self.provider = AIProvider.from_settings(self.settings_manager, self.api_key_manager.get_api_key())
+        if self.provider is not None:
+            self.ai_utils = AIUtils(
+                self.provider,
+                self.settings_manager.get_setting("USER_NAME", "Default User"),
+                self.settings_manager.get_setting("PROFESSION", "Default Profession"),
+                self.ai_runtime,
+                self.quote_cache
+            )
+        else:
+            self.ai_utils = None
+            logger.info("API Key is not set. Proceeding without AI functionalities.")
+        self.mixer = None
+        try:
+            self.mixer = AudioMixer(device=sd.default.device['output']).start()
+        except Exception as e:
+            logger.error(f"Could not open the audio output for the mixer: {e}")
+        self.talking = False
+        self.user_feedback_var = FeedbackVar(self)
+        self.voice_assistant = VoiceAssistant(self)
+
+        self.session = PomodoroSession(
+            focus_length=int(self.settings_manager.get_setting("FOCUS_TIME", 25)) * 60,
+            short_break=int(self.settings_manager.get_setting("BREAK_TIME", 5)) * 60,
+            long_break_length=int(self.settings_manager.get_setting("LONG_BREAK_TIME", 15)) * 60,
+            work_cycles_completed=int(self.settings_manager.get_setting("WORK_CYCLES_COMPLETED", 0))
+        )
+        self.service = SessionService(self.session, on_events=self.handle_events)
+        self.server = ControlServer(self.service.routes() + [("POST", "/talk", self.talk)], host, port)
+
+    def publish(self, event_type, data):
+        # Worker threads report through here; the hub itself belongs to the loop
+        self.loop.call_soon_threadsafe(self.service.hub.publish, event_type, data)
+
+    def handle_events(self, events):
+        for event in events:
+            if event["type"] == "started":
+                self.fetch_motivational_quote(for_break=self.session.phase != "focus", is_long_break=self.session.phase == "long_break")
+            elif event["type"] == "transition":
+                if not event.get("skipped"):
+                    play_sound(for_break=event["to"] != "focus", mixer=self.mixer)
+                if event["to"] == "long_break":
+                    self.settings_manager.update_setting("WORK_CYCLES_COMPLETED", self.session.work_cycles_completed)
+                    self.settings_manager.save_settings()
+                if not event.get("cycle_complete"):
+                    self.fetch_motivational_quote(for_break=event["to"] != "focus", is_long_break=event["to"] == "long_break")
+
+    def fetch_motivational_quote(self, for_break=False, is_long_break=False):
+        # A newer transition supersedes any quote that is still being fetched or spoken
+        self.task_pool.cancel_group("quote")
+        current_todo = self.session.current_todo()
+
+        def quote_task(cancel_token):
+            if self.ai_utils is None:
+                return
+            try:
+                message = self.ai_utils.fetch_motivational_quote(for_break, current_todo, is_long_break, cancel_token=cancel_token)
+                if cancel_token.cancelled:
+                    return
+                self.publish("quote", {"message": message, "for_break": for_break, "long_break": is_long_break})
+                self.voice_assistant.text_to_speech(message, cancel_token=cancel_token)
+            except CancelledError:
+                logger.info("Quote request was cancelled.")
+            except Exception as e:
+                logger.error(f"Error fetching motivational quote: {e}")
+
+        try:
+            self.task_pool.submit(quote_task, priority=PRIORITY_QUOTE, group="quote")
+        except queue.Full:
+            logger.warning("AI is busy. Quote skipped.")
+
+    async def talk(self, request):
+        if self.talking:
+            raise HTTPError(409, "Already listening")
+        self.handle_talk_to_ai()
+        return {"feedback": self.user_feedback_var.get()}
+
+    # VoiceAssistant calls these, as it does on PomodoroApp
+    def update_user_feedback(self, message):
+        self.master.after(0, self.user_feedback_var.set, message)
+
+    def handle_talk_to_ai(self):
+        self.talking = True
+        self.voice_assistant.handle_voice_command()
+
+    def enable_talk_to_ai_button(self):
+        self.master.after(0, setattr, self, "talking", False)
+
+    def apply_intent(self, name, argument=None):
+        """Runs a timer command recognized in speech through the service, so its events are published like the
+        HTTP commands'. Returns the key of its spoken reply."""
+        session = self.session
+        if name in ("start", "resume"):
+            if session.running:
+                return "already_running"
+            paused = session.remaining_time < session.length_of(session.phase)
+            if name == "resume" and not paused:
+                return "not_paused"
+            self.service.apply(session.start())
+            return "resumed" if paused else "started"
+        if name == "pause":
+            return "paused" if self.service.apply(session.pause())["events"] else "not_running"
+        if name == "skip_break":
+            return "break_skipped" if self.service.apply(session.skip())["events"] else "no_break"
+        if name == "reset":
+            self.service.apply(session.reset())
+            return "reset"
+        if name == "add_task":
+            self.service.apply(session.add_task(argument))
+            return "task_added"
+        raise ValueError(f"Unknown voice command: {name}")
+
+    async def run(self):
+        await self.server.start()
+        try:
+            await self.service.run()
+        finally:
+            await self.server.close()
+
+    def close(self):
+        logger.info(f"Quote cache: {self.quote_cache.stats()}")
+        if self.mixer is not None:
+            self.mixer.close()
+        self.task_pool.shutdown()
+        if self.provider is not None:
+            try:
+                self.ai_runtime.run(self.provider.close(), timeout=2)
+            except Exception as e:
+                logger.error(f"Error closing AI client: {e}")
+        self.ai_runtime.shutdown()
+        self.voice_assistant.db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Pomodoro timer and assistant without a window.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    daemon = PomodoroDaemon(loop, args.host, args.port)
+    task = loop.create_task(daemon.run())
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except NotImplementedError:
+            pass  # Windows; Ctrl+C still raises KeyboardInterrupt
+    try:
+        loop.run_until_complete(task)
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        pass
+    finally:
+        daemon.close()
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,11 @@ To view a copy of this license, visit http://creativecommons.org/licenses/by-nc/
 """
 
 import os
+import queue
 import threading
+import time
+from concurrent.futures import CancelledError
 import warnings
-from openai import OpenAI
 import sounddevice as sd
 import soundfile as sf
 import tkinter as tk
@@ -19,16 +21,51 @@ from utils.ui import UIConfig
 from utils.settings import SettingsManager, APIKeyManager, SettingsWindow
 from utils.window_utils import set_window_icon
 from utils.audio_utils import play_sound, toggle_mute
-from utils.ai_utils import AIUtils
+from utils.soundscapes import soundscape, SOUNDSCAPES
+from utils.mixer import AudioMixer
+from utils.playback import LoopSource, PCMQueueSource, pcm_view
+from utils.ai_utils import AIUtils, quote_mode
+from utils.ai_provider import AIProvider
+from utils.quote_cache import QuoteCache
+from utils.day_plan import DayPlanner
+from utils.voice_previews import VoicePreviews
+from utils.screen_index import ScreenTracker, SCREEN_INDEX_INTERVAL
+from utils.task_pool import TaskPool, PRIORITY_QUOTE
+from utils.async_runtime import AsyncRuntime
+from utils.checkpoint import SessionCheckpoint, CHECKPOINT_INTERVAL
+from utils.session import PomodoroSession
+from utils.wake_word import WakeWordListener
 import logging
 from utils.voice_assistant import VoiceAssistant
 from pydub import AudioSegment
-from pydub.playback import play
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+AMBIENT_FADE_SECONDS = 3.0  # Fade of the focus soundscape at focus/break transitions
+
+# Settings key -> the method that applies it after a save; keys not listed are read where they are used
+SETTINGS_APPLIERS = {
+    "USER_NAME": "update_profile_settings",
+    "PROFESSION": "update_profile_settings",
+    "AI_VOICE": "update_profile_settings",
+    "api_key": "update_profile_settings",
+    "AI_BASE_URL": "update_profile_settings",
+    "FOCUS_TIME": "update_timer_settings",
+    "BREAK_TIME": "update_timer_settings",
+    "STT_BACKEND": "update_stt_backend",
+    "LOCAL_STT_MODEL": "update_stt_backend",
+    "INPUT_DEVICE": "update_audio_devices",
+    "OUTPUT_DEVICE": "update_audio_devices",
+    "WAKE_WORD_ENABLED": "update_wake_word_listener",
+    "SCREEN_HISTORY": "update_screen_tracker",
+    "PLAN_THE_DAY": "update_day_plan",
+    "PLAN_CYCLES": "update_day_plan",
+    "AMBIENT_SOUND": "update_ambient_sound",
+    "AMBIENT_VOLUME": "update_ambient_sound",
+}
+
 # Ignore DeprecationWarning
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
@@ -48,22 +85,51 @@ class PomodoroApp:
         self.setup_window_layout()
         self.setup_sidebar()
         self.initialize_ui_elements()
-        self.voice_assistant = VoiceAssistant(self)
+        checkpoint = self.checkpoint.load()
+        self.voice_assistant = VoiceAssistant(self, history=checkpoint.get("conversation") if checkpoint else None)
         self.voice_assistant.set_volume(1.0)  # Set initial volume to maximum
+        self.day_planner = DayPlanner(self)
+        self.voice_previews = VoicePreviews(self)
+        self.voice_previews.warm(self.ai_voice)  # So the first quote doesn't pay for a cold TTS connection
+        self.voice_assistant.reply_audio.warm(self.ai_voice)  # Voice command replies then play without a request
         self.update_audio_devices()
+        self.wake_word_listener = None
+        self.update_wake_word_listener()
+        self.screen_tracker = None
+        self.update_screen_tracker()
+        self.bind_talk_hotkey()
         self.long_break_length = int(self.settings_manager.get_setting("LONG_BREAK_TIME", 15)) * 60  # 15 minutes default
 
 
         self.work_cycles_completed = int(self.settings_manager.get_setting("WORK_CYCLES_COMPLETED", 0))
 
-        if self.client is not None:
-            self.ai_utils = AIUtils(self.client, self.user_name, self.profession)
+        if self.provider is not None:
+            self.ai_utils = AIUtils(self.provider, self.user_name, self.profession, self.ai_runtime, self.quote_cache)
         else:
             self.ai_utils = None
 
+        if checkpoint:
+            self.restore_session(checkpoint)
+        self.master.after(CHECKPOINT_INTERVAL * 1000, self.periodic_checkpoint)
         master.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def on_closing(self):
+        self.save_checkpoint(fsync=True)
+        if self.wake_word_listener is not None:
+            self.wake_word_listener.close()
+        if self.screen_tracker is not None:
+            self.screen_tracker.close()
+        logger.info(f"Quote cache: {self.quote_cache.stats()}")
+        if self.mixer is not None:
+            self.mixer.close()
+        self.task_pool.shutdown()
+        if self.provider is not None:
+            try:
+                self.ai_runtime.run(self.provider.close(), timeout=2)
+            except Exception as e:
+                logger.error(f"Error closing AI client: {e}")
+        self.ai_runtime.shutdown()
+        self.voice_assistant.screen_capture.close()
         self.voice_assistant.db.close()
         self.master.destroy()
 
@@ -74,19 +140,113 @@ class PomodoroApp:
     def handle_talk_to_ai(self):
         # Disable the "Talk to AI" button to prevent multiple presses during operation
         self.talk_to_ai_button.config(state=tk.DISABLED)
+        # The assistant needs the mic to itself while it records and speaks
+        if self.wake_word_listener is not None:
+            self.wake_word_listener.pause()
         # Proceed with handling the voice command
         self.voice_assistant.handle_voice_command()
 
     def enable_talk_to_ai_button(self):
         # Re-enable the "Talk to AI" button
         self.talk_to_ai_button.config(state=tk.NORMAL)
+        if self.wake_word_listener is not None:
+            self.wake_word_listener.resume()
 
-    def load_user_settings(self):
-        # Load user profile settings
+    def trigger_talk_to_ai(self, event=None):
+        # Hands-free entry point for the hotkey and wake word; ignored while a command is already running
+        if str(self.talk_to_ai_button.cget("state")) != tk.DISABLED:
+            self.handle_talk_to_ai()
+
+    def bind_talk_hotkey(self):
+        hotkey = self.settings_manager.get_setting("TALK_HOTKEY", "<Control-space>")
+        try:
+            self.master.bind_all(hotkey, self.trigger_talk_to_ai)
+            logger.info(f"Push-to-talk hotkey bound to {hotkey}.")
+        except tk.TclError as e:
+            logger.error(f"Invalid push-to-talk hotkey '{hotkey}': {e}")
+
+    def update_wake_word_listener(self):
+        # Start or stop the always-on listener when the setting changes; a no-op otherwise
+        enabled = self.settings_manager.get_setting("WAKE_WORD_ENABLED", False)
+        if enabled and self.wake_word_listener is None:
+            templates_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wake_word_templates')
+            try:
+                self.wake_word_listener = WakeWordListener(
+                    on_wake=lambda: self.master.after(0, self.trigger_talk_to_ai),
+                    templates_dir=templates_dir,
+                    input_device=self.voice_assistant.input_device
+                )
+                if not self.wake_word_listener.matcher.templates:
+                    logger.warning("Wake word is enabled but no sample is recorded. Use 'Record Wake Word' in settings.")
+                self.wake_word_listener.start()
+            except Exception as e:
+                logger.error(f"Failed to start wake word listener: {e}")
+                self.wake_word_listener = None
+        elif not enabled and self.wake_word_listener is not None:
+            self.wake_word_listener.close()
+            self.wake_word_listener = None
+
+    def update_stt_backend(self):
+        # Rebuilding now rather than on the next command lets a newly selected local model warm up in the meantime
+        self.voice_assistant.ensure_stt_backend()
+
+    def update_screen_tracker(self):
+        # Start or stop local screen history when the setting changes; a no-op otherwise
+        enabled = self.settings_manager.get_setting("SCREEN_HISTORY", False)
+        if enabled and self.screen_tracker is None:
+            try:
+                interval = int(self.settings_manager.get_setting("SCREEN_HISTORY_INTERVAL", SCREEN_INDEX_INTERVAL))
+                self.screen_tracker = ScreenTracker(self, interval=max(5, interval))
+                self.screen_tracker.start()
+            except Exception as e:
+                logger.error(f"Failed to start screen history: {e}")
+                self.screen_tracker = None
+        elif not enabled and self.screen_tracker is not None:
+            self.screen_tracker.close()
+            self.screen_tracker = None
+
+    def record_wake_word(self):
+        """Records one sample of the wake phrase in the background and starts using it immediately."""
+        def record():
+            listener = self.wake_word_listener
+            if listener is None:
+                templates_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wake_word_templates')
+                listener = WakeWordListener(on_wake=None, templates_dir=templates_dir, input_device=self.voice_assistant.input_device)
+            listener.pause()
+            self.update_user_feedback("Say your wake word...")
+            try:
+                listener.enroll_from_microphone()
+                self.update_user_feedback("Wake word saved.")
+            except Exception as e:
+                logger.error(f"Failed to record wake word: {e}")
+                self.update_user_feedback("Error. Check log.")
+            finally:
+                listener.resume()
+                self.master.after(2000, lambda: self.user_feedback_var.set("Press to Talk"))
+
+        threading.Thread(target=record, daemon=True).start()
+
+    def load_profile_settings(self):
         self.user_name = self.settings_manager.get_setting("USER_NAME", "Default User")
         self.profession = self.settings_manager.get_setting("PROFESSION", "Default Profession")
         self.ai_voice = self.settings_manager.get_setting("AI_VOICE", "alloy")  # Correct setting for AI voice
 
+    def update_profile_settings(self):
+        previous_voice = self.ai_voice
+        previous_name = self.user_name
+        self.load_profile_settings()
+        if self.user_name != previous_name:
+            # Cached messages greet the user by name; the profession is already part of the cache key
+            self.quote_cache.clear()
+        self.reinitialize_ai_utils()  # AIUtils captures the name and profession; the provider is only rebuilt if its config changed
+        if self.ai_voice != previous_voice:
+            self.voice_previews.warm(self.ai_voice)
+            self.voice_assistant.reply_audio.warm(self.ai_voice)
+
+    def load_user_settings(self):
+        # Load user profile settings
+        self.load_profile_settings()
+
         # Load timer settings
         self.focus_length = int(self.settings_manager.get_setting("FOCUS_TIME", 25)) * 60  # Default is 25 minutes, converted to seconds
         self.short_break = int(self.settings_manager.get_setting("BREAK_TIME", 5)) * 60  # Default is 5 minutes, converted to seconds
@@ -97,27 +257,49 @@ class PomodoroApp:
     def initialize_managers(self):
         self.api_key_manager = APIKeyManager()
         self.settings_manager = SettingsManager(callback=self.reload_user_settings)
+        self.task_pool = TaskPool(max_workers=2, max_queue=8)
+        self.ai_runtime = AsyncRuntime()
+        self.provider = None
+        self.provider_config = None
+        self.quote_cache = QuoteCache()
+        self.checkpoint = SessionCheckpoint()
+        self.mixer = None
 
     def reload_user_settings(self):
         """Reloads user settings from the settings manager and updates AIUtils."""
         self.load_user_settings()
         self.initialize_timing()  # Reinitialize timing to update focus and break lengths
+        self.load_api_settings()  # Picks up a new API key, endpoint or model
         # Reinitialize AIUtils with the new settings
-        if self.client is not None:
-            self.ai_utils = AIUtils(self.client, self.user_name, self.profession)
+        if self.provider is not None:
+            self.ai_utils = AIUtils(self.provider, self.user_name, self.profession, self.ai_runtime, self.quote_cache)
         else:
             self.ai_utils = None
             logger.info("AI Utils cannot be initialized due to missing API key.")
         self.update_audio_devices()
+        self.update_wake_word_listener()
+        self.update_screen_tracker()
+        self.update_ambient_sound()
+
+    def apply_settings_changes(self, changed):
+        """Re-applies only the subsystems whose settings changed in the settings window."""
+        appliers = []
+        for key in changed:
+            applier = SETTINGS_APPLIERS.get(key) or ("update_profile_settings" if key.startswith("MODEL_") else None)
+            if applier and applier not in appliers:
+                appliers.append(applier)
+        for applier in appliers:
+            logger.info(f"Applying settings change: {applier}")
+            getattr(self, applier)()
 
     def handle_settings_change(self, key, value):
         if key == "API_KEY":
             self.load_api_settings()  # Reload API settings which will reinitialize the AIUtils with new API key
 
     def reinitialize_ai_utils(self):
-        self.load_api_settings()  # This will set self.client based on the new API key
-        if self.client is not None:
-            self.ai_utils = AIUtils(self.client, self.user_name, self.profession)
+        self.load_api_settings()  # This will set self.provider based on the new API key
+        if self.provider is not None:
+            self.ai_utils = AIUtils(self.provider, self.user_name, self.profession, self.ai_runtime, self.quote_cache)
         else:
             self.ai_utils = None
             logger.info("AI Utils cannot be initialized due to missing API key.")
@@ -140,11 +322,19 @@ class PomodoroApp:
 
     def load_api_settings(self):
         self.openai_api_key = self.api_key_manager.get_api_key()
-        if self.openai_api_key:
-            self.client = OpenAI(api_key=self.openai_api_key)
-            self.ai_utils = AIUtils(self.client, self.user_name, self.profession)
+        config = AIProvider.config_key(self.settings_manager, self.openai_api_key)
+        if config == self.provider_config:
+            return  # Nothing changed, so keep the existing client and its connection pool
+        old_provider = self.provider
+        # One async client, and so one connection pool, for every AI request in the app
+        self.provider = AIProvider.from_settings(self.settings_manager, self.openai_api_key)
+        self.provider_config = config
+        if old_provider is not None:
+            # A quote, plan or voice command may still be using the old client, so let those finish first
+            self.ai_runtime.submit(old_provider.close_when_idle())
+        if self.provider is not None:
+            self.ai_utils = AIUtils(self.provider, self.user_name, self.profession, self.ai_runtime, self.quote_cache)
         else:
-            self.client = None
             self.ai_utils = None
             logger.info("API Key is not set. Proceeding without AI functionalities.")
 
@@ -169,6 +359,11 @@ class PomodoroApp:
         self.is_resuming = False  
         self.work_sessions_completed = 0  
         self.break_sessions_completed = 0  
+        self.end_chime = None  # Mixer voice for the chime scheduled at the end of the current period
+        self.ambient_voice = None
+        self.ambient_kind = "off"
+        self.settings_window = None
+        self.checkpoint_pending = False
         self.current_cycle = 0  
         self.work_cycles_completed = int(self.settings_manager.get_setting("WORK_CYCLES_COMPLETED", 0))
 
@@ -323,45 +518,56 @@ class PomodoroApp:
     def add_task(self):
         task_text = self.task_input.get().strip()
         if task_text:
-            task_frame = tk.Frame(self.todo_frame, bg=self.ui.colors["background"], borderwidth=0, highlightthickness=0)
-            task_frame.pack(pady=2, padx=10, fill=tk.X)
+            self.add_task_row(task_text)
+            self.task_input.delete(0, tk.END)
+            self.request_checkpoint()
+        else:
+            messagebox.showerror("Error", "No task to add")
 
-            # Task label
-            task_label = tk.Label(task_frame, text=task_text, font=("Helvetica", 16), bg=self.ui.colors["background"], fg=self.ui.colors["text"])
-            task_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    def add_task_row(self, task_text):
+        task_frame = tk.Frame(self.todo_frame, bg=self.ui.colors["background"], borderwidth=0, highlightthickness=0)
+        task_frame.pack(pady=2, padx=10, fill=tk.X)
 
-            # Complete task button
-            complete_button = self.create_button(task_frame, "✔", lambda: self.complete_task(task_label, task_frame), "button")
-            complete_button.pack(side=tk.RIGHT, padx=(0, 5))
+        # Task label
+        task_label = tk.Label(task_frame, text=task_text, font=("Helvetica", 16), bg=self.ui.colors["background"], fg=self.ui.colors["text"])
+        task_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
-            # Delete task button
-            delete_button = self.create_button(task_frame, "✖", lambda: task_frame.destroy(), "button")
-            delete_button.pack(side=tk.RIGHT)
+        # Complete task button
+        complete_button = self.create_button(task_frame, "✔", lambda: self.complete_task(task_label, task_frame), "button")
+        complete_button.pack(side=tk.RIGHT, padx=(0, 5))
 
-            self.task_input.delete(0, tk.END)
-        else:
-            messagebox.showerror("Error", "No task to add")
+        # Delete task button
+        delete_button = self.create_button(task_frame, "✖", lambda: self.delete_task(task_frame), "button")
+        delete_button.pack(side=tk.RIGHT)
+
+    def delete_task(self, task_frame):
+        task_frame.destroy()
+        self.request_checkpoint()
 
     def complete_task(self, task_label, task_frame):
         # Disable the task label and change its color to indicate completion
         task_label.config(fg="gray")
+        self.add_completed_row(task_label.cget("text"))
+
+        # Destroy the old frame in the To Do section
+        task_frame.destroy()
+        self.request_checkpoint()
 
+    def add_completed_row(self, task_text):
         # Create a new frame in the completed tasks area with matching background color
         completed_task_frame = tk.Frame(self.completed_frame, bg=self.ui.colors["background"], borderwidth=0, highlightthickness=0)
         completed_task_frame.pack(pady=2, padx=10, fill=tk.X)
 
         # Recreate the label in the new frame with a suitable color to indicate completion
-        completed_task_label = tk.Label(completed_task_frame, text=task_label.cget("text"), font=("Helvetica", 16), fg="green", bg=self.ui.colors["background"])
+        completed_task_label = tk.Label(completed_task_frame, text=task_text, font=("Helvetica", 16), fg="green", bg=self.ui.colors["background"])
         completed_task_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-        # Destroy the old frame in the To Do section
-        task_frame.destroy()
     
     def clear_completed_tasks(self):
     # This method will destroy all child widgets in the completed_frame,
     # effectively clearing all completed tasks.
         for widget in self.completed_frame.winfo_children():
             widget.destroy()
+        self.request_checkpoint()
 
     def create_button(self, master, text, command, button_key, state=tk.NORMAL):
         # Retrieve button color configuration using button_key
@@ -400,7 +606,12 @@ class PomodoroApp:
         logger.info("API Key has been updated successfully.")
     
     def open_settings_window(self):
-        SettingsWindow(self.master, self)
+        # Reuse an open window instead of stacking a second one
+        if self.settings_window is not None and self.settings_window.window.winfo_exists():
+            self.settings_window.window.lift()
+            self.settings_window.window.focus_force()
+            return
+        self.settings_window = SettingsWindow(self.master, self)
 
     def update_break_length(self, *args):
         self.short_break = self.selected_break_length.get() * 60  # Convert minutes to seconds
@@ -421,8 +632,8 @@ class PomodoroApp:
 
     def skip_break(self):
         if not self.is_focus_time and self.running:
-            # Stop any ongoing audio playback
-            sd.stop()
+            # Cancel the break's in-flight quote and its speech
+            self.task_pool.cancel_group("quote")
 
             # Log skipping the break
             logger.info("Skipping break session.")
@@ -436,7 +647,8 @@ class PomodoroApp:
             self.update_state_indicator("focus")
             
             # Play sound indicating the start of focus time
-            play_sound(for_break=False)  # Ensure this function is defined to play a specific sound for focus time
+            self.cancel_end_chime()
+            play_sound(for_break=False, mixer=self.mixer)
             
             # Fetch and display a motivational quote for focus time
             current_tasks = self.collect_current_tasks()
@@ -466,6 +678,8 @@ class PomodoroApp:
         self.fetch_motivational_quote(for_break=True, current_todo=current_todo)  # Pass current_todo here
         self.progress["maximum"] = self.short_break
         self.progress["value"] = 0
+        self.schedule_end_chime()
+        self.update_ambient_sound()
         self.pomodoro_timer()
         
         # Update button states.
@@ -492,47 +706,125 @@ class PomodoroApp:
         
         # Update VoiceAssistant's audio devices
         self.voice_assistant.update_audio_devices(sd.default.device['input'], sd.default.device['output'])
+        self.update_mixer_device(sd.default.device['output'])
         
         logger.info(f"Audio devices updated. Input: {sd.default.device['input']}, Output: {sd.default.device['output']}")
 
+    def update_mixer_device(self, output_device):
+        try:
+            if self.mixer is None:
+                self.mixer = AudioMixer(device=output_device).start()
+                self.mixer.set_muted(self.is_muted)
+            else:
+                self.mixer.set_device(output_device)
+        except Exception as e:
+            logger.error(f"Could not open the audio output for the mixer: {e}")
+            self.mixer = None
+
     def play_audio(self, file_path):
-        if self.is_muted:
-            logger.info("Audio playback skipped due to mute state.")
+        if self.mixer is None:
+            logger.info("Audio playback skipped; no output device.")
             return
 
         try:
+            # Muted playback still runs, silently, so unmuting mid-clip brings it back
             audio = AudioSegment.from_file(file_path, format="mp3")
-            play(audio)
-            logger.info("Audio playback completed.")
+            source = PCMQueueSource(audio.channels, audio.frame_rate, output_rate=self.mixer.rate)
+            source.push(pcm_view(audio))
+            source.close()
+            self.mixer.play("speech", source)
         except Exception as e:
             logger.error(f"Error playing audio file: {e}")
 
-    def fetch_motivational_quote(self, for_break=False, current_todo="", is_long_break=False):
-        if hasattr(self, 'quote_thread') and self.quote_thread.is_alive():
-            logger.info("A quote is already being fetched. Skipping this request.")
+    def schedule_end_chime(self):
+        """Queues the chime for the end of the current period on the mixer's clock, so it sounds on time even if the Tk timer lags."""
+        self.cancel_end_chime()
+        self.end_chime = play_sound(for_break=self.is_focus_time, mixer=self.mixer, delay=self.remaining_time)
+
+    def cancel_end_chime(self):
+        if self.end_chime is not None and self.mixer is not None:
+            self.mixer.cancel(self.end_chime)
+        self.end_chime = None
+
+    def sound_transition(self, for_break):
+        # A period that ran to the end already has its chime playing; one cut short needs it now
+        if self.end_chime is None:
+            play_sound(for_break=for_break, mixer=self.mixer)
+        self.end_chime = None
+
+    def update_ambient_sound(self):
+        """Fades the focus soundscape in while a focus period runs and out otherwise."""
+        if self.mixer is None:
             return
+        kind = self.settings_manager.get_setting("AMBIENT_SOUND", "off")
+        try:
+            volume = int(self.settings_manager.get_setting("AMBIENT_VOLUME", 30)) / 100
+        except (TypeError, ValueError):
+            volume = 0.3
+        if kind != self.ambient_kind and self.ambient_voice is not None:
+            self.mixer.cancel(self.ambient_voice)
+            self.ambient_voice = None
+        self.ambient_kind = kind
+        wanted = kind in SOUNDSCAPES and kind != "off" and self.running and self.is_focus_time
+        if wanted and self.ambient_voice is None:
+            # Loops are synthesized once per sound and cached, so switching back is instant
+            self.ambient_voice = self.mixer.play("ambient", LoopSource(soundscape(kind, self.mixer.rate), self.mixer.rate))
+        self.mixer.set_channel_gain("ambient", volume if wanted else 0.0, fade=AMBIENT_FADE_SECONDS)
 
-        def thread_target():
-            if self.ai_utils is None:
-                self.master.after(0, lambda: self.quote_var.set("AI functionalities are not available without an API key."))
-                self.master.after(0, lambda: self.status_var.set("AI features disabled. Set an API key in settings to enable."))
-                logger.info("AI functionalities are not available without an API key.")
-                return
+    def fetch_motivational_quote(self, for_break=False, current_todo="", is_long_break=False):
+        # A newer transition supersedes any quote that is still being fetched or spoken
+        self.task_pool.cancel_group("quote")
 
+        def quote_task(cancel_token):
             try:
-                message = self.ai_utils.fetch_motivational_quote(for_break, current_todo, is_long_break)
+                planned = None
+                if self.settings_manager.get_setting("PLAN_THE_DAY", False):
+                    planned = self.day_planner.take(quote_mode(for_break, is_long_break), current_todo)
+                    self.day_planner.ensure_planned(current_todo, self.plan_cycles(), self.max_work_sessions)
+
+                if planned is not None:
+                    # Written and synthesized ahead of time, so this transition needs no network call
+                    message, audio_bytes = planned
+                elif self.ai_utils is None:
+                    self.master.after(0, lambda: self.quote_var.set("AI functionalities are not available without an API key."))
+                    self.master.after(0, lambda: self.status_var.set("AI features disabled. Set an API key in settings to enable."))
+                    logger.info("AI functionalities are not available without an API key.")
+                    return
+                else:
+                    audio_bytes = None
+                    message = self.ai_utils.fetch_motivational_quote(for_break, current_todo, is_long_break, cancel_token=cancel_token)
+                if cancel_token.cancelled:
+                    logger.info("Quote request was cancelled. Discarding the result.")
+                    return
                 break_type = "Long Break" if is_long_break else "Break"
                 self.master.after(0, lambda: self.quote_var.set(message if not for_break else f"{break_type} Time: {message}"))
                 self.master.after(0, lambda: self.status_var.set("Speaking..."))
-                self.voice_assistant.text_to_speech(message)
+                if audio_bytes:
+                    self.voice_assistant.play_audio_bytes(audio_bytes, cancel_token=cancel_token)
+                else:
+                    self.voice_assistant.text_to_speech(message, cancel_token=cancel_token)
+            except CancelledError:
+                logger.info("Quote request was cancelled.")
             except Exception as e:
                 self.master.after(0, lambda: self.quote_var.set("Error fetching quote. Please check your connection."))
                 logger.error(f"Error fetching motivational quote: {e}")
 
-        self.quote_thread = threading.Thread(target=thread_target)
-        self.quote_thread.daemon = True
-        self.quote_thread.start()
+        try:
+            self.task_pool.submit(quote_task, priority=PRIORITY_QUOTE, group="quote")
+        except queue.Full:
+            self.status_var.set("AI is busy. Quote skipped.")
+
+
+    def update_day_plan(self):
+        # Planning ahead of the first transition keeps even the first break off the network
+        if self.settings_manager.get_setting("PLAN_THE_DAY", False):
+            self.day_planner.ensure_planned(self.collect_current_tasks(), self.plan_cycles(), self.max_work_sessions)
 
+    def plan_cycles(self):
+        try:
+            return max(1, int(self.settings_manager.get_setting("PLAN_CYCLES", 1)))
+        except (TypeError, ValueError):
+            return 1
 
     def update_display(self, seconds):
         minutes = seconds // 60
@@ -552,7 +844,133 @@ class PomodoroApp:
 
     def collect_current_tasks(self):
         """Collects all tasks from the todo_frame and returns them as a single comma-separated string."""
-        return ', '.join(task_label.cget("text") for task_frame in self.todo_frame.winfo_children() for task_label in task_frame.winfo_children() if isinstance(task_label, tk.Label))
+        return ', '.join(self.task_texts(self.todo_frame))
+
+    def task_texts(self, frame):
+        return [task_label.cget("text") for task_frame in frame.winfo_children() for task_label in task_frame.winfo_children() if isinstance(task_label, tk.Label)]
+
+    def session_state(self):
+        """The timer in PomodoroSession.to_dict() form, plus the task lists and the recent conversation."""
+        if self.is_focus_time:
+            phase = "focus"
+        else:
+            phase = "long_break" if self.work_sessions_completed == 0 else "break"
+        remaining = self.remaining_time
+        return {
+            "focus_length": self.focus_length,
+            "short_break": self.short_break,
+            "long_break_length": self.long_break_length,
+            "max_work_sessions": self.max_work_sessions,
+            "max_break_sessions": self.max_break_sessions,
+            "work_cycles_completed": self.work_cycles_completed,
+            "work_sessions_completed": self.work_sessions_completed,
+            "break_sessions_completed": self.break_sessions_completed,
+            "phase": phase,
+            "running": self.running,
+            "remaining_time": remaining,
+            # The display counts whole seconds, so the deadline is stored to the second and an idle tick doesn't dirty it
+            "ends_at": round(time.time() + remaining) if self.running else None,
+            "tasks": self.task_texts(self.todo_frame),
+            "completed_tasks": self.task_texts(self.completed_frame),
+            "conversation": [[message["role"], message["content"]] for message in self.voice_assistant.conversation_history[1:]
+                             if isinstance(message["content"], str)],  # Screenshots are not worth persisting
+        }
+
+    def save_checkpoint(self, fsync=False):
+        self.checkpoint_pending = False
+        try:
+            self.checkpoint.save(self.session_state(), fsync=fsync)
+        except Exception as e:
+            logger.error(f"Failed to checkpoint the session: {e}")
+
+    def request_checkpoint(self):
+        # Deferred to idle so a transition is saved once, after all of its state has changed
+        if not self.checkpoint_pending:
+            self.checkpoint_pending = True
+            self.master.after_idle(self.save_checkpoint, True)
+
+    def periodic_checkpoint(self):
+        self.save_checkpoint()
+        self.master.after(CHECKPOINT_INTERVAL * 1000, self.periodic_checkpoint)
+
+    def restore_session(self, state):
+        """Puts the timer back where the checkpoint says it is now, applying any periods that ended in between."""
+        try:
+            session = PomodoroSession.from_dict(state)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Ignoring a malformed session checkpoint: {e}")
+            return
+        missed = session.advance()
+        for task_text in state.get("tasks", []):
+            self.add_task_row(task_text)
+        for task_text in state.get("completed_tasks", []):
+            self.add_completed_row(task_text)
+
+        self.work_sessions_completed = session.work_sessions_completed
+        self.break_sessions_completed = session.break_sessions_completed
+        if session.work_cycles_completed > self.work_cycles_completed:
+            self.work_cycles_completed = session.work_cycles_completed
+            self.settings_manager.update_setting("WORK_CYCLES_COMPLETED", self.work_cycles_completed)
+            self.settings_manager.save_settings()
+        self.update_work_cycles_display()
+        self.work_session_label.config(text=f"Work: {self.work_sessions_completed}/{self.max_work_sessions}")
+        self.break_session_label.config(text=f"Breaks: {self.break_sessions_completed}/{self.max_break_sessions}")
+
+        self.is_focus_time = session.phase == "focus"
+        self.remaining_time = int(round(session.remaining()))
+        length = session.length_of(session.phase)
+        self.progress["maximum"] = length
+        self.progress["value"] = length - self.remaining_time
+        self.update_display(self.remaining_time)
+        if session.running:
+            self.paused_time = self.remaining_time
+            self.resume_pomodoro()  # Carries on without a new quote or start chime
+            if not self.is_focus_time:
+                self.start_button.config(state=tk.DISABLED)
+                self.reset_button.config(state=tk.DISABLED)
+                self.skip_button.config(state=tk.NORMAL)
+                self.update_state_indicator("long_break" if session.phase == "long_break" else "break")
+        elif self.remaining_time < length:
+            self.paused_time = self.remaining_time
+            self.start_button.config(text="Resume", command=self.resume_pomodoro, state=tk.NORMAL)
+            self.reset_button.config(state=tk.NORMAL)
+            self.update_state_indicator("paused")
+        logger.info(f"Resumed the session from its checkpoint: {session.phase}, {self.remaining_time}s left, {len(missed)} periods ended while closed.")
+
+    def apply_intent(self, name, argument=None):
+        """Runs a timer command recognized in speech, on the Tk thread. Returns the key of its spoken reply."""
+        paused = not self.running and self.start_button.cget("text") == "Resume"
+        if name == "start":
+            if self.running:
+                return "already_running"
+            if paused:
+                self.resume_pomodoro()
+                return "resumed"
+            self.start_pomodoro()
+            return "started"
+        if name == "pause":
+            if not self.running:
+                return "not_running"
+            self.pause_pomodoro()
+            return "paused"
+        if name == "resume":
+            if not paused:
+                return "already_running" if self.running else "not_paused"
+            self.resume_pomodoro()
+            return "resumed"
+        if name == "skip_break":
+            if self.is_focus_time or not self.running:
+                return "no_break"
+            self.skip_break()
+            return "break_skipped"
+        if name == "reset":
+            self.reset_pomodoro()
+            return "reset"
+        if name == "add_task":
+            self.add_task_row(argument)
+            self.request_checkpoint()
+            return "task_added"
+        raise ValueError(f"Unknown voice command: {name}")
 
     def start_pomodoro(self):
         self.reload_user_settings()  # Ensure the latest settings are loaded
@@ -564,14 +982,17 @@ class PomodoroApp:
 
             current_todo = self.collect_current_tasks()  # Combine all tasks into a single string
             if not self.is_resuming:
-                threading.Thread(target=self.fetch_motivational_quote, args=(False, current_todo)).start()
+                self.fetch_motivational_quote(False, current_todo)
             else:
                 self.is_resuming = False
 
             self.progress["maximum"] = self.focus_length
             self.progress["value"] = 0
+            self.schedule_end_chime()
+            self.update_ambient_sound()
             self.pomodoro_timer()
             self.update_state_indicator("focus")
+            self.update_day_plan()
             logger.info("Timer started.")
 
     def pause_pomodoro(self):
@@ -579,6 +1000,8 @@ class PomodoroApp:
         self.paused_time = self.remaining_time  # Save the remaining time
         self.start_button.config(text="Resume", command=self.resume_pomodoro, state=tk.NORMAL)
         self.reset_button.config(state=tk.NORMAL)
+        self.cancel_end_chime()
+        self.update_ambient_sound()
         self.update_state_indicator("paused")
         logger.info("Timer paused.")
 
@@ -588,6 +1011,8 @@ class PomodoroApp:
         self.start_button.config(text="Pause", command=self.pause_pomodoro, state=tk.NORMAL)
         self.reset_button.config(state=tk.NORMAL)
         self.update_state_indicator("focus" if self.is_focus_time else "break")
+        self.schedule_end_chime()
+        self.update_ambient_sound()
         self.pomodoro_timer()  # Continue the timer
         logger.info("Timer resumed.")
 
@@ -606,6 +1031,8 @@ class PomodoroApp:
         self.work_sessions_completed = 0
         self.break_sessions_completed = 0
         self.update_work_cycles_display()
+        self.cancel_end_chime()
+        self.update_ambient_sound()
         logger.info("Timer reset.")
 
     def pomodoro_timer(self):
@@ -626,8 +1053,9 @@ class PomodoroApp:
     def switch_mode(self):
         self.reload_user_settings()
         self.running = False
+        self.update_ambient_sound()  # Starts the fade out; the next focus period fades it back in
         if self.is_focus_time:
-            play_sound(for_break=True)
+            self.sound_transition(for_break=True)
             self.work_sessions_completed += 1
             if self.work_sessions_completed >= self.max_work_sessions:
                 # Completed a full work cycle
@@ -644,7 +1072,7 @@ class PomodoroApp:
             self.work_session_label.config(text=f"Work: {self.work_sessions_completed}/{self.max_work_sessions}")
             self.start_break()
         else:
-            play_sound(for_break=False)
+            self.sound_transition(for_break=False)
             self.break_sessions_completed += 1
             if self.break_sessions_completed >= self.max_break_sessions:
                 self.reset_pomodoro()
@@ -671,10 +1099,14 @@ class PomodoroApp:
         self.skip_button.config(state=tk.NORMAL)
 
         self.running = True
+        self.schedule_end_chime()
+        self.update_ambient_sound()
         self.pomodoro_timer()
 
     def end_long_break(self):
         self.running = False
+        self.sound_transition(for_break=False)
+        self.update_ambient_sound()
         self.is_focus_time = True
         self.remaining_time = self.focus_length
         self.update_display(self.remaining_time)
@@ -702,11 +1134,15 @@ class PomodoroApp:
         color = self.ui.colors["state_indicator"].get(state, self.ui.colors["state_indicator"]["default"])
         self.state_indicator_canvas.itemconfig(self.state_indicator, fill=color)
         logger.info(f"State updated to {state}.")
+        self.request_checkpoint()  # Every start, pause, resume, reset and transition passes through here
 
     def handle_toggle_mute(self):
         self.is_muted = not self.is_muted
+        # Mute is a gain, so sounds already playing or scheduled carry on silently
+        if self.mixer is not None:
+            self.mixer.set_muted(self.is_muted)
+        self.voice_assistant.set_muted(self.is_muted)
         if self.is_muted:
-            self.stop_audio_playback()
             self.mute_button.config(text="Unmute")
         else:
             self.mute_button.config(text="Mute")
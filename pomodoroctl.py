@@ -0,0 +1,89 @@
+# pomodoroctl.py controls a running daemon.py from the command line
+#
+# Usage:
+#   python pomodoroctl.py start | pause | resume | skip | reset | state | talk
+#   python pomodoroctl.py add "Write the quarterly report"
+#   python pomodoroctl.py watch      # prints ticks and transitions as they happen
+
+import argparse
+import http.client
+import json
+import sys
+
+from utils.control_api import DEFAULT_HOST, DEFAULT_PORT
+
+COMMANDS = ["start", "pause", "resume", "skip", "reset", "talk"]
+
+
+def request(host, port, method, path, payload=None):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    body = json.dumps(payload) if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    data = json.loads(response.read() or b"{}")
+    connection.close()
+    if response.status != 200:
+        raise SystemExit(f"Error {response.status}: {data.get('error', '')}")
+    return data
+
+
+def format_state(state):
+    minutes, seconds = divmod(int(round(state["remaining"])), 60)
+    status = "running" if state["running"] else "stopped"
+    return (f"{state['phase']:<10} {minutes:02}:{seconds:02} {status:<8} "
+            f"work {state['work_sessions_completed']}/{state['max_work_sessions']}  cycles {state['work_cycles_completed']}")
+
+
+def watch(host, port):
+    connection = http.client.HTTPConnection(host, port)
+    connection.request("GET", "/events")
+    response = connection.getresponse()
+    event_type = None
+    for raw in response:
+        line = raw.decode().rstrip("\n")
+        if line.startswith("event: "):
+            event_type = line[7:]
+        elif line.startswith("data: "):
+            data = json.loads(line[6:])
+            if event_type == "tick":
+                minutes, seconds = divmod(data["remaining"], 60)
+                print(f"\r{data['phase']:<10} {minutes:02}:{seconds:02}", end="", flush=True)
+            elif event_type == "state":
+                print(format_state(data))
+            elif event_type == "quote":
+                print(f"\n{data['message']}")
+            elif event_type == "feedback":
+                print(f"\n[{data['message']}]")
+            else:
+                print(f"\n{event_type}: {format_state(data['state'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Control the headless Pomodoro daemon.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("command", choices=COMMANDS + ["state", "add", "watch"])
+    parser.add_argument("text", nargs="*", help="Task text for 'add'")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "watch":
+            watch(args.host, args.port)
+        elif args.command == "state":
+            print(format_state(request(args.host, args.port, "GET", "/state")))
+        elif args.command == "add":
+            result = request(args.host, args.port, "POST", "/tasks", {"text": " ".join(args.text)})
+            print("Tasks: " + ", ".join(result["state"]["tasks"]))
+        elif args.command == "talk":
+            print(request(args.host, args.port, "POST", "/talk")["feedback"])
+        else:
+            print(format_state(request(args.host, args.port, "POST", f"/{args.command}")["state"]))
+    except ConnectionRefusedError:
+        sys.exit(f"No daemon listening on {args.host}:{args.port}. Start it with: python daemon.py")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
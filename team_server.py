@@ -0,0 +1,59 @@
+# team_server.py hosts shared and independent Pomodoro timers for a team
+#
+# Usage:
+#   python team_server.py [--host 0.0.0.0] [--port 8766] [--state-file timers.json]
+#
+#   curl -X POST localhost:8766/timers -d '{"id": "design-team", "focus_length": 1500}'
+#   curl -X POST localhost:8766/timers/design-team/start
+#   curl -N localhost:8766/timers/design-team/events
+
+import argparse
+import asyncio
+import signal
+import logging
+
+from utils.control_api import DEFAULT_HOST, ControlServer, is_local_host
+from utils.timer_server import SAVE_INTERVAL, STATE_FILE, TimerServer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEAM_PORT = 8766
+
+
+async def serve(host, port, state_file, save_interval):
+    timers = TimerServer(state_file, save_interval)
+    # Bound beyond loopback, the server is meant to be reached from other machines under any name
+    server = await ControlServer(timers.routes(), host, port, local_only=is_local_host(host)).start()
+    try:
+        await timers.run()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve shared Pomodoro timers for a team.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Use 0.0.0.0 to accept connections from other machines")
+    parser.add_argument("--port", type=int, default=DEFAULT_TEAM_PORT)
+    parser.add_argument("--state-file", default=STATE_FILE)
+    parser.add_argument("--save-interval", type=float, default=SAVE_INTERVAL)
+    args = parser.parse_args(argv)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    task = loop.create_task(serve(args.host, args.port, args.state_file, args.save_interval))
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except NotImplementedError:
+            pass  # Windows; Ctrl+C still raises KeyboardInterrupt
+    try:
+        loop.run_until_complete(task)
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        pass
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# test_async_runtime.py checks AsyncRuntime's timeouts, cancellation and Tk hand-off against the fake OpenAI server
+#
+# Usage (from the repository root):
+#   python -m unittest tests.test_async_runtime
+
+import asyncio
+import queue
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError
+
+from benchmarks.fake_openai import FakeOpenAIConfig, FakeOpenAIServer
+from utils.ai_provider import AIProvider
+from utils.async_runtime import AsyncRuntime
+from utils.task_pool import CancellationToken
+
+MESSAGES = [{"role": "user", "content": "What should I work on next?"}]
+
+
+class FakeMaster:
+    """Stands in for the Tk root: after() only queues the callback, and pump() runs the queue on the calling thread."""
+
+    def __init__(self):
+        self.scheduled = queue.Queue()
+
+    def after(self, ms, func, *args):
+        self.scheduled.put((func, args))
+
+    def pump(self, timeout=5.0):
+        func, args = self.scheduled.get(timeout=timeout)
+        func(*args)
+
+
+class AsyncRuntimeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeOpenAIServer(FakeOpenAIConfig(chat_latency=0.05)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.config.chat_latency = 0.05
+        self.runtime = AsyncRuntime(name="test-loop")
+        # No retries, so a timeout or a cancellation is never masked by a second attempt
+        self.provider = AIProvider(base_url=self.server.base_url, max_retries=0)
+
+    def tearDown(self):
+        self.runtime.run(self.provider.close(), timeout=2)
+        self.runtime.shutdown()
+
+    def test_run_returns_the_reply(self):
+        reply = self.runtime.run(self.provider.complete("dialogue", MESSAGES), timeout=5)
+        self.assertEqual(reply, self.server.config.reply)
+
+    def test_timeout_raises_before_the_server_answers(self):
+        self.server.config.chat_latency = 2.0
+        start = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            self.runtime.run(self.provider.complete("dialogue", MESSAGES), timeout=0.2)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_cancel_token_cancels_a_request_in_flight(self):
+        self.server.config.chat_latency = 2.0
+        token = CancellationToken()
+        future = self.runtime.submit(self.provider.complete("dialogue", MESSAGES), cancel_token=token)
+        threading.Timer(0.1, token.cancel).start()
+        start = time.monotonic()
+        with self.assertRaises(CancelledError):
+            future.result(timeout=5)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_cancelled_token_cancels_at_submit(self):
+        token = CancellationToken()
+        token.cancel()
+        future = self.runtime.submit(self.provider.complete("dialogue", MESSAGES), cancel_token=token)
+        with self.assertRaises(CancelledError):
+            future.result(timeout=5)
+
+    def test_finished_request_unregisters_from_its_token(self):
+        token = CancellationToken()
+        self.runtime.run(self.provider.complete("dialogue", MESSAGES), timeout=5, cancel_token=token)
+        # The done callback runs just after the result is handed over
+        deadline = time.monotonic() + 1.0
+        while token._callbacks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(token._callbacks, [])
+
+    def test_post_to_tk_delivers_the_result_through_after(self):
+        master = FakeMaster()
+        results = []
+        future = self.runtime.post_to_tk(
+            master, self.provider.complete("dialogue", MESSAGES),
+            on_result=lambda result: results.append((result, threading.get_ident())),
+            on_error=lambda error: self.fail(f"on_error called with {error!r}")
+        )
+        future.result(timeout=5)
+        # Finished on the loop, but nothing runs until the Tk thread services after()
+        self.assertEqual(results, [])
+        master.pump()
+        self.assertEqual(results, [(self.server.config.reply, threading.get_ident())])
+
+    def test_post_to_tk_delivers_errors_through_after(self):
+        self.server.config.chat_latency = 2.0
+        master = FakeMaster()
+        errors = []
+        future = self.runtime.post_to_tk(
+            master, self.provider.complete("dialogue", MESSAGES),
+            on_result=lambda result: self.fail(f"on_result called with {result!r}"),
+            on_error=lambda error: errors.append((error, threading.get_ident())),
+            timeout=0.2
+        )
+        with self.assertRaises(asyncio.TimeoutError):
+            future.result(timeout=5)
+        self.assertEqual(errors, [])
+        master.pump()
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0][0], asyncio.TimeoutError)
+        self.assertEqual(errors[0][1], threading.get_ident())
+
+    def test_post_to_tk_skips_both_callbacks_when_cancelled(self):
+        self.server.config.chat_latency = 2.0
+        master = FakeMaster()
+        token = CancellationToken()
+        future = self.runtime.post_to_tk(
+            master, self.provider.complete("dialogue", MESSAGES),
+            on_result=lambda result: self.fail(f"on_result called with {result!r}"),
+            on_error=lambda error: self.fail(f"on_error called with {error!r}"),
+            cancel_token=token
+        )
+        token.cancel()
+        with self.assertRaises(CancelledError):
+            future.result(timeout=5)
+        with self.assertRaises(queue.Empty):
+            master.scheduled.get(timeout=0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# ai_provider.py is the one place that knows which endpoint and model serve each AI use case
+
+import asyncio
+import logging
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+CLOSE_GRACE = 120  # seconds; as long as the slowest request the app makes (a day plan)
+
+# Each use case maps to a MODEL_<USE_CASE> setting
+DEFAULT_MODELS = {
+    "quotes": "gpt-4-turbo",
+    "dialogue": "gpt-4o-mini",  # Replies are a single spoken sentence, so a small fast model is enough
+    "vision": "gpt-4o",
+    "transcription": "whisper-1",
+    "speech": "tts-1",
+}
+
+
+class AIProvider:
+    """Wraps one AsyncOpenAI client pointed at OpenAI or any OpenAI-compatible server."""
+
+    _closing = set()  # close_when_idle() tasks still waiting for their requests
+
+    def __init__(self, api_key=None, base_url=None, models=None, timeout=30.0, max_retries=1):
+        self.base_url = base_url or None
+        self.models = {**DEFAULT_MODELS, **(models or {})}
+        # Local servers usually ignore the key, but the client refuses to start without one
+        self.client = AsyncOpenAI(
+            api_key=api_key or "not-needed",
+            base_url=self.base_url,
+            timeout=timeout,
+            max_retries=max_retries
+        )
+
+    @classmethod
+    def from_settings(cls, settings_manager, api_key):
+        """Returns a provider, or None when there is neither an API key nor a custom endpoint."""
+        base_url = (settings_manager.get_setting("AI_BASE_URL", "") or "").strip()
+        if not api_key and not base_url:
+            return None
+        models = {
+            use_case: settings_manager.get_setting(f"MODEL_{use_case.upper()}", default) or default
+            for use_case, default in DEFAULT_MODELS.items()
+        }
+        return cls(api_key=api_key, base_url=base_url, models=models)
+
+    @staticmethod
+    def config_key(settings_manager, api_key):
+        # Settings that require a new client when they change
+        return (
+            api_key,
+            settings_manager.get_setting("AI_BASE_URL", ""),
+            tuple(settings_manager.get_setting(f"MODEL_{use_case.upper()}", default) for use_case, default in DEFAULT_MODELS.items()),
+        )
+
+    def model_for(self, use_case):
+        return self.models[use_case]
+
+    async def complete(self, use_case, messages, **kwargs):
+        response = await self.client.chat.completions.create(
+            model=self.model_for(use_case),
+            messages=messages,
+            **kwargs
+        )
+        return response.choices[0].message.content
+
+    async def complete_many(self, use_case, messages, n=1, **kwargs):
+        """Returns up to n alternative completions from one request; some local servers only ever return one."""
+        kwargs = {**kwargs, "n": n} if n > 1 else kwargs
+        response = await self.client.chat.completions.create(
+            model=self.model_for(use_case),
+            messages=messages,
+            **kwargs
+        )
+        return [choice.message.content for choice in response.choices if choice.message.content]
+
+    async def stream(self, use_case, messages, **kwargs):
+        """Yields the reply's text deltas as they arrive."""
+        stream = await self.client.chat.completions.create(
+            model=self.model_for(use_case),
+            messages=messages,
+            stream=True,
+            **kwargs
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def check(self):
+        """Lists the endpoint's models to confirm the key and URL work. Returns how many models it offers."""
+        models = await self.client.models.list()
+        return len(models.data)
+
+    async def close(self):
+        await self.client.close()
+
+    async def close_when_idle(self, grace=CLOSE_GRACE):
+        """Closes the client once the requests already running on this loop have finished.
+
+        Used when settings replace the provider: every request runs as a task on the app's one event
+        loop, so the tasks that exist now are the only ones that can still hold this client.
+        """
+        current = asyncio.current_task()
+        # Another provider being retired is not a request, and waiting on each other would only stall both
+        pending = [task for task in asyncio.all_tasks() if task is not current and task not in AIProvider._closing]
+        AIProvider._closing.add(current)
+        try:
+            if pending:
+                _, still_running = await asyncio.wait(pending, timeout=grace)
+                if still_running:
+                    logger.warning(f"Closing the previous AI client with {len(still_running)} request(s) still running.")
+            await self.close()
+        finally:
+            AIProvider._closing.discard(current)
@@ -1,14 +1,125 @@
 # ai_utils.py
 
+import asyncio
+import json
 import random
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUOTE_TIMEOUT = 30  # seconds
+QUOTE_VARIANTS = 3  # completions requested per generation when caching
+PLAN_TIMEOUT = 120  # seconds; a batch is one long completion
+
+
+def quote_mode(for_break, is_long_break):
+    if not for_break:
+        return "work"
+    return "long_break" if is_long_break else "break"
+
 
 class AIUtils:
-    def __init__(self, client, user_name, profession):
-        self.client = client
+    def __init__(self, provider, user_name, profession, runtime, quote_cache=None):
+        self.provider = provider  # AIProvider shared with the voice assistant
         self.user_name = user_name
         self.profession = profession
+        self.runtime = runtime
+        self.quote_cache = quote_cache  # Owned by the app so it survives settings reloads
+        self._refills = set()
+
+    def fetch_motivational_quote(self, for_break=False, current_todo="", is_long_break=False, cancel_token=None):
+        # Called from worker threads; the request itself runs on the shared event loop
+        return self.runtime.run(
+            self.fetch_motivational_quote_async(for_break, current_todo, is_long_break),
+            timeout=QUOTE_TIMEOUT,
+            cancel_token=cancel_token
+        )
+
+    async def fetch_motivational_quote_async(self, for_break=False, current_todo="", is_long_break=False):
+        mode = quote_mode(for_break, is_long_break)
+        if self.quote_cache is not None:
+            hit = self.quote_cache.take(mode, self.profession, current_todo)
+            if hit is not None:
+                quote, entry = hit
+                self._start_refill(entry, for_break, current_todo, is_long_break)
+                logger.info(f"Quote cache hit for {mode}: {self.quote_cache.stats()}")
+                return quote
+
+        quotes, topic, elapsed = await self.generate_quotes(for_break, current_todo, is_long_break)
+        if self.quote_cache is not None:
+            entry = self.quote_cache.store(mode, topic, self.profession, current_todo, quotes[1:], elapsed)
+            # Servers that ignore n return a single variant, which leaves nothing cached for the next cycle
+            self._start_refill(entry, for_break, current_todo, is_long_break)
+        return quotes[0]
+
+    def _start_refill(self, entry, for_break, current_todo, is_long_break):
+        if self.quote_cache.claim_refill(entry):
+            # Top the context up in the background so the next cycle is a hit as well
+            task = asyncio.get_running_loop().create_task(self._refill(entry, for_break, current_todo, is_long_break))
+            self._refills.add(task)
+            task.add_done_callback(self._refills.discard)
+
+    async def _refill(self, entry, for_break, current_todo, is_long_break):
+        try:
+            quotes, topic, elapsed = await self.generate_quotes(for_break, current_todo, is_long_break)
+            if entry.dropped:
+                return
+            self.quote_cache.store(quote_mode(for_break, is_long_break), topic, self.profession, current_todo, quotes, elapsed)
+        except Exception as e:
+            logger.error(f"Failed to refill quote cache: {e}")
+        finally:
+            self.quote_cache.release_refill(entry)
+
+    async def generate_quotes(self, for_break=False, current_todo="", is_long_break=False):
+        """Returns (variants, theme or activity, seconds taken); variants beyond the first feed the cache."""
+        topic, messages = self.build_quote_messages(for_break, current_todo, is_long_break)
+        start = time.perf_counter()
+        quotes = await self.provider.complete_many(
+            "quotes",
+            messages=messages,
+            n=QUOTE_VARIANTS if self.quote_cache is not None else 1,
+            temperature=0.8,
+            max_tokens=400
+        )
+        return [quote.strip() for quote in quotes], topic, time.perf_counter() - start
+
+    def fetch_day_plan(self, modes, current_todo="", cancel_token=None):
+        """Writes one message per mode ("work", "break" or "long_break") in a single request."""
+        return self.runtime.run(
+            self.fetch_day_plan_async(modes, current_todo),
+            timeout=PLAN_TIMEOUT,
+            cancel_token=cancel_token
+        )
 
-    def fetch_motivational_quote(self, for_break=False, current_todo="", is_long_break=False):
+    async def fetch_day_plan_async(self, modes, current_todo=""):
+        briefs = []
+        system = None
+        for i, mode in enumerate(modes, start=1):
+            _, messages = self.build_quote_messages(mode != "work", current_todo, mode == "long_break")
+            system = messages[0]
+            briefs.append(f"{i}. ({mode.replace('_', ' ')}) {messages[1]['content']}")
+        prompt = (
+            f"Write {len(modes)} separate messages, one for each numbered brief below. Each brief is the full set of instructions for its message; "
+            "follow it on its own and do not repeat yourself across messages.\n\n" + "\n\n".join(briefs) +
+            '\n\nRespond with a JSON object of the form {"messages": [{"id": 1, "text": "..."}]} with exactly one entry per brief.'
+        )
+        content = await self.provider.complete(
+            "quotes",
+            messages=[system, {"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=0.8,
+            max_tokens=min(4096, 300 * len(modes))
+        )
+        try:
+            items = json.loads(content).get("messages", [])
+        except (ValueError, AttributeError) as e:
+            logger.error(f"Day plan response was not valid JSON: {e}")
+            return [None] * len(modes)
+        texts = {item.get("id"): (item.get("text") or "").strip() for item in items if isinstance(item, dict)}
+        return [texts.get(i) or None for i in range(1, len(modes) + 1)]
+
+    def build_quote_messages(self, for_break=False, current_todo="", is_long_break=False):
         themes = [
             "perseverance", "efficiency", "leadership", "learning", "growth",
             "adaptability", "focus", "productivity", "balance", "well-being",
@@ -16,7 +127,8 @@ class AIUtils:
             "energy", "motivation", "happiness", "do what you love"
         ]
         theme = random.choice(themes)
-        
+        topic = theme
+
         if not for_break:
             prompt = (
                 f"Generate a short motivational quote related to {theme} from a successful individual in the {self.profession} industry. This quote should inspire {self.user_name}. "
@@ -32,6 +144,7 @@ class AIUtils:
                 "plan your next work cycle", "reflect on your progress"
             ]
             activity = random.choice(activities)
+            topic = activity
             prompt = (
                 f"Compose an enthusiastic message for {self.user_name}, a {self.profession} who has completed a full work cycle of four Pomodoro sessions! "
                 f"Acknowledge their effort and suggest they take a longer break of about 15-30 minutes to recharge. "
@@ -52,6 +165,7 @@ class AIUtils:
                 "performing a brief body scan meditation", "writing down three things you're grateful for"
             ]
             activity = random.choice(activities)
+            topic = activity
             prompt = (
                 f"Compose a concise, unique, and creative short message for {self.user_name}, a {self.profession} who has just completed a work session and is working on: '{current_todo}'. "
                 f"Acknowledge their effort so far and suggest a simple 5 or 10 minute break activity like {activity}. "
@@ -62,13 +176,7 @@ class AIUtils:
                 f"Conclude with an encouraging note about tackling their tasks after the break. Be very brief."
             )
 
-        chat_completion = self.client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": f"You are a motivational AI assistant to a {self.profession} named {self.user_name} who is working on these tasks during a Pomodoro work session: '{current_todo}'. Aim for uniqueness, creativity, humour, and scientific grounding in your messages. Your messages will be read out loud to the user so format them in a way that would be easy for an apple OS voice to say out loud. "},
-                {"role": "user", "content": prompt}
-            ],
-            model="gpt-4-turbo",
-            temperature=0.8,
-            max_tokens=400
-        )
-        return chat_completion.choices[0].message.content.strip()
\ No newline at end of file
+        return topic, [
+            {"role": "system", "content": f"You are a motivational AI assistant to a {self.profession} named {self.user_name} who is working on these tasks during a Pomodoro work session: '{current_todo}'. Aim for uniqueness, creativity, humour, and scientific grounding in your messages. Your messages will be read out loud to the user so format them in a way that would be easy for an apple OS voice to say out loud. "},
+            {"role": "user", "content": prompt}
+        ]
@@ -0,0 +1,74 @@
+# async_runtime.py runs an asyncio event loop on a dedicated thread for the app's network I/O
+
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """Owns one event loop so every AI request shares the async client's connection pool."""
+
+    def __init__(self, name="ai-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, timeout=None, cancel_token=None):
+        """Schedules coro on the loop and returns a concurrent.futures.Future.
+
+        Cancelling the token (or the returned future) cancels the coroutine on the loop.
+        """
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if cancel_token is not None:
+            cancel_token.add_callback(future.cancel)
+            future.add_done_callback(lambda _: cancel_token.remove_callback(future.cancel))
+        return future
+
+    def run(self, coro, timeout=None, cancel_token=None):
+        """Blocks the calling worker thread until coro finishes. Never call this from the loop thread."""
+        return self.submit(coro, timeout=timeout, cancel_token=cancel_token).result()
+
+    def post_to_tk(self, master, coro, on_result, on_error=None, timeout=None, cancel_token=None):
+        """Runs coro on the loop and hands its result to on_result on the Tk thread via master.after."""
+        future = self.submit(coro, timeout=timeout, cancel_token=cancel_token)
+
+        def done(f):
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is None:
+                result = f.result()
+                master.after(0, lambda: on_result(result))
+            elif on_error is not None:
+                master.after(0, lambda: on_error(error))
+            else:
+                logger.error(f"Background request failed: {error}")
+
+        future.add_done_callback(done)
+        return future
+
+    def shutdown(self, timeout=2.0):
+        if not self._thread.is_alive():
+            return
+
+        async def cancel_pending():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_pending(), self.loop).result(timeout)
+        except Exception as e:
+            logger.error(f"Error cancelling pending requests: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        logger.info("Async runtime stopped.")
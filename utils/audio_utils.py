@@ -1,15 +1,41 @@
 # audio_utils.py
-import os
-import platform
+import functools
 
-def play_sound(for_break=False):
-    """Indicates the end of a work or break period based on the OS."""
-    if platform.system() == "Windows":
-        # Removed beep sound for Windows
-        print("Break time." if for_break else "Focus time.")
-    else:  # macOS and Linux
-        # Removed voice commands for macOS and Linux
+import numpy as np
+
+from utils.playback import PCMQueueSource
+
+# Rising two-note chime for focus, falling for a break
+CHIME_NOTES = {False: (523.25, 783.99), True: (783.99, 523.25)}
+CHIME_NOTE_SECONDS = 0.35
+CHIME_LEVEL = 0.4
+
+
+@functools.lru_cache(maxsize=8)
+def chime(for_break, rate):
+    """Returns the transition chime as mono int16 samples shaped (frames, 1)."""
+    note_len = int(CHIME_NOTE_SECONDS * rate)
+    t = np.arange(note_len * 2, dtype=np.float32) / rate
+    samples = np.zeros(note_len * 2, dtype=np.float32)
+    for i, freq in enumerate(CHIME_NOTES[for_break]):
+        start = i * note_len // 2  # Notes overlap by half a note
+        local = t[:len(samples) - start]
+        envelope = np.exp(-local * 6.0) * np.minimum(1.0, local * rate / 64)  # Soft attack, bell-like decay
+        samples[start:] += envelope * (np.sin(2 * np.pi * freq * local) + 0.3 * np.sin(4 * np.pi * freq * local))
+    samples *= CHIME_LEVEL / np.max(np.abs(samples))
+    return (samples * 32767).astype(np.int16).reshape(-1, 1)
+
+
+def play_sound(for_break=False, mixer=None, delay=0.0):
+    """Plays the end-of-period chime, delay seconds from now on the mixer's clock. Returns the mixer voice."""
+    if mixer is None:
+        # No output device; fall back to the console
         print("Break time." if for_break else "Focus time.")
+        return None
+    source = PCMQueueSource(1, mixer.rate)
+    source.push(chime(for_break, mixer.rate))
+    source.close()
+    return mixer.play("chimes", source, delay=delay)
 
 def toggle_mute(is_muted, update_button_style, mute_button):
     is_muted = not is_muted
@@ -20,4 +46,3 @@ def toggle_mute(is_muted, update_button_style, mute_button):
         mute_button.config(text="Mute")
     print("Muted" if is_muted else "Unmuted")
     return is_muted  # Return the new state
-
@@ -0,0 +1,145 @@
+# barge_in.py detects the user talking over the assistant so playback can stop early
+
+import collections
+import threading
+
+import numpy as np
+import webrtcvad
+
+FRAME_MS = 20  # webrtcvad accepts 10, 20 or 30 ms frames
+VAD_RATES = (8000, 16000, 32000, 48000)
+REFERENCE_MS = 500  # Most output the echo reference holds for a microphone callback that is running late
+
+
+class BargeInDetector:
+    """Energy gate plus webrtcvad, with echo suppression against the signal being played.
+
+    The mic hears the assistant's own voice, so a frame only counts as the user when it is
+    louder than the echo expected from the recent output (a Geigel-style double-talk check).
+    The speaker-to-mic coupling is learned while the user is quiet.
+    """
+
+    def __init__(self, sample_rate, aggressiveness=2, min_speech_frames=3, echo_margin=2.0,
+                 noise_floor=0.01, echo_window_ms=200, preroll_ms=300):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * FRAME_MS // 1000
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.vad_rate = sample_rate if sample_rate in VAD_RATES else 16000
+        self.vad_frame_len = self.vad_rate * FRAME_MS // 1000
+        self.min_speech_frames = min_speech_frames
+        self.echo_margin = echo_margin
+        self.noise_floor = noise_floor
+        self.echo_gain = 1.0  # Start pessimistic and learn the real coupling downwards
+
+        # Frame assembly buffers, so callers can feed any block size
+        self._mic = np.zeros(self.frame_len, dtype=np.float32)
+        self._ref = np.zeros(self.frame_len, dtype=np.float32)
+        self._fill = 0
+
+        self._ref_levels = collections.deque(maxlen=max(1, echo_window_ms // FRAME_MS))
+        self._preroll = collections.deque(maxlen=max(1, preroll_ms // FRAME_MS))
+        self.speech_frames = 0
+        self.triggered = False
+        self.frames_processed = 0
+        self.triggered_at_frame = None
+
+    def process(self, mic, played):
+        """Feeds mono float32 mic input and the output played over the same interval.
+
+        Returns True once user speech has been detected.
+        """
+        offset = 0
+        while offset < len(mic) and not self.triggered:
+            take = min(self.frame_len - self._fill, len(mic) - offset)
+            self._mic[self._fill:self._fill + take] = mic[offset:offset + take]
+            self._ref[self._fill:self._fill + take] = played[offset:offset + take]
+            self._fill += take
+            offset += take
+            if self._fill == self.frame_len:
+                self._fill = 0
+                self._process_frame(self._mic, self._ref)
+        return self.triggered
+
+    def _process_frame(self, mic, ref):
+        self.frames_processed += 1
+        self._preroll.append(mic.copy())
+        mic_rms = float(np.sqrt(np.dot(mic, mic) / len(mic)))
+        ref_rms = float(np.sqrt(np.dot(ref, ref) / len(ref)))
+        self._ref_levels.append(ref_rms)
+
+        # The echo can lag the output by the device latency, so compare against the loudest recent frame
+        expected_echo = self.echo_gain * max(self._ref_levels)
+        gate_open = mic_rms > max(self.noise_floor, self.echo_margin * expected_echo)
+
+        if gate_open and self._is_speech(mic):
+            self.speech_frames += 1
+        else:
+            self.speech_frames = 0
+            if not gate_open and ref_rms > 1e-3:
+                # Only the assistant is audible: track how much of it leaks back into the mic
+                self.echo_gain = 0.95 * self.echo_gain + 0.05 * (mic_rms / max(self._ref_levels))
+
+        if self.speech_frames >= self.min_speech_frames:
+            self.triggered = True
+            self.triggered_at_frame = self.frames_processed
+
+    def _is_speech(self, frame):
+        if self.sample_rate != self.vad_rate:
+            positions = np.linspace(0, len(frame) - 1, self.vad_frame_len)
+            frame = np.interp(positions, np.arange(len(frame)), frame)
+        pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16)
+        return self.vad.is_speech(pcm.tobytes(), self.vad_rate)
+
+    def preroll(self):
+        """Returns the last few hundred ms of mic input so the start of the user's utterance isn't lost."""
+        if not self._preroll:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(list(self._preroll))
+
+
+class EchoReference:
+    """Hands the output the mixer played to the microphone callback, in order, as the detector's echo reference.
+
+    The mixer's callback writes each block the speech channel contributed and the input stream's
+    callback reads as many frames as it captured. Both streams run at the same rate, so the offset
+    between them stays at the difference in their latencies, which the detector's echo window covers.
+    """
+
+    def __init__(self, sample_rate, capacity_ms=REFERENCE_MS):
+        self._buffer = np.zeros(sample_rate * capacity_ms // 1000, dtype=np.float32)
+        self._out = np.zeros(len(self._buffer), dtype=np.float32)
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def write(self, samples):
+        capacity = len(self._buffer)
+        samples = samples[-capacity:]
+        with self._lock:
+            # When the reader falls behind, the oldest output is dropped
+            overflow = max(0, self._size + len(samples) - capacity)
+            self._start = (self._start + overflow) % capacity
+            self._size -= overflow
+            end = (self._start + self._size) % capacity
+            first = min(len(samples), capacity - end)
+            self._buffer[end:end + first] = samples[:first]
+            self._buffer[:len(samples) - first] = samples[first:]
+            self._size += len(samples)
+
+    def read(self, frames):
+        """Returns the next frames of played output, padded with silence if the mixer has not produced them yet.
+
+        The returned array is reused by the next call.
+        """
+        capacity = len(self._buffer)
+        frames = min(frames, capacity)
+        out = self._out[:frames]
+        with self._lock:
+            take = min(frames, self._size)
+            first = min(take, capacity - self._start)
+            out[:first] = self._buffer[self._start:self._start + first]
+            out[first:take] = self._buffer[:take - first]
+            self._start = (self._start + take) % capacity
+            self._size -= take
+        out[take:] = 0.0
+        return out
@@ -0,0 +1,79 @@
+# checkpoint.py saves the timer's position, tasks and recent conversation so a crash or reboot can resume mid-session
+
+import json
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "session_state.json"
+CHECKPOINT_INTERVAL = 15  # Seconds between periodic checkpoints
+MAX_CHECKPOINT_AGE = 12 * 60 * 60  # Older checkpoints describe a different working day and are ignored
+
+
+def write_atomic(path, data, fsync=False):
+    """Replaces path with data in one step, so a crash leaves either the old file or the new one.
+
+    Without fsync a power cut can lose the last few writes, but never leaves a torn file: the rename
+    only happens after the new contents are complete.
+    """
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "w") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp_file, path)
+
+
+class SessionCheckpoint:
+    """Writes the app's state to one small JSON file, skipping writes when nothing changed.
+
+    Periodic saves are not fsynced; the rare ones that follow a transition or a command are, so the
+    expensive flush happens a few times per period rather than on every tick. Running periods store
+    their wall-clock end, so the position can be recomputed after any amount of downtime.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE, max_age=MAX_CHECKPOINT_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._last = None
+        self.writes = 0
+
+    def save(self, state, fsync=False):
+        # The timestamp is left out of the comparison so an idle app doesn't rewrite the same state
+        data = json.dumps(state, separators=(',', ':'), sort_keys=True)
+        if data == self._last and not fsync:
+            return False
+        try:
+            write_atomic(self.path, json.dumps({"saved_at": time.time(), "state": state}, separators=(',', ':')), fsync=fsync)
+        except OSError as e:
+            logger.error(f"Could not write the session checkpoint: {e}")
+            return False
+        self._last = data
+        self.writes += 1
+        return True
+
+    def load(self):
+        """Returns the saved state, or None if there is none, it is unreadable, or it is too old."""
+        try:
+            with open(self.path, "r") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable session checkpoint: {e}")
+            return None
+        age = time.time() - checkpoint.get("saved_at", 0)
+        if age > self.max_age:
+            logger.info(f"Ignoring a session checkpoint from {age / 3600:.1f} hours ago.")
+            return None
+        return checkpoint.get("state")
+
+    def clear(self):
+        self._last = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
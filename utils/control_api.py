@@ -0,0 +1,289 @@
+# control_api.py is a small asyncio HTTP/JSON server with server-sent events for controlling the timer locally
+
+import asyncio
+import json
+import re
+import logging
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 64 * 1024
+SUBSCRIBER_BUFFER = 64 * 1024  # Unsent bytes per SSE client before it is considered stuck and dropped
+KEEPALIVE_SECONDS = 15  # Comment line sent to idle SSE clients so proxies and clients keep the stream open
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def host_name(value):
+    """The host part of a Host header or an Origin's netloc, lowercased and without port or IPv6 brackets."""
+    value = value.strip().lower()
+    if value.startswith("["):
+        return value[1:value.find("]")]
+    return value.rsplit(":", 1)[0] if value.count(":") == 1 else value
+
+
+def is_local_host(host):
+    return host_name(host) in LOCAL_HOSTS
+
+
+def encode_event(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method, target, headers, body):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+        self.params = {}
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON")
+
+
+class Subscription:
+    """One SSE client. Events are written straight into its socket buffer, without a task per client."""
+
+    def __init__(self, hub, max_buffer):
+        self.hub = hub
+        self.max_buffer = max_buffer
+        self.writer = None
+        self._pending = []  # Events sent before the stream is attached
+        self.done = asyncio.Event()
+
+    @property
+    def closed(self):
+        return self.done.is_set()
+
+    def attach(self, writer):
+        self.writer = writer
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        for payload in self._pending:
+            writer.write(payload)
+        self._pending = None
+
+    def write(self, payload):
+        """Returns False if the client has fallen more than max_buffer bytes behind."""
+        if self.writer is None:
+            self._pending.append(payload)
+            return True
+        if self.writer.transport.is_closing():
+            self.close()  # The client hung up
+            return True
+        if self.writer.transport.get_write_buffer_size() > self.max_buffer:
+            return False
+        self.writer.write(payload)
+        return True
+
+    def send(self, event_type, data):
+        """Sends an event to this client only, such as the current state when it connects."""
+        self.write(encode_event(event_type, data))
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """Fans events out to SSE subscribers.
+
+    Each event is serialized once, however many clients are listening, and written into every
+    client's socket buffer without waiting, so a publish costs one buffered write per client and
+    never a task switch. A client whose unsent backlog exceeds max_buffer bytes is disconnected
+    instead of letting its buffer grow. Must be used from the event loop's thread.
+    """
+
+    def __init__(self, max_buffer=SUBSCRIBER_BUFFER):
+        self.max_buffer = max_buffer
+        self._subscribers = set()
+        self.published = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.max_buffer)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscribers.discard(subscription)
+        subscription.done.set()
+
+    def close(self):
+        """Ends every subscriber's stream."""
+        for subscription in list(self._subscribers):
+            self.unsubscribe(subscription)
+
+    def publish(self, event_type, data):
+        self.published += 1
+        if not self._subscribers:
+            return
+        payload = encode_event(event_type, data)
+        for subscription in list(self._subscribers):
+            if not subscription.write(payload):
+                self.dropped += 1
+                logger.warning("Dropping an event stream client that stopped reading.")
+                self.unsubscribe(subscription)
+
+
+class ControlServer:
+    """Serves JSON routes and event streams over HTTP/1.1 with keep-alive.
+
+    routes is a list of (method, path pattern, handler). Patterns are regular expressions matched
+    against the whole path; named groups end up in request.params. A handler is a coroutine function
+    taking the Request and returning a JSON-serializable object, or a Subscription to stream.
+
+    A local_only server answers only requests addressed to localhost, and refuses any that a web page
+    on another origin sent. Binding to 127.0.0.1 alone does not stop a browser from reaching it, through
+    a cross-site form post or a DNS name rebound to the loopback address.
+    """
+
+    def __init__(self, routes, host=DEFAULT_HOST, port=DEFAULT_PORT, local_only=True):
+        self.routes = [(method, re.compile(pattern), handler) for method, pattern, handler in routes]
+        self.host = host
+        self.port = port
+        self.local_only = local_only
+        self._server = None
+        self._connections = {}  # writer -> Subscription if it is streaming events, else None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolves port 0 to the one actually bound
+        logger.info(f"Control API listening on http://{self.host}:{self.port}")
+        return self
+
+    async def close(self):
+        if self._server is None:
+            return
+        self._server.close()
+        # Ends open streams and idle keep-alive connections so their handlers return on their own
+        for writer, subscription in list(self._connections.items()):
+            if subscription is not None:
+                subscription.close()
+            else:
+                writer.close()
+        await self._server.wait_closed()
+
+    def _check_origin(self, request):
+        if not is_local_host(request.headers.get("host", "")):
+            raise HTTPError(403, "Only requests to localhost are accepted")
+        origin = request.headers.get("origin")
+        if origin is not None and not is_local_host(urlsplit(origin).netloc):
+            raise HTTPError(403, f"Requests from {origin} are not accepted")
+
+    def _route(self, request):
+        if self.local_only:
+            self._check_origin(request)
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = True
+                continue
+            request.params = match.groupdict()
+            return handler
+        raise HTTPError(405 if allowed else 404, f"No route for {request.method} {request.path}")
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise HTTPError(400, "Bad Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, "Body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target, headers, body)
+
+    async def _serve(self, reader, writer):
+        self._connections[writer] = None
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                try:
+                    result = await self._route(request)(request)
+                except HTTPError as e:
+                    self._respond(writer, e.status, {"error": str(e)}, keep_alive)
+                except Exception as e:
+                    logger.error(f"Control API error on {request.method} {request.path}: {e}")
+                    self._respond(writer, 500, {"error": "Internal error"}, keep_alive)
+                else:
+                    if isinstance(result, Subscription):
+                        self._connections[writer] = result
+                        await self._stream(writer, result)
+                        break
+                    self._respond(writer, 200, result, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, separators=(',', ':')).encode()
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+
+    async def _stream(self, writer, subscription):
+        subscription.attach(writer)
+        try:
+            while not subscription.closed:
+                try:
+                    await asyncio.wait_for(subscription.done.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Also how a client that hung up is noticed when no events are flowing
+                    if not subscription.write(b": keep-alive\n\n"):
+                        break
+                    await writer.drain()
+        finally:
+            subscription.close()
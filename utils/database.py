@@ -1,13 +1,44 @@
+import datetime
+import json
 import sqlite3
 import threading
+import time
 import os
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Retention of the live conversations table; older turns are archived, not lost
+RETENTION_DAYS = 30
+MAX_LIVE_MESSAGES = 5000
+MAX_LIVE_BYTES = 2 * 1024 * 1024  # Message text kept uncompressed
+COMPACT_BATCH = 500  # Messages per archive blob, and per transaction
+COMPACT_DELAY = 60  # Seconds after startup before the first pass
+COMPACT_INTERVAL = 60 * 60  # seconds
+VACUUM_PAGES = 256  # Free pages handed back to the file system after each batch
 
 class ConversationDatabase:
-    def __init__(self, db_file='conversation_history.db'):
+    """Every spoken turn, with the recent ones as plain rows and the rest in compressed archive blobs.
+
+    Compaction moves the oldest messages out of the live table once any retention limit is exceeded
+    (age, message count or text size), COMPACT_BATCH at a time into one zlib-compressed JSON blob in
+    conversation_archive, and frees the pages they used with an incremental vacuum. Each batch is its
+    own short transaction, so a pass running in the background never holds up add_message for long.
+    """
+
+    def __init__(self, db_file='conversation_history.db', max_age_days=RETENTION_DAYS,
+                 max_messages=MAX_LIVE_MESSAGES, max_bytes=MAX_LIVE_BYTES):
         self.db_file = os.path.abspath(db_file)
         print(f"Database file path: {self.db_file}")
+        self.max_age_days = max_age_days
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
         self.lock = threading.Lock()
         self.local = threading.local()
+        self._stop = threading.Event()
+        self._compactor = None
+        self.create_table()
 
     def get_connection(self):
         if not hasattr(self.local, 'conn'):
@@ -17,10 +48,16 @@ class ConversationDatabase:
     def create_table(self):
         with self.lock:
             conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
+            # Only takes effect on a new file; an existing one is converted by the first compaction pass
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.executescript('''
             CREATE TABLE IF NOT EXISTS conversations
-            (id INTEGER PRIMARY KEY, role TEXT, content TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)
+            (id INTEGER PRIMARY KEY, role TEXT, content TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP);
+            CREATE INDEX IF NOT EXISTS conversations_timestamp ON conversations (timestamp);
+            CREATE TABLE IF NOT EXISTS conversation_archive
+            (id INTEGER PRIMARY KEY, first_id INTEGER, last_id INTEGER, start_ts DATETIME, end_ts DATETIME,
+             messages INTEGER, raw_bytes INTEGER, data BLOB);
+            CREATE INDEX IF NOT EXISTS conversation_archive_end_ts ON conversation_archive (end_ts);
             ''')
             conn.commit()
 
@@ -35,17 +72,122 @@ class ConversationDatabase:
         with self.lock:
             conn = self.get_connection()
             cursor = conn.cursor()
-            cursor.execute('SELECT role, content FROM conversations ORDER BY timestamp DESC LIMIT ?', (limit,))
+            # Walks the timestamp index from the newest row; id breaks ties within the same second
+            cursor.execute('SELECT role, content FROM conversations ORDER BY timestamp DESC, id DESC LIMIT ?', (limit,))
             return cursor.fetchall()
 
+    def get_archived(self, since=None, until=None):
+        """Archived messages as (role, content, timestamp), oldest first, optionally within a timestamp range."""
+        query, params = 'SELECT data FROM conversation_archive WHERE 1', []
+        if since is not None:
+            query += ' AND end_ts >= ?'
+            params.append(since)
+        if until is not None:
+            query += ' AND start_ts <= ?'
+            params.append(until)
+        with self.lock:
+            blobs = self.get_connection().execute(query + ' ORDER BY first_id', params).fetchall()
+        messages = []
+        for (data,) in blobs:
+            for _, role, content, timestamp in json.loads(zlib.decompress(data)):
+                if (since is None or timestamp >= since) and (until is None or timestamp <= until):
+                    messages.append((role, content, timestamp))
+        return messages
+
     def clear_history(self):
         with self.lock:
             conn = self.get_connection()
             cursor = conn.cursor()
             cursor.execute('DELETE FROM conversations')
+            cursor.execute('DELETE FROM conversation_archive')
             conn.commit()
+            conn.executescript('PRAGMA incremental_vacuum;')  # Without a count it frees every page
+
+    def _cutoff_id(self, conn, now):
+        """The newest message id that falls outside a retention limit, or None if all are within them."""
+        cutoffs = []
+        oldest = datetime.datetime.fromtimestamp(now - self.max_age_days * 86400, datetime.timezone.utc)
+        row = conn.execute('SELECT MAX(id) FROM conversations WHERE timestamp < ?',
+                           (oldest.strftime('%Y-%m-%d %H:%M:%S'),)).fetchone()
+        cutoffs.append(row[0])
+        row = conn.execute('SELECT id FROM conversations ORDER BY id DESC LIMIT 1 OFFSET ?',
+                           (self.max_messages,)).fetchone()
+        cutoffs.append(row[0] if row else None)
+        row = conn.execute('''
+        SELECT id FROM (SELECT id, SUM(LENGTH(CAST(content AS BLOB))) OVER (ORDER BY id DESC) AS kept FROM conversations)
+        WHERE kept > ? LIMIT 1
+        ''', (self.max_bytes,)).fetchone()
+        cutoffs.append(row[0] if row else None)
+        cutoffs = [cutoff for cutoff in cutoffs if cutoff is not None]
+        return max(cutoffs) if cutoffs else None
+
+    def compact(self, now=None, batch=COMPACT_BATCH):
+        """Archives every message outside the retention limits, one batch per transaction. Returns the count."""
+        now = now if now is not None else time.time()
+        conn = self.get_connection()
+        with self.lock:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                # A file from before compaction existed: switching to incremental mode takes one full VACUUM
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+            cutoff = self._cutoff_id(conn, now)
+        archived = 0
+        while cutoff is not None:
+            with self.lock:
+                rows = conn.execute('SELECT id, role, content, timestamp FROM conversations WHERE id <= ? ORDER BY id LIMIT ?',
+                                    (cutoff, batch)).fetchall()
+                if not rows:
+                    break
+                data = json.dumps(rows, ensure_ascii=False).encode('utf-8')
+                timestamps = [row[3] for row in rows]
+                with conn:
+                    conn.execute('''
+                    INSERT INTO conversation_archive (first_id, last_id, start_ts, end_ts, messages, raw_bytes, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (rows[0][0], rows[-1][0], min(timestamps), max(timestamps), len(rows), len(data), zlib.compress(data, 9)))
+                    conn.execute('DELETE FROM conversations WHERE id BETWEEN ? AND ?', (rows[0][0], rows[-1][0]))
+                # execute() would step the pragma once and free a single page; executescript() runs it to the end
+                conn.executescript(f'PRAGMA incremental_vacuum({VACUUM_PAGES});')
+            archived += len(rows)
+        if archived:
+            logger.info(f"Archived {archived} conversation messages. {self.stats()}")
+        return archived
+
+    def stats(self):
+        with self.lock:
+            conn = self.get_connection()
+            live, live_bytes = conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM conversations').fetchone()
+            blobs, archived, raw, stored = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(messages), 0), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(LENGTH(data)), 0) FROM conversation_archive'
+            ).fetchone()
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return {
+            "live_messages": live,
+            "live_bytes": live_bytes,
+            "archive_blobs": blobs,
+            "archived_messages": archived,
+            "archive_ratio": round(raw / stored, 1) if stored else None,
+            "free_pages": free_pages,
+            "file_bytes": os.path.getsize(self.db_file),
+        }
+
+    def start_compaction(self, delay=COMPACT_DELAY, interval=COMPACT_INTERVAL):
+        """Runs compact() on a background thread shortly after startup and then every interval seconds."""
+        def run():
+            wait = delay
+            while not self._stop.wait(wait):
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Conversation history compaction failed: {e}")
+                wait = interval
+            self.close()  # This thread's own connection
+
+        self._compactor = threading.Thread(target=run, name="history-compaction", daemon=True)
+        self._compactor.start()
 
     def close(self):
+        self._stop.set()
         if hasattr(self.local, 'conn'):
             self.local.conn.close()
             del self.local.conn
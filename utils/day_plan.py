@@ -0,0 +1,207 @@
+# day_plan.py pre-generates the day's focus and break messages in one request and keeps their audio on disk
+
+import asyncio
+import datetime
+import json
+import os
+import threading
+import uuid
+import logging
+
+from utils.quote_cache import jaccard, normalize_tasks, shingles
+from utils.task_pool import PRIORITY_QUOTE
+
+logger = logging.getLogger(__name__)
+
+PLAN_DIR = "day_plan"
+PLAN_BATCH_SIZE = 8  # Briefs per chat request; one cycle of four sessions fits in a single request
+SYNTH_CONCURRENCY = 4  # Parallel TTS downloads
+SYNTH_TIMEOUT = 120  # seconds for the whole batch
+
+
+def day_schedule(cycles, max_work_sessions):
+    """Transition kinds in the order the timer reaches them."""
+    slots = []
+    for _ in range(cycles):
+        for session in range(1, max_work_sessions + 1):
+            slots.append("work")
+            slots.append("long_break" if session == max_work_sessions else "break")
+    return slots
+
+
+class DayPlanner:
+    """Serves planned messages at each transition so the timer makes no network calls while the plan lasts.
+
+    Slots remember the task list they were written for. When the tasks change enough that the shingle
+    similarity drops below the threshold, only the affected unplayed slots are rewritten; a voice change
+    only re-synthesizes their audio.
+    """
+
+    def __init__(self, app, plan_dir=PLAN_DIR, similarity_threshold=0.7):
+        self.app = app
+        self.plan_dir = plan_dir
+        self.plan_file = os.path.join(plan_dir, "plan.json")
+        self.similarity_threshold = similarity_threshold
+        self.slots = []
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.load()  # The directory is only created on the first write, so the app leaves none behind with planning off
+
+    def load(self):
+        try:
+            with open(self.plan_file, "r") as f:
+                plan = json.load(f)
+        except (OSError, ValueError):
+            return
+        if plan.get("date") != datetime.date.today().isoformat():
+            self.clear()  # Yesterday's plan no longer matches the day
+            return
+        self.slots = plan.get("slots", [])
+
+    def save(self):
+        with self._lock:
+            plan = {"date": datetime.date.today().isoformat(), "slots": list(self.slots)}
+        os.makedirs(self.plan_dir, exist_ok=True)
+        with open(self.plan_file, "w") as f:
+            json.dump(plan, f)
+
+    def clear(self):
+        with self._lock:
+            self.slots = []
+        for name in os.listdir(self.plan_dir) if os.path.isdir(self.plan_dir) else []:
+            if name.endswith(".mp3"):
+                os.remove(os.path.join(self.plan_dir, name))
+        self.save()
+
+    def _voice(self):
+        return self.app.settings_manager.get_setting("AI_VOICE", "onyx")
+
+    def invalidate(self, current_todo):
+        """Clears the text of unplayed slots written for a different task list. Returns how many were cleared."""
+        task_shingles = shingles(normalize_tasks(current_todo))
+        stale = 0
+        with self._lock:
+            for slot in self.slots:
+                if slot["text"] is not None and jaccard(shingles(slot["tasks"]), task_shingles) < self.similarity_threshold:
+                    self._drop_audio(slot)
+                    slot["text"] = None
+                    stale += 1
+        if stale:
+            logger.info(f"Task list changed; {stale} planned messages will be rewritten.")
+        return stale
+
+    def take(self, mode, current_todo):
+        """Returns (text, mp3 bytes or None) for the next planned message of this kind, or None if there is none."""
+        self.invalidate(current_todo)
+        voice = self._voice()
+        with self._lock:
+            slot = next((s for s in self.slots if s["mode"] == mode and s["text"] is not None), None)
+            if slot is None:
+                return None
+            self.slots.remove(slot)
+        audio = None
+        if slot["audio"] and slot["voice"] == voice:
+            try:
+                with open(os.path.join(self.plan_dir, slot["audio"]), "rb") as f:
+                    audio = f.read()
+            except OSError as e:
+                logger.error(f"Planned audio is missing: {e}")
+        self._drop_audio(slot)
+        self.save()
+        return slot["text"], audio
+
+    def ensure_planned(self, current_todo, cycles, max_work_sessions):
+        """Queues a background refresh if the plan has run out, has stale slots, or lacks audio."""
+        self.invalidate(current_todo)
+        voice = self._voice()
+        with self._lock:
+            if self._refreshing:
+                return
+            if not self.slots:
+                self.slots = [
+                    {"mode": mode, "text": None, "tasks": "", "voice": None, "audio": None}
+                    for mode in day_schedule(cycles, max_work_sessions)
+                ]
+            elif all(s["text"] is not None and s["audio"] and s["voice"] == voice for s in self.slots):
+                return
+            self._refreshing = True
+        try:
+            self.app.task_pool.submit(self.refresh, current_todo, priority=PRIORITY_QUOTE, group="plan")
+        except Exception as e:
+            with self._lock:
+                self._refreshing = False
+            logger.error(f"Could not queue day plan refresh: {e}")
+
+    def refresh(self, current_todo, cancel_token=None):
+        try:
+            self._write_missing(current_todo, cancel_token)
+            self._synthesize_missing(cancel_token)
+        except Exception as e:
+            logger.error(f"Failed to refresh the day plan: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+            self.save()
+
+    def _write_missing(self, current_todo, cancel_token):
+        ai_utils = self.app.ai_utils
+        if ai_utils is None:
+            return
+        with self._lock:
+            missing = [s for s in self.slots if s["text"] is None]
+        tasks = normalize_tasks(current_todo)
+        for start in range(0, len(missing), PLAN_BATCH_SIZE):
+            batch = missing[start:start + PLAN_BATCH_SIZE]
+            texts = ai_utils.fetch_day_plan([s["mode"] for s in batch], current_todo, cancel_token=cancel_token)
+            with self._lock:
+                for slot, text in zip(batch, texts):
+                    if text:
+                        slot["text"] = text
+                        slot["tasks"] = tasks
+            logger.info(f"Planned {sum(1 for t in texts if t)} of {len(batch)} messages in one request.")
+
+    def _synthesize_missing(self, cancel_token):
+        if self.app.provider is None:
+            return
+        voice = self._voice()
+        with self._lock:
+            pending = [s for s in self.slots if s["text"] is not None and (not s["audio"] or s["voice"] != voice)]
+            texts = [s["text"] for s in pending]
+        if not pending:
+            return
+        os.makedirs(self.plan_dir, exist_ok=True)
+        results = self.app.ai_runtime.run(
+            self._synthesize_all(texts, voice),
+            timeout=SYNTH_TIMEOUT,
+            cancel_token=cancel_token
+        )
+        with self._lock:
+            for slot, text, audio_bytes in zip(pending, texts, results):
+                # A slot invalidated (and maybe rewritten) during synthesis must not get the old message's audio
+                if isinstance(audio_bytes, Exception) or slot not in self.slots or slot["text"] != text:
+                    continue
+                self._drop_audio(slot)
+                name = f"{uuid.uuid4().hex}.mp3"
+                with open(os.path.join(self.plan_dir, name), "wb") as f:
+                    f.write(audio_bytes)
+                slot["audio"] = name
+                slot["voice"] = voice
+        logger.info(f"Synthesized audio for {len(pending)} planned messages.")
+
+    async def _synthesize_all(self, texts, voice):
+        semaphore = asyncio.Semaphore(SYNTH_CONCURRENCY)
+        assistant = self.app.voice_assistant
+
+        async def synthesize(text):
+            async with semaphore:
+                return await assistant.synthesize_speech_async(text, voice)
+
+        return await asyncio.gather(*(synthesize(text) for text in texts), return_exceptions=True)
+
+    def _drop_audio(self, slot):
+        if slot["audio"]:
+            try:
+                os.remove(os.path.join(self.plan_dir, slot["audio"]))
+            except OSError:
+                pass
+            slot["audio"] = None
@@ -0,0 +1,163 @@
+# intents.py recognizes timer commands in a transcript and answers them with cached speech, without the dialogue model
+
+import difflib
+import re
+import logging
+
+from utils.playback import PCMQueueSource
+
+logger = logging.getLogger(__name__)
+
+MATCH_THRESHOLD = 0.82  # SequenceMatcher ratio a transcript needs against a command phrase
+MAX_COMMAND_WORDS = 6  # Longer utterances are requests, not commands
+
+# Phrases are written the way normalize_command() leaves a transcript: lowercase, no punctuation or filler words
+COMMANDS = {
+    "start": [
+        "start", "start timer", "start focus session", "start focus", "start focusing", "start working",
+        "start work session", "start session", "start pomodoro", "begin", "begin focus session", "lets focus",
+        "lets get started", "lets start", "time to focus",
+    ],
+    "pause": [
+        "pause", "pause timer", "pause session", "stop timer", "hold on", "take pause", "freeze timer",
+    ],
+    "resume": [
+        "resume", "resume timer", "resume session", "continue", "continue timer", "keep going", "unpause",
+        "carry on",
+    ],
+    "skip_break": [
+        "skip break", "skip", "end break", "stop break", "back to work", "skip rest", "im ready to work",
+        "no break",
+    ],
+    "reset": [
+        "reset", "reset timer", "restart timer", "start over", "reset pomodoro", "reset session",
+    ],
+}
+
+FILLER = {"please", "hey", "ok", "okay", "now", "just", "the", "a", "an", "my", "can", "could", "would", "will", "you", "for", "me"}
+QUESTION_WORDS = {"how", "what", "why", "when", "where", "who", "which", "should", "is", "are", "do", "does", "did", "was", "tell"}
+
+ADD_VERBS = ["add", "create", "new", "put"]
+TASK_NOUNS = ["task", "todo"]
+# "add a new task called write report" / "new todo: call mom"
+_ADD_TASK = re.compile(
+    r"^(?P<verb>[\w-]+)\s+(?:an?\s+|the\s+)?(?:new\s+)?(?P<noun>to[\s-]?do|[\w-]+)(?:\s+item)?(?:\s+(?:called|named|to|for))?[\s:,-]+(?P<task>.+)$",
+    re.I
+)
+# "add write report to my task list"
+_ADD_TO_LIST = re.compile(r"^(?:add|put)\s+(?P<task>.+?)\s+(?:to|on)\s+(?:my|the)\s+(?:tasks?|to-?dos?)(?:\s+list)?$", re.I)
+_POLITE_PREFIX = re.compile(r"^(?:(?:hey|ok|okay|please)[\s,]+)*(?:(?:can|could|would|will)\s+you\s+)?(?:please\s+)?", re.I)
+
+# Every reply is fixed text, so its audio is synthesized once per voice and replayed from then on
+REPLIES = {
+    "started": "Focus session started.",
+    "already_running": "The timer is already running.",
+    "paused": "Timer paused.",
+    "not_running": "The timer isn't running.",
+    "resumed": "Timer resumed.",
+    "not_paused": "The timer isn't paused.",
+    "break_skipped": "Break skipped. Back to work.",
+    "no_break": "You're not on a break right now.",
+    "reset": "Timer reset.",
+    "task_added": "Task added.",
+}
+
+
+def normalize_command(text):
+    words = re.findall(r"[a-z0-9]+", text.lower().replace("'", ""))
+    return " ".join(word for word in words if word not in FILLER)
+
+
+class IntentRecognizer:
+    """Maps a transcript to (intent, argument) with a small grammar and fuzzy matching, or returns None.
+
+    Fixed commands match exactly after normalization, or fuzzily against every phrase above
+    threshold, which absorbs small transcription slips ("paws the timer"). Adding a task is a
+    pattern whose verb and noun are matched fuzzily and whose remainder is the task text. Questions
+    and long utterances never match, so anything open-ended still goes to the dialogue model.
+    """
+
+    def __init__(self, commands=COMMANDS, threshold=MATCH_THRESHOLD):
+        self.threshold = threshold
+        self._phrases = {phrase: intent for intent, phrases in commands.items() for phrase in phrases}
+
+    def match(self, text):
+        text = text.strip()
+        polite = _POLITE_PREFIX.match(text).group()
+        # "Can you pause the timer?" is a request; any other question is for the dialogue model
+        question = text.endswith("?") and "you" not in polite.lower()
+        text = text[len(polite):].strip(" .!?,")
+        if not text:
+            return None
+        task = self._match_add_task(text)
+        if task:
+            return "add_task", task
+        normalized = normalize_command(text)
+        words = normalized.split()
+        if not words or words[0] in QUESTION_WORDS or len(words) > MAX_COMMAND_WORDS or question:
+            return None
+        intent = self._phrases.get(normalized)
+        if intent is not None:
+            return intent, None
+        best, best_ratio = None, self.threshold
+        matcher = difflib.SequenceMatcher(b=normalized, autojunk=False)
+        for phrase, intent in self._phrases.items():
+            matcher.set_seq1(phrase)
+            # The cheap upper bounds skip most phrases before the full comparison
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = intent, ratio
+        return (best, None) if best is not None else None
+
+    def _match_add_task(self, text):
+        found = _ADD_TO_LIST.match(text)
+        if found:
+            return found.group("task").strip()
+        found = _ADD_TASK.match(text)
+        if found is None:
+            return None
+        verb, noun = found.group("verb").lower(), re.sub(r"[\s-]", "", found.group("noun").lower())
+        if not difflib.get_close_matches(verb, ADD_VERBS, n=1, cutoff=0.6):
+            return None
+        if not difflib.get_close_matches(noun, TASK_NOUNS, n=1, cutoff=0.75):
+            return None
+        return found.group("task").strip(" .!,")
+
+
+class ReplyAudio:
+    """Speaks REPLIES from the assistant's speech cache, so each reply is synthesized once per voice."""
+
+    def __init__(self, assistant):
+        self.assistant = assistant
+
+    def warm(self, voice):
+        """Synthesizes the replies missing for voice in the background, one at a time."""
+        if self.assistant.provider is None:
+            return None
+        return self.assistant.runtime.submit(self._warm(voice))
+
+    async def _warm(self, voice):
+        cache = self.assistant.speech_cache
+        for key, text in REPLIES.items():
+            if cache.get(voice, text) is None:
+                try:
+                    await cache.fetch(voice, text)
+                except Exception as e:
+                    logger.warning(f"Could not synthesize the '{key}' reply for voice '{voice}': {e}")
+                    return
+
+    def speak(self, voice, key, cancel_token=None):
+        """Plays the reply on the calling thread; a miss costs one synthesis, then it is cached."""
+        cache = self.assistant.speech_cache
+        sample = cache.get(voice, REPLIES[key])
+        if sample is None:
+            if self.assistant.provider is None:
+                return
+            sample = self.assistant.runtime.run(cache.fetch(voice, REPLIES[key]), timeout=30, cancel_token=cancel_token)
+        samples, frame_rate = sample
+        source = PCMQueueSource(1, frame_rate, output_rate=self.assistant.output_rate_for(frame_rate))
+        source.push(samples)
+        source.close()
+        self.assistant.play_source(source, cancel_token=cancel_token)
@@ -0,0 +1,204 @@
+# mixer.py runs one long-lived output stream and mixes chimes, speech and ambient sound into it
+
+import threading
+import logging
+
+import numpy as np
+import sounddevice as sd
+
+from utils.playback import MAX_BLOCK
+
+logger = logging.getLogger(__name__)
+
+MIXER_CHANNELS = ("chimes", "speech", "ambient")
+MIXER_BLOCK = 480  # 10 ms at 48 kHz
+DUCK_GAIN = 0.25  # Ambient level while the assistant is speaking
+GAIN_STEP = 0.05  # Default largest gain change per block, so fades and ducking take about 200 ms
+
+
+class Voice:
+    """One sound on a mixer channel. finished is set once it has played out or been cancelled."""
+
+    def __init__(self, channel, source, start_frame):
+        self.channel = channel
+        self.source = source
+        self.start_frame = start_frame
+        self.finished = threading.Event()
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+
+class AudioMixer:
+    """Sums every sound the app makes into a single output stream.
+
+    Sounds are scheduled against the mixer's own frame clock, so a chime queued N seconds ahead starts on
+    exactly the right sample no matter how late the Tk timer fires. Each channel has a gain that is eased
+    towards its target every block; the ambient channel is ducked while speech plays, and mute is a
+    master gain of zero rather than skipped playback.
+    """
+
+    def __init__(self, device=None, rate=None, channels=2):
+        self.device = device
+        self.rate = rate
+        self.channels = channels
+        self.muted = False
+        self._targets = {channel: 1.0 for channel in MIXER_CHANNELS}
+        self._gains = dict(self._targets)
+        self._steps = {channel: GAIN_STEP for channel in MIXER_CHANNELS}
+        self._master = 1.0
+        self._duck = 1.0
+        self._voices = ()  # Replaced, never mutated, so the callback can read it without locking
+        self._speech_taps = ()  # Replaced the same way
+        self._lock = threading.Lock()
+        self._scratch = np.zeros((MAX_BLOCK, 2), dtype=np.float32)
+        self._speech_buffer = np.zeros((MAX_BLOCK, 2), dtype=np.float32)
+        self._frame = 0
+        self._stream = None
+        self.underflows = 0
+
+    def start(self):
+        info = sd.query_devices(self.device, 'output')
+        if self.rate is None:
+            self.rate = int(info['default_samplerate'])
+        self.channels = max(1, min(self.channels, int(info['max_output_channels'])))
+        self._stream = sd.OutputStream(
+            samplerate=self.rate,
+            channels=self.channels,
+            dtype='float32',
+            blocksize=MIXER_BLOCK,
+            device=self.device,
+            callback=self._callback
+        )
+        self._stream.start()
+        logger.info(f"Audio mixer started at {self.rate} Hz with {self.channels} channel(s).")
+        return self
+
+    def close(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.close()
+
+    def set_device(self, device):
+        """Reopens the stream on another device. Scheduled sounds keep their place on the frame clock."""
+        if device == self.device and self._stream is not None:
+            return
+        self.close()
+        self.device = device
+        self.start()
+
+    @property
+    def now_frame(self):
+        return self._frame
+
+    def play(self, channel, source, delay=0.0):
+        """Starts source on channel delay seconds from now. The source must produce audio at the mixer's rate."""
+        return self.play_at(channel, source, self._frame + int(round(delay * self.rate)))
+
+    def play_at(self, channel, source, frame):
+        voice = Voice(channel, source, frame)
+        with self._lock:
+            self._voices = self._voices + (voice,)
+        return voice
+
+    def cancel(self, voice):
+        with self._lock:
+            self._voices = tuple(v for v in self._voices if v is not voice)
+        voice.finished.set()
+
+    def stop_channel(self, channel):
+        for voice in self._voices:
+            if voice.channel == channel:
+                self.cancel(voice)
+
+    def set_channel_gain(self, channel, gain, fade=None):
+        """Moves the channel to gain, linearly over fade seconds (about 200 ms by default)."""
+        gain = max(0.0, gain)
+        if fade:
+            blocks = max(1.0, fade * (self.rate or 48000) / MIXER_BLOCK)
+            self._steps[channel] = max(abs(gain - self._gains[channel]) / blocks, 1e-4)
+        else:
+            self._steps[channel] = GAIN_STEP
+        self._targets[channel] = gain
+
+    def set_muted(self, muted):
+        self.muted = muted
+
+    def add_speech_tap(self, callback):
+        """Calls callback(samples) from the audio thread with each block the speech channel contributed, as mono float32.
+
+        The samples are what was mixed, after the channel and master gains, and are only valid during the call.
+        """
+        with self._lock:
+            self._speech_taps = self._speech_taps + (callback,)
+
+    def remove_speech_tap(self, callback):
+        with self._lock:
+            self._speech_taps = tuple(tap for tap in self._speech_taps if tap != callback)
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status:
+            self.underflows += 1
+        outdata.fill(0)
+        block_start = self._frame
+        taps = self._speech_taps
+        speech = self._speech_buffer[:frames, :outdata.shape[1]]
+        if taps:
+            speech.fill(0)
+        speaking = False
+        finished = False
+        for voice in self._voices:
+            offset = voice.start_frame - block_start
+            if offset >= frames or voice.finished.is_set():
+                continue
+            # While tapped, speech is mixed on its own first so the listeners get exactly its share of the output
+            target = speech if taps and voice.channel == "speech" else outdata
+            written = self._mix(voice, target[max(0, offset):])
+            speaking = speaking or (voice.channel == "speech" and written > 0)
+            if voice.source.done:
+                voice.finished.set()
+                finished = True
+        if taps:
+            np.add(outdata, speech, out=outdata)
+            for callback in taps:
+                callback(speech[:, 0])
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+        self._frame = block_start + frames
+        self._ease_gains(speaking)
+        if finished:
+            with self._lock:
+                self._voices = tuple(v for v in self._voices if not v.finished.is_set())
+
+    def _mix(self, voice, out):
+        gain = self._gains[voice.channel] * self._master
+        if voice.channel == "ambient":
+            if gain == 0.0:
+                return 0  # A silent loop can simply stand still
+            gain *= self._duck
+        source_channels = voice.source.channels
+        scratch = self._scratch[:min(len(out), MAX_BLOCK), :source_channels]
+        written = voice.source.fill(scratch)
+        if not written or gain == 0.0:
+            return written
+        part = scratch[:written]
+        target = out[:written]
+        if source_channels == 1 or source_channels == self.channels:
+            np.multiply(part, gain, out=part)
+            np.add(target, part, out=target)  # Mono broadcasts to every output channel
+        else:
+            np.multiply(part, gain / source_channels, out=part)
+            for channel in range(source_channels):
+                np.add(target, part[:, channel:channel + 1], out=target)
+        return written
+
+    def _ease_gains(self, speaking):
+        for channel, target in self._targets.items():
+            self._gains[channel] = _step_towards(self._gains[channel], target, self._steps[channel])
+        self._duck = _step_towards(self._duck, DUCK_GAIN if speaking else 1.0)
+        self._master = _step_towards(self._master, 0.0 if self.muted else 1.0)
+
+
+def _step_towards(value, target, step=GAIN_STEP):
+    if value < target:
+        return min(target, value + step)
+    return max(target, value - step)
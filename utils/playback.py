@@ -0,0 +1,144 @@
+# playback.py holds the allocation-free PCM source that every output stream callback reads from
+
+import collections
+import io
+import threading
+
+import numpy as np
+from pydub import AudioSegment
+
+# pydub stores samples as signed integers of the segment's sample width
+SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+MAX_BLOCK = 4096  # frames; larger callback blocks are processed in several passes
+
+
+def pcm_view(audio):
+    """Returns the segment's samples as a read-only (frames, channels) view of its raw bytes, without copying."""
+    if audio.sample_width not in SAMPLE_DTYPES:
+        audio = audio.set_sample_width(2)  # 24-bit has no NumPy dtype
+    samples = np.frombuffer(audio.raw_data, dtype=SAMPLE_DTYPES[audio.sample_width])
+    return samples.reshape(-1, audio.channels)
+
+
+def decode_mp3(audio_bytes, channels=None):
+    """Returns (integer PCM view shaped (frames, channels), frame rate)."""
+    audio = AudioSegment.from_mp3(io.BytesIO(audio_bytes))
+    if channels is not None and audio.channels != channels:
+        audio = audio.set_channels(channels)
+    return pcm_view(audio), audio.frame_rate
+
+
+def resample_pcm(samples, from_rate, to_rate):
+    """Linear resampling for devices that cannot open the clip's native rate. Returns a new array of the same dtype."""
+    if from_rate == to_rate or len(samples) < 2:
+        return samples
+    positions = np.linspace(0, len(samples) - 1, int(len(samples) * to_rate / from_rate))
+    source = np.arange(len(samples))
+    out = np.empty((len(positions), samples.shape[1]), dtype=samples.dtype)
+    for channel in range(samples.shape[1]):
+        out[:, channel] = np.interp(positions, source, samples[:, channel])
+    return out
+
+
+class PCMQueueSource:
+    """Feeds queued integer PCM blocks to a float32 output callback in order.
+
+    Blocks are kept in their decoded integer form; scaling to float and the gain are applied while copying
+    into the callback's buffer, using scratch arrays allocated up front, so the callback never allocates.
+    Setting gain during playback takes effect on the next block with a one-block ramp to avoid clicks.
+    Blocks at another rate are resampled once in push(), off the audio thread. Underruns play silence.
+    """
+
+    def __init__(self, channels, frame_rate, output_rate=None, gain=1.0):
+        self.channels = channels
+        self.frame_rate = frame_rate
+        self.output_rate = output_rate or frame_rate
+        self.gain = gain
+        self._applied_gain = gain
+        self._blocks = collections.deque()
+        self._offset = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._scale = 1.0
+        self._steps = np.arange(1, MAX_BLOCK + 1, dtype=np.float32)
+        self._ramp = np.empty((MAX_BLOCK, 1), dtype=np.float32)
+        self.frames_played = 0
+        self.underruns = 0
+
+    def push(self, samples):
+        if not len(samples):
+            return
+        samples = resample_pcm(samples, self.frame_rate, self.output_rate)
+        with self._lock:
+            self._scale = 1.0 / (float(np.iinfo(samples.dtype).max) + 1.0)
+            self._blocks.append(samples)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+
+    @property
+    def done(self):
+        with self._lock:
+            return self._closed and not self._blocks
+
+    def fill(self, out):
+        """Writes up to len(out) frames into out, zero-filling the rest. Returns the number of frames written."""
+        written = 0
+        with self._lock:
+            while written < len(out) and self._blocks:
+                block = self._blocks[0]
+                take = min(len(out) - written, len(block) - self._offset)
+                np.multiply(block[self._offset:self._offset + take], self._scale, out=out[written:written + take], dtype=np.float32)
+                written += take
+                self._offset += take
+                if self._offset == len(block):
+                    self._blocks.popleft()
+                    self._offset = 0
+            starved = written < len(out) and not self._closed
+        out[written:] = 0
+        if starved:
+            self.underruns += 1
+        for start in range(0, written, MAX_BLOCK):
+            self._apply_gain(out[start:min(written, start + MAX_BLOCK)])
+        self.frames_played += written
+        return written
+
+    def _apply_gain(self, out):
+        gain = self.gain
+        if gain == self._applied_gain:
+            if gain != 1.0:
+                np.multiply(out, gain, out=out)
+            return
+        ramp = self._ramp[:len(out)]
+        np.multiply(self._steps[:len(out), None], (gain - self._applied_gain) / len(out), out=ramp)
+        ramp += self._applied_gain
+        np.multiply(out, ramp, out=out)
+        self._applied_gain = gain
+
+
+class LoopSource:
+    """Repeats one integer PCM buffer forever, for ambient sound. Like PCMQueueSource, fill() never allocates."""
+
+    def __init__(self, samples, frame_rate, gain=1.0):
+        self.samples = samples
+        self.channels = samples.shape[1]
+        self.frame_rate = frame_rate
+        self.output_rate = frame_rate
+        self.gain = gain
+        self.done = False
+        self.frames_played = 0
+        self._offset = 0
+        self._scale = 1.0 / (float(np.iinfo(samples.dtype).max) + 1.0)
+
+    def fill(self, out):
+        written = 0
+        while written < len(out):
+            take = min(len(out) - written, len(self.samples) - self._offset)
+            np.multiply(self.samples[self._offset:self._offset + take], self._scale, out=out[written:written + take], dtype=np.float32)
+            written += take
+            self._offset = (self._offset + take) % len(self.samples)
+        if self.gain != 1.0:
+            np.multiply(out, self.gain, out=out)
+        self.frames_played += written
+        return written
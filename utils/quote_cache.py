@@ -0,0 +1,120 @@
+# quote_cache.py keeps several generated motivational messages per context and serves them without repeats
+
+import re
+import threading
+import time
+
+
+def normalize_tasks(current_todo):
+    """Turns the comma-separated task string into a canonical, order-independent form."""
+    tasks = (re.sub(r"[^a-z0-9 ]+", " ", task.lower()).split() for task in current_todo.split(","))
+    return " | ".join(sorted(" ".join(words) for words in tasks if words))
+
+
+def shingles(text, size=3):
+    text = f" {text} "
+    return {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class _Entry:
+    def __init__(self, mode, topic, profession, tasks):
+        self.mode = mode
+        self.topic = topic
+        self.profession = profession
+        self.tasks = tasks
+        self.shingles = shingles(tasks)
+        self.quotes = []
+        self.last_served = 0.0
+        self.refilling = False
+        self.dropped = False  # Set by clear(), so a refill already in flight discards its result
+
+
+class QuoteCache:
+    """Keyed on (mode, theme/activity, normalized tasks, profession).
+
+    Lookups ignore the theme so every stored variant for the context is eligible, and tasks match by
+    character-shingle similarity, so a small edit to the task list still hits.
+    """
+
+    def __init__(self, similarity_threshold=0.7, low_water=1, max_entries=64):
+        self.similarity_threshold = similarity_threshold
+        self.low_water = low_water
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._generation_times = []
+
+    def take(self, mode, profession, current_todo):
+        """Returns (quote, entry) for the closest matching context, or None on a miss."""
+        tasks = normalize_tasks(current_todo)
+        task_shingles = shingles(tasks)
+        with self._lock:
+            candidates = [
+                entry for entry in self._entries.values()
+                if entry.mode == mode and entry.profession == profession and entry.quotes
+                and jaccard(entry.shingles, task_shingles) >= self.similarity_threshold
+            ]
+            if not candidates:
+                self.misses += 1
+                return None
+            # Rotate across themes: serve from the variant used least recently
+            entry = min(candidates, key=lambda e: e.last_served)
+            entry.last_served = time.monotonic()
+            self.hits += 1
+            return entry.quotes.pop(0), entry
+
+    def store(self, mode, topic, profession, current_todo, quotes, generation_time):
+        tasks = normalize_tasks(current_todo)
+        key = (mode, topic, tasks, profession)
+        with self._lock:
+            self._generation_times.append(generation_time)
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    oldest = min(self._entries, key=lambda k: self._entries[k].last_served)
+                    del self._entries[oldest]
+                entry = self._entries[key] = _Entry(mode, topic, profession, tasks)
+            # Never queue a message that is already waiting to be served
+            entry.quotes.extend(q for q in quotes if q not in entry.quotes)
+            entry.refilling = False
+            return entry
+
+    def clear(self):
+        """Drops every queued message, e.g. once they address the user by a name that has changed."""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.dropped = True
+            self._entries.clear()
+
+    def claim_refill(self, entry):
+        """Returns True if entry is running low and no refill is in flight yet."""
+        with self._lock:
+            if entry.refilling or len(entry.quotes) > self.low_water:
+                return False
+            entry.refilling = True
+            return True
+
+    def release_refill(self, entry):
+        with self._lock:
+            entry.refilling = False
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            mean_generation = sum(self._generation_times) / len(self._generation_times) if self._generation_times else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "latency_saved_s": self.hits * mean_generation,
+                "entries": len(self._entries),
+                "queued_quotes": sum(len(e.quotes) for e in self._entries.values()),
+            }
@@ -0,0 +1,200 @@
+# screen_capture.py grabs the screens the assistant is asked to look at and encodes them for the vision model
+
+import base64
+import io
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import mss
+from PIL import Image
+
+from utils.window_utils import active_window_rect
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_MODES = ["primary", "all", "active_window", "region"]
+CAPTURE_LAYOUTS = ["tiled", "separate"]
+MAX_WIDTH, MAX_HEIGHT = 3840, 2160  # A single screen is sent at up to 4K
+TILE_HEIGHT = 1080  # Every monitor is scaled to this height before tiling
+LOW_DETAIL_SIZE = 512  # Low-detail images are billed as one 512px tile, so larger ones only waste upload
+ENCODE_WORKERS = 4
+
+
+def parse_region(value):
+    """"left,top,width,height" from settings as an mss monitor dict, or None if it isn't one."""
+    try:
+        left, top, width, height = (int(part) for part in str(value).split(","))
+    except ValueError:
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    return {"left": left, "top": top, "width": width, "height": height}
+
+
+def clip(area, bounds):
+    """The part of area inside bounds (both mss monitor dicts), or None if they don't overlap."""
+    left, top = max(area["left"], bounds["left"]), max(area["top"], bounds["top"])
+    right = min(area["left"] + area["width"], bounds["left"] + bounds["width"])
+    bottom = min(area["top"] + area["height"], bounds["top"] + bounds["height"])
+    if right <= left or bottom <= top:
+        return None
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+_output = threading.local()  # One encode buffer per worker thread, reused for every capture
+
+
+def encode(image, fmt="PNG", detail="auto"):
+    """The image as an image_url payload for the chat API."""
+    buffered = getattr(_output, "buffer", None)
+    if buffered is None:
+        buffered = _output.buffer = io.BytesIO()
+    # Overwritten from the start rather than truncated: truncating a BytesIO frees its storage
+    buffered.seek(0)
+    if fmt == "PNG":
+        image.save(buffered, format="PNG", compress_level=1)  # Use minimum compression
+    else:
+        image.save(buffered, format="JPEG", quality=85)
+    length = buffered.tell()
+    with buffered.getbuffer() as view:
+        data = base64.b64encode(view[:length])
+    return {"url": f"data:image/{fmt.lower()};base64," + data.decode("ascii"), "detail": detail}
+
+
+class FramePool:
+    """One RGB image per slot, refilled in place from each grab instead of allocated per capture.
+
+    A slot is a monitor's position in the capture; its image is only replaced when that monitor's
+    size changes, so repeated captures of the same screens touch no new frame memory.
+    """
+
+    def __init__(self):
+        self._images = {}
+
+    def image(self, slot, width, height):
+        image = self._images.get(slot)
+        if image is None or image.size != (width, height):
+            image = self._images[slot] = Image.new("RGB", (width, height))
+        return image
+
+    def fill(self, slot, raw, width, height):
+        image = self.image(slot, width, height)
+        # The raw decoder converts mss's BGRA buffer straight into the existing pixels, skipping alpha
+        image.frombytes(raw, "raw", "BGRX")
+        return image
+
+    def clear(self):
+        self._images = {}
+
+
+def prepare_single(image):
+    if image.width > MAX_WIDTH or image.height > MAX_HEIGHT:
+        image = image.resize(fit(image.size, MAX_WIDTH, MAX_HEIGHT), Image.LANCZOS)
+    return encode(image)
+
+
+def prepare_low_detail(image):
+    return encode(image.resize(fit(image.size, LOW_DETAIL_SIZE, LOW_DETAIL_SIZE), Image.BILINEAR, reducing_gap=2.0),
+                  "JPEG", "low")
+
+
+def prepare_tile(image):
+    if image.height != TILE_HEIGHT:
+        image = image.resize((max(1, round(image.width * TILE_HEIGHT / image.height)), TILE_HEIGHT),
+                             Image.BILINEAR, reducing_gap=2.0)
+    return image
+
+
+def fit(size, max_width, max_height):
+    width, height = size
+    scale = min(max_width / width, max_height / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class ScreenCapture:
+    """Captures the primary monitor, every monitor, the active window or a fixed region.
+
+    One long-lived mss handle does every grab on its own thread, since a handle belongs to the thread
+    that opened it; callers on any thread wait for their grab there. Decoding into the frame pool,
+    scaling and encoding, which Pillow does without holding the GIL, run on a small thread pool, one
+    monitor per worker. Several monitors are either tiled into one image or sent as separate
+    low-detail images. Captures are serialized, so the pooled frames are never shared between two.
+    """
+
+    def __init__(self, workers=ENCODE_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screen-encode")
+        self._grabber = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screen-grab")
+        self._sct = None
+        self._lock = threading.Lock()
+        self.frames = FramePool()
+
+    def areas(self, monitors, mode="primary", region=None):
+        if mode == "all":
+            return sorted(monitors[1:], key=lambda m: (m["left"], m["top"]))
+        # monitors[0] spans every screen; windows and regions are clipped to it so a grab never falls off-screen
+        if mode == "active_window":
+            rect = active_window_rect()
+            if rect is not None and clip(rect, monitors[0]) is not None:
+                return [clip(rect, monitors[0])]
+            logger.warning("Could not find the active window. Capturing the primary monitor.")
+        elif mode == "region":
+            if region is not None and clip(region, monitors[0]) is not None:
+                return [clip(region, monitors[0])]
+            logger.warning("No valid capture region is set. Capturing the primary monitor.")
+        # The primary monitor is usually the one at the origin
+        return [next((m for m in monitors[1:] if m["left"] == 0 and m["top"] == 0), monitors[1])]
+
+    def _grab(self, mode, region):
+        if self._sct is None:
+            self._sct = mss.mss()
+        try:
+            shots = [self._sct.grab(area) for area in self.areas(self._sct.monitors, mode, region)]
+        except Exception:
+            # Monitors were plugged in or out, or the display connection dropped; reopen next time
+            self._sct.close()
+            self._sct = None
+            raise
+        return [(shot.raw, shot.width, shot.height) for shot in shots]
+
+    def grab(self, mode="primary", region=None):
+        """Raw grabs as (BGRA bytes, width, height) tuples, taken on the capture thread."""
+        return self._grabber.submit(self._grab, mode, region).result()
+
+    def capture(self, mode="primary", region=None, layout="tiled"):
+        """Returns a list of image_url payloads; a single one unless layout is "separate"."""
+        with self._lock:
+            return self.encode_shots(self.grab(mode, region), layout)
+
+    def encode_shots(self, frames, layout="tiled"):
+        """frames are (BGRA bytes, width, height) tuples."""
+        def fill(slot):
+            return self.frames.fill(slot, *frames[slot])
+
+        if len(frames) == 1:
+            return [prepare_single(fill(0))]
+        if layout == "separate":
+            return list(self._pool.map(lambda slot: prepare_low_detail(fill(slot)), range(len(frames))))
+        return [self.tile(list(self._pool.map(lambda slot: prepare_tile(fill(slot)), range(len(frames)))))]
+
+    def tile(self, images):
+        """Places the images side by side in one compact JPEG, shrunk to fit the 4K limit."""
+        canvas = self.frames.image("canvas", sum(image.width for image in images), TILE_HEIGHT)
+        x = 0
+        for image in images:
+            canvas.paste(image, (x, 0))
+            x += image.width
+        if canvas.width > MAX_WIDTH:
+            canvas = canvas.resize(fit(canvas.size, MAX_WIDTH, MAX_HEIGHT), Image.BILINEAR, reducing_gap=2.0)
+        return encode(canvas, "JPEG")
+
+    def _close_grabber(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+    def close(self):
+        self._grabber.submit(self._close_grabber)
+        self._grabber.shutdown(wait=False)
+        self._pool.shutdown(wait=False)
+        self.frames.clear()
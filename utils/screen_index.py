@@ -0,0 +1,304 @@
+# screen_index.py keeps a local, searchable history of what was on screen during focus sessions
+
+import datetime
+import hashlib
+import importlib.util
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from utils.window_utils import active_window_title
+
+logger = logging.getLogger(__name__)
+
+SCREEN_INDEX_FILE = "screen_history.db"
+SCREEN_INDEX_INTERVAL = 60  # Seconds between captures while a focus period runs
+OCR_SCALE = 2  # Frames are downscaled by this factor before change detection and OCR
+TILE_SIZE = 64  # Side of a change-detection tile, in downscaled pixels
+FULL_FRAME_RATIO = 0.5  # Above this share of changed tiles the whole frame is read once instead
+OCR_TIMEOUT = 30  # seconds
+DESCRIBE_WINDOW = 10 * 60  # Seconds either side of a time that "what was I doing at..." looks at
+TIME_QUESTION = re.compile(r"\bwhat\b.*\b(?:was|were|did) i\b.*\b(?:at|around)\s+(\d{1,2})(?:[:.](\d{2}))?\s*(?:([ap])\.?\s?m\b)?", re.I)
+
+
+def ocr_available():
+    return importlib.util.find_spec("pytesseract") is not None and shutil.which("tesseract") is not None
+
+
+def parse_time_question(text, now=None):
+    """Timestamp asked about in "what was I working on at 3pm?" and similar, or None for other questions.
+
+    Without am/pm the most recent past occurrence of the hour is used, so "at 3" in the evening means 3pm.
+    """
+    match = TIME_QUESTION.search(text)
+    if match is None:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or "").lower()
+    if hour > 23 or minute > 59 or (meridiem and not 1 <= hour <= 12):
+        return None
+    now = datetime.datetime.now() if now is None else now
+    if meridiem:
+        hours = [hour % 12 + (12 if meridiem == "p" else 0)]
+    elif hour <= 12:
+        hours = [hour % 12, hour % 12 + 12]
+    else:
+        hours = [hour]
+    candidates = []
+    for h in hours:
+        moment = now.replace(hour=h, minute=minute, second=0, microsecond=0)
+        if moment > now:
+            moment -= datetime.timedelta(days=1)
+        candidates.append(moment)
+    return max(candidates).timestamp()
+
+
+def _lower_priority():
+    # OCR workers yield to the timer, the audio callbacks and whatever the user is doing
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def ocr_regions(regions):
+    """Runs in the OCR process. Reads each (grayscale bytes, width, height) region; returns (text, CPU seconds)."""
+    import pytesseract  # Optional dependency; only needed when screen history is enabled
+    from PIL import Image
+    start = time.process_time()
+    texts = []
+    for data, width, height in regions:
+        text = pytesseract.image_to_string(Image.frombytes("L", (width, height), data)).strip()
+        if text:
+            texts.append(text)
+    return "\n".join(texts), time.process_time() - start
+
+
+class ChangeDetector:
+    """Finds the parts of a frame that changed since the last one, so only new text is read.
+
+    The BGRA frame is downscaled with a strided view of its green channel (close enough to luminance
+    for text), cut into tiles, and each tile is compared with the previous frame by digest. Changed
+    tiles are merged into bands of consecutive tile rows.
+    """
+
+    def __init__(self, scale=OCR_SCALE, tile=TILE_SIZE, full_frame_ratio=FULL_FRAME_RATIO):
+        self.scale = scale
+        self.tile = tile
+        self.full_frame_ratio = full_frame_ratio
+        self._digests = {}
+        self._shape = None
+
+    def reset(self):
+        self._digests = {}
+
+    def regions(self, bgra):
+        """bgra is a (height, width, 4) uint8 array. Returns [(grayscale bytes, width, height)] of changed bands."""
+        gray = np.ascontiguousarray(bgra[::self.scale, ::self.scale, 1])
+        if gray.shape != self._shape:
+            self._shape = gray.shape
+            self._digests = {}  # Resolution changed, so every tile is new
+        height, width = gray.shape
+        digests = {}
+        rows = []
+        for y in range(0, height, self.tile):
+            changed = []
+            for x in range(0, width, self.tile):
+                digest = hashlib.blake2b(gray[y:y + self.tile, x:x + self.tile].tobytes(), digest_size=8).digest()
+                digests[(y, x)] = digest
+                if self._digests.get((y, x)) != digest:
+                    changed.append(x)
+            rows.append((y, changed))
+        previous_count = len(self._digests)
+        self._digests = digests
+
+        changed_count = sum(len(changed) for _, changed in rows)
+        if not changed_count:
+            return []
+        if not previous_count or changed_count > self.full_frame_ratio * len(digests):
+            return [(gray.tobytes(), width, height)]
+        # Consecutive tile rows with changes become one band spanning their changed columns, so a line
+        # of text that crosses a tile boundary is read whole
+        bands = []
+        for y, changed in rows:
+            if not changed:
+                continue
+            left, right = changed[0], changed[-1] + self.tile
+            if bands and bands[-1][1] == y:
+                top, _, band_left, band_right = bands[-1]
+                bands[-1] = (top, y + self.tile, min(left, band_left), max(right, band_right))
+            else:
+                bands.append((y, y + self.tile, left, right))
+        regions = []
+        for top, bottom, left, right in bands:
+            band = gray[top:bottom, left:right]
+            regions.append((band.tobytes(), band.shape[1], band.shape[0]))
+        return regions
+
+
+class ScreenIndex:
+    """SQLite history of window titles and on-screen text, with an FTS5 inverted index over both.
+
+    Every capture adds a row to screen_frames (time, focus session, active task, window title), so
+    time-based questions can be answered from counts; text read by OCR goes into screen_text under
+    the same rowid.
+    """
+
+    def __init__(self, db_file=SCREEN_INDEX_FILE):
+        self.db_file = os.path.abspath(db_file)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.create_tables()
+
+    def create_tables(self):
+        with self.lock:
+            self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS screen_frames
+            (id INTEGER PRIMARY KEY, ts REAL, session TEXT, task TEXT, title TEXT);
+            CREATE INDEX IF NOT EXISTS screen_frames_ts ON screen_frames (ts);
+            CREATE VIRTUAL TABLE IF NOT EXISTS screen_text USING fts5 (title, text);
+            ''')
+            self.conn.commit()
+
+    def add(self, ts, session, task, title, text=""):
+        with self.lock:
+            cursor = self.conn.execute('INSERT INTO screen_frames (ts, session, task, title) VALUES (?, ?, ?, ?)',
+                                       (ts, session, task, title))
+            if text or title:
+                self.conn.execute('INSERT INTO screen_text (rowid, title, text) VALUES (?, ?, ?)',
+                                  (cursor.lastrowid, title, text))
+            self.conn.commit()
+
+    def search(self, query, limit=10):
+        """Captures whose title or text match every word of query, best first, as (ts, task, title, snippet)."""
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        match = " ".join(f'"{word}"' for word in words)  # Quoted, so user text can't be read as FTS syntax
+        with self.lock:
+            return self.conn.execute('''
+            SELECT f.ts, f.task, f.title, snippet(screen_text, 1, '[', ']', '...', 8)
+            FROM screen_text JOIN screen_frames f ON f.id = screen_text.rowid
+            WHERE screen_text MATCH ? ORDER BY rank LIMIT ?
+            ''', (match, limit)).fetchall()
+
+    def around(self, ts, window=DESCRIBE_WINDOW):
+        """The most frequent (task, title) pairs captured within window seconds of ts, with their counts."""
+        with self.lock:
+            return self.conn.execute('''
+            SELECT task, title, COUNT(*) AS captures FROM screen_frames
+            WHERE ts BETWEEN ? AND ? GROUP BY task, title ORDER BY captures DESC LIMIT 3
+            ''', (ts - window, ts + window)).fetchall()
+
+    def describe(self, ts):
+        """One spoken sentence about what was on screen around ts, or None if nothing was captured then."""
+        rows = self.around(ts)
+        if not rows:
+            return None
+        when = datetime.datetime.fromtimestamp(ts).strftime("%I:%M %p").lstrip("0")
+        task, title, _ = rows[0]
+        if task and title:
+            return f"Around {when} you were on '{task}', mostly in {title}."
+        if task:
+            return f"Around {when} you were working on '{task}'."
+        return f"Around {when} you were mostly in {title}."
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class ScreenTracker:
+    """Captures the primary monitor during focus periods and indexes its title and changed text.
+
+    Ticks run on the Tk thread, which reads the timer and the active task; change detection runs on
+    one capture thread, grabs go through the shared ScreenCapture, and OCR runs in a single low-priority
+    process. A tick that comes while the previous capture is still being read is skipped, so OCR never
+    queues up and its CPU use stays bounded by one worker.
+    """
+
+    def __init__(self, app, index=None, interval=SCREEN_INDEX_INTERVAL):
+        self.app = app
+        self.index = index if index is not None else ScreenIndex()
+        self.interval = interval
+        self.detector = ChangeDetector()
+        self.ocr_enabled = ocr_available()
+        if not self.ocr_enabled:
+            logger.warning("Screen history is recording window titles only. Install tesseract and pytesseract to index on-screen text.")
+        self._capture = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screen-capture")
+        self._ocr = None
+        self._busy = False
+        self._after_id = None
+        self.session_id = None
+        self.captures = 0
+        self.skipped = 0
+        self.capture_cpu = 0.0
+        self.ocr_cpu = 0.0
+
+    def start(self):
+        self._after_id = self.app.master.after(self.interval * 1000, self.tick)
+
+    def tick(self):
+        app = self.app
+        if app.running and app.is_focus_time:
+            if self.session_id is None:
+                self.session_id = datetime.datetime.now().isoformat(timespec="seconds")
+            if self._busy:
+                self.skipped += 1
+            else:
+                tasks = app.task_texts(app.todo_frame)
+                self._busy = True
+                self._capture.submit(self.capture, self.session_id, tasks[0] if tasks else "")
+        elif not app.is_focus_time:
+            self.session_id = None  # The next focus period is a new session
+        self._after_id = app.master.after(self.interval * 1000, self.tick)
+
+    def capture(self, session, task):
+        try:
+            start = time.process_time()
+            title = active_window_title()
+            regions = self.changed_regions() if self.ocr_enabled else []
+            self.capture_cpu += time.process_time() - start
+            text = ""
+            if regions:
+                if self._ocr is None:
+                    self._ocr = ProcessPoolExecutor(max_workers=1, initializer=_lower_priority)
+                text, cpu = self._ocr.submit(ocr_regions, regions).result(timeout=OCR_TIMEOUT)
+                self.ocr_cpu += cpu
+            self.index.add(time.time(), session, task, title, text)
+            self.captures += 1
+        except Exception as e:
+            logger.error(f"Screen history capture failed: {e}")
+            self.detector.reset()  # Reread everything next time rather than lose what changed
+        finally:
+            self._busy = False
+
+    def changed_regions(self):
+        # Shares the assistant's long-lived grabber; the frame is a view over mss's buffer, not a copy
+        raw, width, height = self.app.voice_assistant.screen_capture.grab("primary")[0]
+        frame = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+        return self.detector.regions(frame)
+
+    def stats(self):
+        return {
+            "captures": self.captures,
+            "skipped": self.skipped,
+            "capture_cpu_ms": round(self.capture_cpu / max(self.captures, 1) * 1000, 1),
+            "ocr_cpu_ms": round(self.ocr_cpu / max(self.captures, 1) * 1000, 1),
+        }
+
+    def close(self):
+        if self._after_id is not None:
+            self.app.master.after_cancel(self._after_id)
+            self._after_id = None
+        self._capture.shutdown(wait=False, cancel_futures=True)
+        if self._ocr is not None:
+            self._ocr.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"Screen history: {self.stats()}")
+        self.index.close()
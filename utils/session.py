@@ -0,0 +1,166 @@
+# session.py is the Pomodoro timer state machine without any UI, for the headless daemon and servers
+
+import time
+
+PHASES = ("focus", "break", "long_break")
+PERSISTED_FIELDS = ("focus_length", "short_break", "long_break_length", "max_work_sessions", "max_break_sessions",
+                    "work_cycles_completed", "tasks", "phase", "running", "work_sessions_completed", "break_sessions_completed")
+
+
+class PomodoroSession:
+    """Focus/break cycling with the same rules as PomodoroApp's buttons and switch_mode().
+
+    The session stores a deadline instead of counting down once a second, so it can be driven by any
+    scheduler and a late wakeup never makes the timer drift. Every method takes the current monotonic
+    time (defaulting to time.monotonic()) and returns the events it produced as dicts.
+    """
+
+    def __init__(self, focus_length=25 * 60, short_break=5 * 60, long_break_length=15 * 60,
+                 max_work_sessions=4, max_break_sessions=4, work_cycles_completed=0):
+        self.focus_length = focus_length
+        self.short_break = short_break
+        self.long_break_length = long_break_length
+        self.max_work_sessions = max_work_sessions
+        self.max_break_sessions = max_break_sessions
+        self.work_cycles_completed = work_cycles_completed
+        self.tasks = []
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.phase = "focus"
+        self.running = False
+        self.deadline = None
+        self.remaining_time = float(self.focus_length)
+        self.work_sessions_completed = 0
+        self.break_sessions_completed = 0
+
+    def length_of(self, phase):
+        return {"focus": self.focus_length, "break": self.short_break, "long_break": self.long_break_length}[phase]
+
+    def remaining(self, now=None):
+        if self.running:
+            now = time.monotonic() if now is None else now
+            return max(0.0, self.deadline - now)
+        return self.remaining_time
+
+    def state(self, now=None):
+        remaining = self.remaining(now)
+        return {
+            "phase": self.phase,
+            "running": self.running,
+            "remaining": round(remaining, 3),
+            "ends_at": round(time.time() + remaining, 3) if self.running else None,  # Lets clients count down without ticks
+            "length": self.length_of(self.phase),
+            "work_sessions_completed": self.work_sessions_completed,
+            "break_sessions_completed": self.break_sessions_completed,
+            "work_cycles_completed": self.work_cycles_completed,
+            "max_work_sessions": self.max_work_sessions,
+            "tasks": list(self.tasks),
+        }
+
+    def to_dict(self, now=None, wall=None):
+        """Serializable snapshot. A running deadline is stored as wall-clock time, since monotonic time restarts with the process.
+
+        Callers snapshotting many sessions pass now and wall (time.time()) once for all of them.
+        """
+        now = time.monotonic() if now is None else now
+        wall = time.time() if wall is None else wall
+        data = {key: getattr(self, key) for key in PERSISTED_FIELDS}
+        data["tasks"] = list(self.tasks)
+        data["remaining_time"] = self.remaining(now)
+        data["ends_at"] = wall + data["remaining_time"] if self.running else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data, now=None):
+        """Restores a snapshot. A timer that was running keeps its wall-clock deadline; call advance() to catch up."""
+        now = time.monotonic() if now is None else now
+        session = cls()
+        for key in PERSISTED_FIELDS:
+            if key in data:
+                setattr(session, key, data[key])
+        session.tasks = list(session.tasks)
+        session.remaining_time = float(data.get("remaining_time", session.focus_length))
+        if session.running:
+            session.deadline = now + (data["ends_at"] - time.time())
+        return session
+
+    def current_todo(self):
+        return ", ".join(self.tasks)
+
+    def add_task(self, text):
+        text = text.strip()
+        if not text:
+            raise ValueError("No task to add")
+        self.tasks.append(text)
+        return [{"type": "task_added", "task": text}]
+
+    def _run(self, phase, length, now):
+        self.phase = phase
+        self.running = True
+        self.deadline = now + length
+        self.remaining_time = float(length)
+
+    def start(self, now=None):
+        """Starts (or resumes) the current period. A no-op while running."""
+        if self.running:
+            return []
+        now = time.monotonic() if now is None else now
+        resuming = self.remaining_time < self.length_of(self.phase)
+        self._run(self.phase, self.remaining_time, now)
+        return [{"type": "resumed" if resuming else "started", "phase": self.phase}]
+
+    def resume(self, now=None):
+        return self.start(now)
+
+    def pause(self, now=None):
+        if not self.running:
+            return []
+        self.remaining_time = self.remaining(now)
+        self.running = False
+        self.deadline = None
+        return [{"type": "paused", "phase": self.phase}]
+
+    def reset(self, now=None):
+        self.reset_counters()
+        return [{"type": "reset", "phase": self.phase}]
+
+    def skip(self, now=None):
+        """Skips a running break, as the Skip button does; focus periods cannot be skipped."""
+        if self.phase == "focus" or not self.running:
+            return []
+        now = time.monotonic() if now is None else now
+        previous = self.phase
+        self.break_sessions_completed = 0
+        self._run("focus", self.focus_length, now)
+        return [{"type": "transition", "from": previous, "to": "focus", "skipped": True}]
+
+    def advance(self, now=None):
+        """Applies every period end up to now, catching up if the caller slept through several."""
+        now = time.monotonic() if now is None else now
+        events = []
+        while self.running and self.deadline <= now:
+            events.extend(self._expire(self.deadline))
+        return events
+
+    def _expire(self, at):
+        # Mirrors PomodoroApp.switch_mode(), start_long_break() and end_long_break()
+        previous = self.phase
+        if previous == "long_break":
+            self.reset_counters()
+            return [{"type": "transition", "from": previous, "to": "focus", "cycle_complete": True}]
+        if previous == "focus":
+            self.work_sessions_completed += 1
+            if self.work_sessions_completed >= self.max_work_sessions:
+                self.work_cycles_completed += 1
+                self.work_sessions_completed = 0
+                self._run("long_break", self.long_break_length, at)
+            else:
+                self._run("break", self.short_break, at)
+        else:
+            self.break_sessions_completed += 1
+            if self.break_sessions_completed >= self.max_break_sessions:
+                self.reset_counters()
+                return [{"type": "transition", "from": previous, "to": "focus", "cycle_complete": True}]
+            self._run("focus", self.focus_length, at)
+        return [{"type": "transition", "from": previous, "to": self.phase}]
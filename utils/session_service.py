@@ -0,0 +1,92 @@
+# session_service.py runs one PomodoroSession on an asyncio loop and exposes it through the control API
+
+import asyncio
+import time
+import logging
+
+from utils.control_api import EventHub, HTTPError
+
+logger = logging.getLogger(__name__)
+
+TICK_SECONDS = 1.0
+
+
+class SessionService:
+    """Ticks the session, publishes ticks and transitions to SSE clients and serves the JSON commands.
+
+    One ticker task serves every client: it sleeps until the next whole second of the countdown (or the
+    period's deadline) and is woken early by commands, so idle clients cost nothing but their socket.
+    on_events(events) is called on the loop after every command or transition, for chimes and quotes.
+    """
+
+    def __init__(self, session, hub=None, on_events=None, tick_seconds=TICK_SECONDS):
+        self.session = session
+        self.hub = hub or EventHub()
+        self.on_events = on_events
+        self.tick_seconds = tick_seconds
+        self._wakeup = None
+
+    def routes(self):
+        return [
+            ("GET", "/state", self.get_state),
+            ("POST", "/start", self._command("start")),
+            ("POST", "/pause", self._command("pause")),
+            ("POST", "/resume", self._command("resume")),
+            ("POST", "/skip", self._command("skip")),
+            ("POST", "/reset", self._command("reset")),
+            ("POST", "/tasks", self.add_task),
+            ("GET", "/events", self.events),
+        ]
+
+    async def get_state(self, request):
+        return self.session.state()
+
+    def _command(self, name):
+        async def handler(request):
+            return self.apply(getattr(self.session, name)())
+        return handler
+
+    async def add_task(self, request):
+        text = request.json().get("text", "")
+        try:
+            return self.apply(self.session.add_task(str(text)))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    async def events(self, request):
+        subscription = self.hub.subscribe()
+        subscription.send("state", self.session.state())
+        return subscription
+
+    def apply(self, events):
+        """Publishes events produced by the session and wakes the ticker. Returns the command's response."""
+        state = self.session.state()
+        for event in events:
+            self.hub.publish(event["type"], {**event, "state": state, "t": time.time()})
+        if events:
+            if self.on_events is not None:
+                try:
+                    self.on_events(events)
+                except Exception as e:
+                    logger.error(f"Error handling timer events: {e}")
+            if self._wakeup is not None:
+                self._wakeup.set()
+        return {"events": events, "state": state}
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        while True:
+            now = time.monotonic()
+            self.apply(self.session.advance(now))
+            self._wakeup.clear()  # Only commands that arrive from here on should cut the sleep short
+            if not self.session.running:
+                await self._wakeup.wait()  # Nothing to count down until a command starts the timer
+                continue
+            remaining = self.session.remaining(now)
+            self.hub.publish("tick", {"phase": self.session.phase, "remaining": round(remaining), "t": time.time()})
+            # Sleep to the next whole tick of the countdown, so ticks line up with the displayed seconds
+            delay = remaining % self.tick_seconds or self.tick_seconds
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), min(delay, remaining))
+            except asyncio.TimeoutError:
+                pass
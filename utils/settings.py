@@ -5,10 +5,28 @@ from cryptography.fernet import Fernet
 import logging
 from utils.ui import UIConfig
 import json
+import threading
 import sounddevice as sd
+from utils.stt import STT_BACKENDS
+from utils.soundscapes import SOUNDSCAPES
+from utils.ai_provider import AIProvider
+from utils.voice_previews import VOICES
+from utils.screen_capture import CAPTURE_MODES, CAPTURE_LAYOUTS
 
 logger = logging.getLogger(__name__)
 
+# Settings shown as Enable checkboxes in the settings window
+CHECKBOX_SETTINGS = {"AI_SCREEN_VISION", "BARGE_IN", "WAKE_WORD_ENABLED", "PLAN_THE_DAY", "SCREEN_HISTORY", "SPECULATIVE_REPLIES", "VOICE_COMMANDS"}
+# Settings shown as read-only dropdowns, with their options
+CHOICE_SETTINGS = {
+    "AI_VOICE": VOICES,
+    "STT_BACKEND": STT_BACKENDS,
+    "AMBIENT_SOUND": SOUNDSCAPES,
+    "AMBIENT_VOLUME": list(range(0, 101, 10)),
+    "SCREEN_CAPTURE_MODE": CAPTURE_MODES,
+    "SCREEN_CAPTURE_LAYOUT": CAPTURE_LAYOUTS,
+}
+
 class APIKeyManager:
     def __init__(self, key_path="api_key.key", api_key_file='encrypted_api_key.bin'):
         self.key_path = Path(key_path)
@@ -120,113 +138,256 @@ class SettingsManager:
             "BREAK_TIME": 5,  
             "WORK_CYCLES_COMPLETED": 0,
             "AI_SCREEN_VISION": False,
+            "SCREEN_CAPTURE_MODE": "primary",  # primary, all, active_window or region
+            "SCREEN_CAPTURE_LAYOUT": "tiled",  # Several monitors as one tiled image, or separate low-detail ones
+            "SCREEN_CAPTURE_REGION": "",  # "left,top,width,height" in screen pixels, for the region mode
+            "SCREEN_HISTORY": False,  # Index window titles and on-screen text locally during focus periods
+            "SCREEN_HISTORY_INTERVAL": 60,  # Seconds between screen history captures
             "INPUT_DEVICE": None,  # Default to system default
             "OUTPUT_DEVICE": None,  # Default to system default
+            "BARGE_IN": True,  # Stop the assistant mid-sentence when the user starts talking
+            "WAKE_WORD_ENABLED": False,  # Always-on listening for the recorded wake phrase
+            "TALK_HOTKEY": "<Control-space>",  # Tk key sequence for push-to-talk
+            "SAVE_RECORDINGS": False,  # Keep a FLAC copy of every capture in audiofiles/ for debugging
+            "HISTORY_RETENTION_DAYS": 30,  # Older conversation turns are moved to the compressed archive
+            "HISTORY_MAX_MESSAGES": 5000,  # ...as are the oldest turns beyond this many
+            "HISTORY_MAX_MB": 2,  # ...or beyond this much text
+            "STT_BACKEND": "remote",  # "remote" (whisper-1) or "local" (faster-whisper on the CPU)
+            "LOCAL_STT_MODEL": "base.en",
+            "SPECULATIVE_REPLIES": True,  # With local speech recognition, start the reply before the transcript is final
+            "VOICE_COMMANDS": True,  # Handle "pause", "skip break", "add task ..." on the device instead of asking the AI
+            "AI_BASE_URL": "",  # Empty for OpenAI, or any OpenAI-compatible server such as http://localhost:11434/v1
+            "MODEL_QUOTES": "gpt-4-turbo",
+            "MODEL_DIALOGUE": "gpt-4o-mini",
+            "MODEL_VISION": "gpt-4o",
+            "MODEL_TRANSCRIPTION": "whisper-1",
+            "MODEL_SPEECH": "tts-1",
+            "PLAN_THE_DAY": False,  # Write and synthesize the day's messages ahead of time in one batch
+            "PLAN_CYCLES": 1,  # Full work cycles covered by each plan
+            "AMBIENT_SOUND": "off",  # Focus soundscape: off, white, pink, brown, binaural or rain
+            "AMBIENT_VOLUME": 30,  # Percent
         }
 
+API_KEY_PLACEHOLDER = "**********************"
+ROWS_PER_PASS = 4  # Rows built per event-loop pass, so opening the window never stalls the timer
+
+# Label -> settings key, in display order
+SETTINGS_ROWS = {
+    "User Name": "USER_NAME",
+    "Profession": "PROFESSION",
+    "AI Voice": "AI_VOICE",
+    "Speech Recognition": "STT_BACKEND",
+    "Early Replies": "SPECULATIVE_REPLIES",
+    "Voice Timer Commands": "VOICE_COMMANDS",
+    "OpenAI API Key": "api_key",
+    "AI Base URL": "AI_BASE_URL",
+    "Focus Time (min)": "FOCUS_TIME", 
+    "Break Time (min)": "BREAK_TIME",
+    "AI Screen Vision": "AI_SCREEN_VISION",
+    "Screens to Capture": "SCREEN_CAPTURE_MODE",
+    "Multi-Screen Layout": "SCREEN_CAPTURE_LAYOUT",
+    "Capture Region": "SCREEN_CAPTURE_REGION",
+    "Screen History": "SCREEN_HISTORY",
+    "Interrupt by Talking": "BARGE_IN",
+    "Wake Word": "WAKE_WORD_ENABLED",
+    "Plan the Day": "PLAN_THE_DAY",
+    "Planned Cycles": "PLAN_CYCLES",
+    "Focus Sound": "AMBIENT_SOUND",
+    "Focus Sound Volume": "AMBIENT_VOLUME",
+    "Input Device": "INPUT_DEVICE",
+    "Output Device": "OUTPUT_DEVICE"
+}
+
 class SettingsWindow:
     def __init__(self, master, app):
         self.master = master
         self.app = app
         self.ui = app.ui
         self.window = tk.Toplevel(master)
+        self.entries = {}
+        self.status_labels = {}
+        self.devices = None  # (input names, output names) once the background probe finishes
         self.create_widgets()
         self.window.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
-        frame = ttk.Frame(self.window, style="TFrame")
-        frame.pack(padx=10, pady=10)
-
-        settings = {
-            "User Name": "USER_NAME",
-            "Profession": "PROFESSION",
-            "AI Voice": "AI_VOICE",
-            "OpenAI API Key": "api_key",
-            "Focus Time (min)": "FOCUS_TIME", 
-            "Break Time (min)": "BREAK_TIME",
-            "AI Screen Vision": "AI_SCREEN_VISION",
-            "Input Device": "INPUT_DEVICE",
-            "Output Device": "OUTPUT_DEVICE"
-        }
-        self.entries = {}
+        self.frame = ttk.Frame(self.window, style="TFrame")
+        self.frame.pack(padx=10, pady=10)
+        # Rows are built a few at a time from the event loop and devices are probed on a thread
+        self.probe_devices()
+        self.window.after_idle(self.build_rows, 0)
 
+    def build_rows(self, start):
+        if not self.window.winfo_exists():
+            return
+        rows = list(SETTINGS_ROWS.items())
+        for i in range(start, min(start + ROWS_PER_PASS, len(rows))):
+            label, setting_key = rows[i]
+            self.create_row(i, label, setting_key)
+        if start + ROWS_PER_PASS < len(rows):
+            self.window.after(1, self.build_rows, start + ROWS_PER_PASS)
+        else:
+            self.create_buttons(len(rows))
+
+    def create_row(self, i, label, setting_key):
+        frame = self.frame
         entry_width = 30
+        label_widget = self.ui.create_label(frame, text=f"{label}:")
+        label_widget.grid(row=i, column=0, padx=(10, 20), pady=10, sticky="e")
 
-        for i, (label, setting_key) in enumerate(settings.items()):
-            label_widget = self.ui.create_label(frame, text=f"{label}:")
-            label_widget.grid(row=i, column=0, padx=(10, 20), pady=10, sticky="e")
-
-            if setting_key == "api_key":
-                entry_widget = self.ui.create_entry(frame, width=entry_width)
-                if self.app.api_key_manager.api_key_exists():
-                    entry_widget.insert(0, "**********************")
-                else:
-                    entry_widget.insert(0, self.app.settings_manager.get_setting(setting_key, ""))
-                entry_widget.bind("<FocusIn>", lambda event, e=entry_widget: e.delete(0, tk.END) if e.get() == "**********************" else None)
-                entry_widget.bind("<FocusOut>", lambda event, e=entry_widget: e.insert(0, "**********************") if not e.get() else None)
-            elif setting_key == "AI_VOICE":
-                entry_widget = ttk.Combobox(frame, values=["alloy", "echo", "fable", "onyx", "nova", "shimmer"], state="readonly", width=entry_width)
-                entry_widget.set(self.app.settings_manager.get_setting(setting_key, ""))
-            elif setting_key in ["FOCUS_TIME", "BREAK_TIME"]:
-                options = [1, 15, 25, 50, 90] if setting_key == "FOCUS_TIME" else [1, 5, 10, 15]
-                entry_widget = ttk.Combobox(frame, values=options, state="readonly", width=entry_width)
-                entry_widget.set(self.app.settings_manager.get_setting(setting_key, ""))
-            elif setting_key == "AI_SCREEN_VISION":
-                entry_widget = ttk.Checkbutton(frame, text="Enable")
-                entry_widget.state(['!alternate'])
-                if self.app.settings_manager.get_setting(setting_key, False):
-                    entry_widget.state(['selected'])
-                else:
-                    entry_widget.state(['!selected'])
-            elif setting_key in ["INPUT_DEVICE", "OUTPUT_DEVICE"]:
-                devices = sd.query_devices()
-                if setting_key == "INPUT_DEVICE":
-                    device_names = [d['name'] for d in devices if d['max_input_channels'] > 0]
-                else:  # OUTPUT_DEVICE
-                    device_names = [d['name'] for d in devices if d['max_output_channels'] > 0]
-                device_names.insert(0, "System Default")  # Add default option
-                entry_widget = ttk.Combobox(frame, values=device_names, state="readonly", width=entry_width)
-                current_device = self.app.settings_manager.get_setting(setting_key)
-                if current_device in device_names:
-                    entry_widget.set(current_device)
-                else:
-                    entry_widget.set("System Default")
+        if setting_key == "api_key":
+            entry_widget = self.ui.create_entry(frame, width=entry_width)
+            if self.app.api_key_manager.api_key_exists():
+                entry_widget.insert(0, API_KEY_PLACEHOLDER)
             else:
-                entry_widget = self.ui.create_entry(frame, width=entry_width)
                 entry_widget.insert(0, self.app.settings_manager.get_setting(setting_key, ""))
-
-            entry_widget.grid(row=i, column=1, padx=(10, 20), pady=10, sticky="w")
+            entry_widget.bind("<FocusIn>", lambda event, e=entry_widget: e.delete(0, tk.END) if e.get() == API_KEY_PLACEHOLDER else None)
+            entry_widget.bind("<FocusOut>", lambda event, e=entry_widget: e.insert(0, API_KEY_PLACEHOLDER) if not e.get() else None)
+            self.create_action(i, setting_key, "Test", self.test_api_key)
+        elif setting_key in CHOICE_SETTINGS:
+            entry_widget = ttk.Combobox(frame, values=CHOICE_SETTINGS[setting_key], state="readonly", width=entry_width)
+            entry_widget.set(self.app.settings_manager.get_setting(setting_key, ""))
+            if setting_key == "AI_VOICE":
+                entry_widget.bind("<<ComboboxSelected>>", lambda event: self.preview_voice())
+                self.create_action(i, setting_key, "Preview", self.preview_voice)
+        elif setting_key in ["FOCUS_TIME", "BREAK_TIME"]:
+            options = [1, 15, 25, 50, 90] if setting_key == "FOCUS_TIME" else [1, 5, 10, 15]
+            entry_widget = ttk.Combobox(frame, values=options, state="readonly", width=entry_width)
+            entry_widget.set(self.app.settings_manager.get_setting(setting_key, ""))
+        elif setting_key in CHECKBOX_SETTINGS:
+            entry_widget = ttk.Checkbutton(frame, text="Enable")
+            entry_widget.state(['!alternate'])
+            if self.app.settings_manager.get_setting(setting_key, self.app.settings_manager.default_settings().get(setting_key, False)):
+                entry_widget.state(['selected'])
+            else:
+                entry_widget.state(['!selected'])
+        elif setting_key in ["INPUT_DEVICE", "OUTPUT_DEVICE"]:
+            # Filled in by probe_devices; until then only the saved choice is offered
+            current_device = self.app.settings_manager.get_setting(setting_key) or "System Default"
+            entry_widget = ttk.Combobox(frame, values=list(dict.fromkeys(["System Default", current_device])), state="readonly", width=entry_width)
+            entry_widget.set(current_device)
             self.entries[setting_key] = entry_widget
+            if self.devices is not None:
+                self.show_devices(*self.devices)
+        else:
+            entry_widget = self.ui.create_entry(frame, width=entry_width)
+            entry_widget.insert(0, self.app.settings_manager.get_setting(setting_key, ""))
+
+        entry_widget.grid(row=i, column=1, padx=(10, 20), pady=10, sticky="w")
+        self.entries[setting_key] = entry_widget
 
-        button_frame = ttk.Frame(frame, style="TFrame")
-        button_frame.grid(row=len(settings), column=1, sticky="e", padx=(5, 20), pady=20)
+    def create_action(self, row, setting_key, text, command):
+        action_frame = ttk.Frame(self.frame, style="TFrame")
+        action_frame.grid(row=row, column=2, sticky="w")
+        button = self.ui.create_modern_button(action_frame, text=text, command=command)
+        button.pack(side='left', padx=5)
+        status = self.ui.create_label(action_frame, text="")
+        status.pack(side='left', padx=5)
+        self.status_labels[setting_key] = status
+
+    def create_buttons(self, row):
+        button_frame = ttk.Frame(self.frame, style="TFrame")
+        button_frame.grid(row=row, column=1, sticky="e", padx=(5, 20), pady=20)
+        record_button = self.ui.create_modern_button(button_frame, text="Record Wake Word", command=self.app.record_wake_word)
+        record_button.pack(side='left', pady=5, padx=5)
         save_button = self.ui.create_modern_button(button_frame, text="Save", command=self.apply_and_save_settings)
-        save_button.pack(pady=5, padx=5)
+        save_button.pack(side='left', pady=5, padx=5)
+
+    def set_status(self, setting_key, text):
+        """Safe to call after the window has closed."""
+        label = self.status_labels.get(setting_key)
+        if label is not None and self.window.winfo_exists():
+            label.config(text=text)
+
+    def probe_devices(self):
+        def probe():
+            try:
+                devices = sd.query_devices()
+            except Exception as e:
+                logger.error(f"Failed to list audio devices: {e}")
+                devices = []
+            inputs = [d['name'] for d in devices if d['max_input_channels'] > 0]
+            outputs = [d['name'] for d in devices if d['max_output_channels'] > 0]
+            try:
+                self.master.after(0, lambda: self.show_devices(inputs, outputs))
+            except RuntimeError:
+                pass  # The app is shutting down
+
+        threading.Thread(target=probe, name="device-probe", daemon=True).start()
+
+    def show_devices(self, inputs, outputs):
+        self.devices = (inputs, outputs)
+        if not self.window.winfo_exists():
+            return
+        for setting_key, names in (("INPUT_DEVICE", inputs), ("OUTPUT_DEVICE", outputs)):
+            entry = self.entries.get(setting_key)
+            if entry is None:
+                continue  # Not built yet; create_row picks the list up
+            entry.config(values=["System Default"] + names)
+            if entry.get() not in names:
+                entry.set("System Default")
+
+    def test_api_key(self):
+        """Sends a cheap request with the key and endpoint as currently typed, without saving them."""
+        api_key = self.entries["api_key"].get()
+        if api_key == API_KEY_PLACEHOLDER or not api_key:
+            api_key = self.app.api_key_manager.get_api_key()
+        base_url_entry = self.entries.get("AI_BASE_URL")
+        base_url = base_url_entry.get().strip() if base_url_entry is not None else ""
+        provider = AIProvider(api_key=api_key, base_url=base_url, timeout=10.0, max_retries=0)
+        self.set_status("api_key", "Checking...")
+
+        async def check():
+            try:
+                return await provider.check()
+            finally:
+                await provider.close()
+
+        self.app.ai_runtime.post_to_tk(
+            self.master,
+            check(),
+            on_result=lambda count: self.set_status("api_key", f"Works ({count} models)"),
+            on_error=lambda e: self.set_status("api_key", f"Failed: {type(e).__name__}")
+        )
+
+    def preview_voice(self):
+        voice = self.entries["AI_VOICE"].get()
+        if self.app.voice_previews.get(voice) is None:
+            self.set_status("AI_VOICE", "Loading...")  # Only the first preview of a voice needs a request
+        self.app.voice_previews.play(
+            voice,
+            on_started=lambda: self.set_status("AI_VOICE", ""),
+            on_error=lambda e: self.set_status("AI_VOICE", "Preview failed")
+        )
 
     def on_close(self):
         logger.info("Closing settings window.")
         self.window.destroy()
 
     def apply_and_save_settings(self):
-        placeholder = "**********************"
+        changed = set()
         for key, entry in self.entries.items():
             if key == "api_key":
                 value = entry.get()
-                if value != placeholder and value:
+                if value != API_KEY_PLACEHOLDER and value:
                     self.app.api_key_manager.set_api_key(value)
-            elif key == "AI_SCREEN_VISION":
+                    changed.add(key)
+                continue
+            elif key in CHECKBOX_SETTINGS:
                 value = 'selected' in entry.state()
             else:
                 value = entry.get()
-            
-            if key != "api_key" or (key == "api_key" and value != placeholder and value):
+
+            # Dropdowns return strings, so compare as text to spot real changes
+            if str(self.app.settings_manager.get_setting(key)) != str(value):
                 self.app.settings_manager.update_setting(key, value)
+                changed.add(key)
 
         success = self.app.settings_manager.save_settings()
         if success:
-            logger.info("Settings saved successfully.")
-            self.app.update_timer_settings()
+            logger.info(f"Settings saved successfully. Changed: {sorted(changed)}")
+            self.app.apply_settings_changes(changed)
         else:
             logger.error("Failed to save settings (apply_and_save_settings)")
 
-        self.window.destroy()
\ No newline at end of file
+        self.window.destroy()
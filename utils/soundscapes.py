@@ -0,0 +1,75 @@
+# soundscapes.py synthesizes the looping focus sounds with NumPy, once per sound and sample rate
+
+import functools
+
+import numpy as np
+
+SOUNDSCAPES = ["off", "white", "pink", "brown", "binaural", "rain"]
+LOOP_SECONDS = 12
+LEVEL = 0.5  # Peak level of every loop, before the volume setting
+
+
+def _shaped_noise(frames, rate, channels, exponent, rng, band=None):
+    """Noise whose power falls off as 1/f**exponent, synthesized in the frequency domain.
+
+    An inverse FFT is periodic over its length, so the buffer loops without a seam.
+    """
+    bins = frames // 2 + 1
+    freqs = np.fft.rfftfreq(frames, 1.0 / rate)
+    amplitude = np.ones(bins)
+    amplitude[1:] = freqs[1:] ** (-exponent / 2.0)
+    amplitude[0] = 0.0  # No DC offset
+    if band is not None:
+        low, high = band
+        amplitude *= 1.0 / (1.0 + (low / np.maximum(freqs, 1.0)) ** 4)  # Gentle high-pass
+        amplitude *= 1.0 / (1.0 + (freqs / high) ** 4)  # and low-pass
+    phases = rng.uniform(0.0, 2.0 * np.pi, (bins, channels))
+    spectrum = amplitude[:, None] * np.exp(1j * phases)
+    return np.fft.irfft(spectrum, n=frames, axis=0)
+
+
+def _binaural(frames, rate, carrier=200.0, beat=10.0):
+    # Frequencies are rounded to whole cycles per loop so the waveform meets itself at the seam
+    cycles = lambda freq: round(freq * frames / rate)
+    t = np.arange(frames) / frames
+    left = np.sin(2 * np.pi * cycles(carrier) * t)
+    right = np.sin(2 * np.pi * cycles(carrier + beat) * t)
+    return np.stack([left, right], axis=1)
+
+
+def _rain(frames, rate, rng):
+    bed = _shaped_noise(frames, rate, 2, 0.5, rng, band=(400.0, 9000.0))
+    # Droplets: short decaying noise bursts scattered around the loop, wrapping at the end
+    drops = np.zeros((frames, 2))
+    burst_len = int(0.012 * rate)
+    burst = rng.standard_normal(burst_len) * np.exp(-np.linspace(0.0, 6.0, burst_len))
+    count = int(LOOP_SECONDS * 40)
+    starts = rng.integers(0, frames, count)
+    gains = rng.uniform(0.2, 1.0, (count, 2))
+    offsets = (starts[:, None] + np.arange(burst_len)) % frames
+    for channel in range(2):
+        np.add.at(drops[:, channel], offsets, burst * gains[:, channel:channel + 1])
+    bed /= np.max(np.abs(bed))
+    drops /= np.max(np.abs(drops))
+    return bed + 0.35 * drops
+
+
+@functools.lru_cache(maxsize=8)
+def soundscape(kind, rate, seconds=LOOP_SECONDS):
+    """Returns a seamless stereo loop as int16 samples shaped (frames, 2). Computed once and kept in memory."""
+    frames = int(seconds * rate)
+    rng = np.random.default_rng(0)
+    if kind == "white":
+        samples = _shaped_noise(frames, rate, 2, 0.0, rng)
+    elif kind == "pink":
+        samples = _shaped_noise(frames, rate, 2, 1.0, rng)
+    elif kind == "brown":
+        samples = _shaped_noise(frames, rate, 2, 2.0, rng, band=(20.0, rate / 2))
+    elif kind == "binaural":
+        samples = _binaural(frames, rate)
+    elif kind == "rain":
+        samples = _rain(frames, rate, rng)
+    else:
+        raise ValueError(f"Unknown soundscape '{kind}'")
+    samples *= LEVEL / np.max(np.abs(samples))
+    return (samples * 32767).astype(np.int16)
@@ -0,0 +1,175 @@
+# speculation.py starts the assistant's reply from a stable partial transcript while speech-to-text finishes
+
+import re
+import threading
+import time
+import logging
+
+from utils.task_pool import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_MIN_WORDS = 3  # Shorter partials are too often the start of a longer question
+SPECULATION_STABLE_PARTIALS = 2  # Identical partials in a row that count as stable
+SPECULATION_TIMEOUT = 60  # seconds
+SENTENCE_END = re.compile(r"[.?!]$")
+
+
+def normalize(text):
+    """Lowercase words only, so punctuation and casing differences between partial and final still match."""
+    return " ".join(re.findall(r"[\w']+", text.lower()))
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)  # About four characters per token for English
+
+
+class SpeculationPolicy:
+    """Decides when a partial transcript is stable enough to answer.
+
+    A partial qualifies once it has min_words words and either ends a sentence or has come back
+    unchanged stable_partials times in a row. Growing partials (faster-whisper adds a segment at a
+    time) trigger on sentence ends; engines that revise a hypothesis trigger on repeats.
+    """
+
+    def __init__(self, min_words=SPECULATION_MIN_WORDS, stable_partials=SPECULATION_STABLE_PARTIALS, on_sentence_end=True):
+        self.min_words = min_words
+        self.stable_partials = stable_partials
+        self.on_sentence_end = on_sentence_end
+        self.reset()
+
+    def reset(self):
+        self._last = None
+        self._repeats = 0
+
+    def update(self, text):
+        """Returns the normalized text to speculate on, or None to keep waiting."""
+        normalized = normalize(text)
+        if normalized == self._last:
+            self._repeats += 1
+        else:
+            self._last, self._repeats = normalized, 1
+        if len(normalized.split()) < self.min_words:
+            return None
+        if self._repeats >= self.stable_partials or (self.on_sentence_end and SENTENCE_END.search(text.strip())):
+            return normalized
+        return None
+
+
+class SpeculationStats:
+    """Totals across turns, for tuning the policy: what speculation cost and what it saved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.committed = 0
+        self.cancelled = 0
+        self.wasted_tokens = 0
+        self.latency_won = 0.0
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def as_dict(self):
+        return {
+            "started": self.started,
+            "committed": self.committed,
+            "cancelled": self.cancelled,
+            "wasted_tokens": self.wasted_tokens,
+            "latency_won_s": round(self.latency_won, 2),
+        }
+
+
+class _Speculation:
+    def __init__(self, text, messages, token):
+        self.text = text
+        self.prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages if isinstance(m["content"], str))
+        self.future = None
+        self.token = token
+        self.started = time.monotonic()
+        self.finished = None
+
+    async def timed(self, request):
+        # Stamped on the loop before the result is handed over, so resolve() always sees it
+        try:
+            return await request
+        finally:
+            self.finished = time.monotonic()
+
+
+class SpeculativeResponder:
+    """Feeds on one turn's partial transcripts and answers the final one early when it can.
+
+    A stable partial starts a dialogue request without touching the history or database. If the
+    final transcript normalizes to the same text the reply is committed; otherwise, or when a later
+    partial stabilizes on different words, the request is cancelled and counted as waste. Wasted
+    tokens are estimated from text length: the prompt of every cancelled request, plus the reply if
+    it had already arrived.
+    """
+
+    def __init__(self, assistant, policy=None, cancel_token=None, skip=None):
+        self.assistant = assistant
+        self.policy = policy if policy is not None else SpeculationPolicy()
+        self.cancel_token = cancel_token  # The voice command's token; cancelling it cancels the speculation
+        self.skip = skip  # skip(text) -> True for utterances answered without the model
+        self.stats = assistant.speculation_stats
+        self.current = None
+
+    def feed(self, text):
+        target = self.policy.update(text)
+        if target is None or (self.current is not None and self.current.text == target):
+            return
+        if self.skip is not None and self.skip(text):
+            return
+        self.cancel()
+        token = CancellationToken()
+        if self.cancel_token is not None:
+            self.cancel_token.add_callback(token.cancel)
+        messages = self.assistant.build_messages(text)
+        speculation = _Speculation(target, messages, token)
+        speculation.future = self.assistant.runtime.submit(
+            speculation.timed(self.assistant.request_reply("dialogue", messages)),
+            timeout=SPECULATION_TIMEOUT,
+            cancel_token=token
+        )
+        self.current = speculation
+        self.stats.add(started=1)
+        logger.info(f"Speculating on partial transcript: {text}")
+
+    def cancel(self):
+        current, self.current = self.current, None
+        if current is None:
+            return
+        current.token.cancel()
+        if self.cancel_token is not None:
+            self.cancel_token.remove_callback(current.token.cancel)
+        wasted = current.prompt_tokens
+        if current.future.done() and not current.future.cancelled() and current.future.exception() is None:
+            wasted += estimate_tokens(current.future.result())
+        self.stats.add(cancelled=1, wasted_tokens=wasted)
+
+    def resolve(self, final_text):
+        """The speculative reply if final_text matches what was speculated on, else None (and the request is cancelled)."""
+        final_at = time.monotonic()
+        current = self.current
+        if current is None:
+            return None
+        if normalize(final_text) != current.text:
+            logger.info("Final transcript diverged from the speculation; reissuing.")
+            self.cancel()
+            return None
+        try:
+            reply = current.future.result()
+        except Exception as e:
+            logger.error(f"Speculative request failed: {e}")
+            self.cancel()
+            return None
+        self.current = None
+        if self.cancel_token is not None:
+            self.cancel_token.remove_callback(current.token.cancel)
+        # Without speculation the request would have started at final_at and taken as long as it did
+        duration = current.finished - current.started
+        self.stats.add(committed=1, latency_won=min(duration, final_at - current.started))
+        return reply
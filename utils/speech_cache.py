@@ -0,0 +1,70 @@
+# speech_cache.py keeps short fixed phrases decoded on disk so they play without a network request or an mp3 decode
+
+import asyncio
+import hashlib
+import os
+import threading
+import logging
+
+import numpy as np
+
+from utils.playback import decode_mp3
+
+logger = logging.getLogger(__name__)
+
+SPEECH_CACHE_DIR = "speech_cache"
+
+
+class SpeechCache:
+    """Decoded speech keyed by (voice, text), synthesized once and replayed from memory or disk.
+
+    Samples are stored as mono int16 at the voice's native rate in a compressed .npz named after the
+    voice and a hash of the text. The text is saved with them, so an edited phrase misses instead of
+    playing the old clip. Voice previews and the replies to voice commands both live here.
+    """
+
+    def __init__(self, assistant, cache_dir=SPEECH_CACHE_DIR):
+        self.assistant = assistant
+        self.cache_dir = cache_dir
+        self._samples = {}  # (voice, text) -> (int16 samples shaped (frames, 1), frame rate)
+        self._lock = threading.Lock()
+
+    def _path(self, voice, text):
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{voice}-{digest}.npz")
+
+    def get(self, voice, text):
+        """Returns (samples, frame rate) from memory or disk, or None if the phrase has not been synthesized yet."""
+        with self._lock:
+            if (voice, text) in self._samples:
+                return self._samples[(voice, text)]
+        try:
+            with np.load(self._path(voice, text)) as data:
+                if str(data["text"]) != text:
+                    return None
+                sample = (data["samples"], int(data["rate"]))
+        except (OSError, KeyError, ValueError):
+            return None
+        with self._lock:
+            self._samples[(voice, text)] = sample
+        return sample
+
+    async def fetch(self, voice, text):
+        """Returns the phrase's samples, synthesizing and storing them first if needed."""
+        sample = self.get(voice, text)
+        if sample is not None:
+            return sample
+        audio_bytes = await self.assistant.synthesize_speech_async(text, voice)
+        # Decoding is CPU work, so keep it off the event loop
+        sample = await asyncio.to_thread(self._store, voice, text, audio_bytes)
+        logger.info(f"Cached '{text}' in voice '{voice}' ({sample[0].nbytes} bytes of PCM).")
+        return sample
+
+    def _store(self, voice, text, audio_bytes):
+        samples, frame_rate = decode_mp3(audio_bytes, channels=1)
+        samples = samples.astype(np.int16)  # Also copies out of pydub's buffer
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.savez_compressed(self._path(voice, text), samples=samples, rate=frame_rate, text=text)
+        with self._lock:
+            self._samples[(voice, text)] = (samples, frame_rate)
+        return samples, frame_rate
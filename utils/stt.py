@@ -0,0 +1,112 @@
+# stt.py holds the speech-to-text backends the voice assistant can switch between
+
+import threading
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STT_BACKENDS = ["remote", "local"]
+TRANSCRIPTION_TIMEOUT = 30  # seconds
+LOCAL_SAMPLE_RATE = 16000
+
+
+class STTBackend:
+    name = ""
+    supports_partials = False
+
+    def transcribe(self, recording, fs, cancel_token=None):
+        """Returns the final transcript for a float32 capture."""
+        text = ""
+        for text, is_final in self.transcribe_stream(recording, fs, cancel_token):
+            pass
+        return text
+
+    def transcribe_stream(self, recording, fs, cancel_token=None):
+        """Yields (text so far, is_final). Backends without partials yield the final text once."""
+        raise NotImplementedError
+
+    def warm_up(self):
+        pass
+
+
+class RemoteWhisperBackend(STTBackend):
+    """Uploads the capture to the provider's transcription model (whisper-1 by default)."""
+    name = "remote"
+
+    def __init__(self, assistant):
+        self.assistant = assistant
+
+    def transcribe_stream(self, recording, fs, cancel_token=None):
+        audio_file = self.assistant.encode_recording(recording, fs)
+        transcription = self.assistant.runtime.run(
+            self.assistant.client.audio.transcriptions.create(
+                model=self.assistant.provider.model_for("transcription"),
+                file=audio_file
+            ),
+            timeout=TRANSCRIPTION_TIMEOUT,
+            cancel_token=cancel_token
+        )
+        yield transcription.text, True
+
+
+class LocalWhisperBackend(STTBackend):
+    """CPU-only Whisper through faster-whisper with int8 weights, loaded on first use and kept warm."""
+    name = "local"
+    supports_partials = True
+
+    def __init__(self, model_size="base.en", compute_type="int8", cpu_threads=0):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                # Optional dependency; only needed when the local backend is selected
+                from faster_whisper import WhisperModel
+                start = time.time()
+                self._model = WhisperModel(
+                    self.model_size,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads
+                )
+                logger.info(f"Loaded local STT model '{self.model_size}' in {time.time() - start:.2f} seconds")
+            return self._model
+
+    def warm_up(self):
+        # Loading the model and running one tiny decode moves the cold-start cost off the first command
+        try:
+            self.transcribe(np.zeros(LOCAL_SAMPLE_RATE, dtype=np.float32), LOCAL_SAMPLE_RATE)
+            logger.info("Local STT backend is warm.")
+        except Exception as e:
+            logger.error(f"Failed to warm up local STT backend: {e}")
+
+    def transcribe_stream(self, recording, fs, cancel_token=None):
+        model = self._load()
+        audio = np.asarray(recording, dtype=np.float32).reshape(-1)
+        if fs != LOCAL_SAMPLE_RATE:
+            positions = np.linspace(0, len(audio) - 1, int(len(audio) * LOCAL_SAMPLE_RATE / fs))
+            audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+        # Segments are decoded lazily as the generator is consumed, so each one is a usable partial
+        segments, _ = model.transcribe(audio, beam_size=1, vad_filter=True, condition_on_previous_text=False)
+        text = ""
+        for segment in segments:
+            if cancel_token is not None and cancel_token.cancelled:
+                return
+            text = f"{text} {segment.text.strip()}".strip()
+            yield text, False
+        yield text, True
+
+
+def create_stt_backend(name, assistant, local_model="base.en"):
+    if name == "local":
+        return LocalWhisperBackend(local_model)
+    if name != "remote":
+        logger.error(f"Unknown STT backend '{name}'. Using remote.")
+    return RemoteWhisperBackend(assistant)
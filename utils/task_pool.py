@@ -0,0 +1,177 @@
+# task_pool.py is a bounded, prioritized worker pool for the app's AI background tasks
+
+import itertools
+import logging
+import queue
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers run first
+PRIORITY_VOICE = 0
+PRIORITY_QUOTE = 10
+
+
+class CancellationToken:
+    """Shared flag a task checks between steps; callbacks run once when it is cancelled."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in cancellation callback: {e}")
+
+    def add_callback(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+
+class _Task:
+    def __init__(self, func, args, kwargs, token, group, priority):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.token = token
+        self.group = group
+        self.priority = priority
+
+
+class TaskPool:
+    def __init__(self, max_workers=2, max_queue=8):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._queue = queue.PriorityQueue(maxsize=max_queue)
+        self._order = itertools.count()  # Keeps FIFO order within a priority level
+        self._lock = threading.Lock()
+        self._groups = {}  # group name -> set of live tokens
+        self._running = set()
+        self._shutdown = False
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+        self._workers = []
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker, name=f"ai-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, func, *args, priority=PRIORITY_QUOTE, group=None, **kwargs):
+        """Queues func(*args, cancel_token=token, **kwargs) and returns its CancellationToken.
+
+        Raises queue.Full when the queue is at capacity so callers can tell the user instead of dropping silently.
+        """
+        token = CancellationToken()
+        task = _Task(func, args, kwargs, token, group, priority)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Task pool has been shut down")
+            try:
+                self._queue.put_nowait((priority, next(self._order), task))
+            except queue.Full:
+                self._stats["rejected"] += 1
+                logger.warning(f"Task queue full ({self.max_queue}). Rejecting {getattr(func, '__name__', func)}.")
+                raise
+            self._stats["submitted"] += 1
+            if group is not None:
+                self._groups.setdefault(group, set()).add(token)
+        return token
+
+    def cancel_group(self, group):
+        with self._lock:
+            tokens = list(self._groups.get(group, ()))
+        for token in tokens:
+            token.cancel()
+        if tokens:
+            logger.info(f"Cancelled {len(tokens)} task(s) in group '{group}'.")
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "alive_workers": sum(1 for w in self._workers if w.is_alive()),
+                "busy_workers": len(self._running),
+                "queue_depth": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                **self._stats,
+            }
+
+    def shutdown(self, timeout=2.0):
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            tokens = [token for group in self._groups.values() for token in group]
+            tokens.extend(task.token for task in self._running)
+        for token in tokens:
+            token.cancel()
+
+        # Drain anything still queued, then wake every worker with a sentinel that sorts last
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self._workers:
+            self._queue.put((sys.maxsize, next(self._order), None))
+        for worker in self._workers:
+            worker.join(timeout)
+        logger.info(f"Task pool shut down. Metrics: {self.metrics()}")
+
+    def _worker(self):
+        while True:
+            _, _, task = self._queue.get()
+            if task is None:
+                return
+            if task.token.cancelled:
+                self._finish(task, "cancelled")
+                continue
+
+            with self._lock:
+                self._running.add(task)
+            outcome = "completed"
+            try:
+                task.func(*task.args, cancel_token=task.token, **task.kwargs)
+                if task.token.cancelled:
+                    outcome = "cancelled"
+            except Exception as e:
+                outcome = "failed"
+                logger.error(f"Background task {getattr(task.func, '__name__', task.func)} failed: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._running.discard(task)
+                self._finish(task, outcome)
+
+    def _finish(self, task, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+            if task.group is not None:
+                group = self._groups.get(task.group)
+                if group is not None:
+                    group.discard(task.token)
+                    if not group:
+                        del self._groups[task.group]
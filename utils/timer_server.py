@@ -0,0 +1,263 @@
+# timer_server.py hosts many Pomodoro timers for a team on one asyncio loop, with one heap for every deadline
+
+import asyncio
+import heapq
+import json
+import re
+import secrets
+import threading
+import time
+import logging
+
+from utils.checkpoint import write_atomic
+from utils.control_api import EventHub, HTTPError
+from utils.session import PomodoroSession
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "timers.json"
+SAVE_INTERVAL = 5.0  # Seconds between snapshots while anything has changed
+SNAPSHOT_BATCH = 1000  # Timers copied per event-loop pass when snapshotting
+LENGTH_FIELDS = ("focus_length", "short_break", "long_break_length", "max_work_sessions", "max_break_sessions")
+MAX_LENGTH = 24 * 60 * 60
+TIMER_ID = r"[\w-]{1,64}"
+
+
+class TimerScheduler:
+    """Wakes timers at their deadlines from a single heap and a single task.
+
+    Rescheduling pushes a new entry and bumps the timer's generation, so stale entries are skipped
+    when they surface instead of being searched for and removed. The loop sleeps until the earliest
+    deadline and is woken early only when a new entry would become the earliest.
+    """
+
+    def __init__(self, on_due):
+        self.on_due = on_due  # on_due(timer_id, now), called once per due timer
+        self._heap = []
+        self._generations = {}
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self._generations)
+
+    def schedule(self, timer_id, deadline):
+        generation = self._generations.get(timer_id, 0) + 1
+        self._generations[timer_id] = generation
+        if not self._heap or deadline < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (deadline, generation, timer_id))
+
+    def cancel(self, timer_id):
+        self._generations.pop(timer_id, None)
+
+    async def run(self):
+        while True:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                _, generation, timer_id = heapq.heappop(self._heap)
+                if self._generations.get(timer_id) != generation:
+                    continue  # Rescheduled or cancelled since this entry was pushed
+                del self._generations[timer_id]
+                try:
+                    self.on_due(timer_id, now)
+                except Exception as e:
+                    logger.error(f"Error advancing timer {timer_id}: {e}")
+            # Sheds stale entries in bulk when they outnumber live ones, so the heap stays proportional to the timers
+            if len(self._heap) > 2 * len(self._generations) + 1024:
+                self._heap = [entry for entry in self._heap if self._generations.get(entry[2]) == entry[1]]
+                heapq.heapify(self._heap)
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+class TimerServer:
+    """Independent or shared Pomodoro timers behind the control API.
+
+    A team shares a timer by using the same id; everyone subscribed to it gets its transitions.
+    There are no per-second ticks: states carry ends_at, so clients count down on their own and the
+    server only does work when a period ends or someone sends a command. State is snapshotted to
+    state_file every few seconds while anything changed and reloaded on start, with the periods that
+    ended while the server was down applied on restore.
+    """
+
+    def __init__(self, state_file=STATE_FILE, save_interval=SAVE_INTERVAL):
+        self.state_file = state_file
+        self.save_interval = save_interval
+        self.timers = {}
+        self.hubs = {}  # timer id -> EventHub, only for timers someone is subscribed to
+        self.scheduler = TimerScheduler(self._due)
+        self.transitions = 0
+        self.lateness = 0.0  # Largest delay seen between a deadline and its transition, in seconds
+        self._dirty = False
+        self._write_lock = threading.Lock()
+
+    def routes(self):
+        timer = rf"/timers/(?P<timer_id>{TIMER_ID})"
+        routes = [
+            ("GET", "/stats", self.stats),
+            ("POST", "/timers", self.create),
+            ("GET", timer, self.get_state),
+            ("DELETE", timer, self.delete),
+            ("POST", timer + "/tasks", self.add_task),
+            ("GET", timer + "/events", self.events),
+        ]
+        for command in ("start", "pause", "resume", "skip", "reset"):
+            routes.append(("POST", f"{timer}/{command}", self._command(command)))
+        return routes
+
+    def _timer(self, request):
+        timer_id = request.params["timer_id"]
+        if timer_id not in self.timers:
+            raise HTTPError(404, f"No timer '{timer_id}'")
+        return timer_id, self.timers[timer_id]
+
+    async def stats(self, request):
+        return {
+            "timers": len(self.timers),
+            "running": len(self.scheduler),
+            "subscribers": sum(len(hub) for hub in self.hubs.values()),
+            "transitions": self.transitions,
+            "max_lateness_ms": round(self.lateness * 1000, 3),
+            "cpu_seconds": round(time.process_time(), 3),
+        }
+
+    async def create(self, request):
+        body = request.json()
+        lengths = {}
+        for field in LENGTH_FIELDS:
+            if field in body:
+                value = body[field]
+                if not isinstance(value, (int, float)) or not 0 < value <= MAX_LENGTH:
+                    raise HTTPError(400, f"{field} must be a positive number of seconds")
+                lengths[field] = value
+        timer_id = str(body.get("id") or secrets.token_urlsafe(8))
+        if not re.fullmatch(TIMER_ID, timer_id):
+            raise HTTPError(400, "Timer ids are up to 64 letters, digits, '_' or '-'")
+        if timer_id in self.timers:
+            raise HTTPError(409, f"Timer '{timer_id}' already exists")
+        session = self.timers[timer_id] = PomodoroSession(**lengths)
+        self._dirty = True
+        if body.get("start"):
+            return self.apply(timer_id, session.start())
+        return {"id": timer_id, "state": session.state()}
+
+    async def get_state(self, request):
+        timer_id, session = self._timer(request)
+        return {"id": timer_id, "state": session.state()}
+
+    async def delete(self, request):
+        timer_id, _ = self._timer(request)
+        del self.timers[timer_id]
+        self.scheduler.cancel(timer_id)
+        hub = self.hubs.pop(timer_id, None)
+        if hub is not None:
+            hub.publish("deleted", {"id": timer_id})
+            hub.close()
+        self._dirty = True
+        return {"id": timer_id, "deleted": True}
+
+    def _command(self, name):
+        async def handler(request):
+            timer_id, session = self._timer(request)
+            return self.apply(timer_id, getattr(session, name)())
+        return handler
+
+    async def add_task(self, request):
+        timer_id, session = self._timer(request)
+        try:
+            return self.apply(timer_id, session.add_task(str(request.json().get("text", ""))))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    async def events(self, request):
+        timer_id, session = self._timer(request)
+        hub = self.hubs.get(timer_id)
+        if hub is None:
+            hub = self.hubs[timer_id] = EventHub()
+        subscription = hub.subscribe()
+        subscription.send("state", {"id": timer_id, "state": session.state()})
+        return subscription
+
+    def apply(self, timer_id, events, now=None):
+        """Publishes a timer's events and keeps its heap entry in step with its deadline."""
+        session = self.timers[timer_id]
+        if session.running:
+            self.scheduler.schedule(timer_id, session.deadline)
+        else:
+            self.scheduler.cancel(timer_id)
+        state = session.state(now)
+        if events:
+            self._dirty = True
+            hub = self.hubs.get(timer_id)
+            if hub is not None:
+                if not len(hub):
+                    del self.hubs[timer_id]  # Everyone left
+                else:
+                    wall = time.time()
+                    for event in events:
+                        hub.publish(event["type"], {**event, "id": timer_id, "state": state, "t": wall})
+        return {"id": timer_id, "events": events, "state": state}
+
+    def _due(self, timer_id, now):
+        session = self.timers.get(timer_id)
+        if session is None:
+            return
+        self.lateness = max(self.lateness, now - session.deadline)
+        events = session.advance(now)
+        self.transitions += len(events)
+        self.apply(timer_id, events, now)
+
+    def load(self):
+        try:
+            with open(self.state_file, "r") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read timer state, starting empty: {e}")
+            return
+        now = time.monotonic()
+        caught_up = 0
+        for timer_id, data in snapshot.get("timers", {}).items():
+            session = PomodoroSession.from_dict(data, now)
+            self.timers[timer_id] = session
+            caught_up += len(session.advance(now))  # Periods that ended while the server was down
+            if session.running:
+                self.scheduler.schedule(timer_id, session.deadline)
+        logger.info(f"Restored {len(self.timers)} timers; applied {caught_up} missed transitions.")
+
+    async def snapshot(self):
+        """Copies every timer's state, yielding to the loop between batches so deadlines are not held up."""
+        self._dirty = False
+        timers = {}
+        items = list(self.timers.items())
+        for start in range(0, len(items), SNAPSHOT_BATCH):
+            now, wall = time.monotonic(), time.time()
+            for timer_id, session in items[start:start + SNAPSHOT_BATCH]:
+                timers[timer_id] = session.to_dict(now, wall)
+            await asyncio.sleep(0)
+        return {"saved_at": time.time(), "timers": timers}
+
+    def write(self, snapshot):
+        # A background write can still be running when shutdown writes the final snapshot
+        with self._write_lock:
+            write_atomic(self.state_file, json.dumps(snapshot, separators=(',', ':')), fsync=True)
+
+    async def run(self):
+        self.load()
+        scheduler = asyncio.create_task(self.scheduler.run())
+        try:
+            while True:
+                await asyncio.sleep(self.save_interval)
+                if self._dirty:
+                    # The snapshot is taken on the loop; encoding and the fsync happen off it
+                    snapshot = await self.snapshot()
+                    await asyncio.to_thread(self.write, snapshot)
+        finally:
+            scheduler.cancel()
+            await asyncio.gather(scheduler, return_exceptions=True)
+            self.write(await self.snapshot())
@@ -0,0 +1,162 @@
+# tts_scheduler.py splits long messages into sentence chunks, synthesizes them concurrently and plays them gaplessly
+
+import asyncio
+import re
+import threading
+import logging
+from concurrent.futures import CancelledError
+
+import numpy as np
+
+from utils.playback import PCMQueueSource, decode_mp3, resample_pcm
+
+logger = logging.getLogger(__name__)
+
+FIRST_CHUNK_CHARS = 120  # Short first chunk so playback can start early
+MAX_CHUNK_CHARS = 200
+MAX_CONCURRENCY = 3  # Parallel tts-1 requests per message
+CROSSFADE_MS = 25
+CHUNK_TIMEOUT = 60  # seconds per chunk
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+")
+_PROSODY_BREAK = re.compile(r"(?<=[,;:—–])\s+")
+
+
+def split_for_speech(text, first_max=FIRST_CHUNK_CHARS, max_chars=MAX_CHUNK_CHARS):
+    """Splits text at sentence ends, falling back to clause breaks for long sentences, and packs the pieces into chunks."""
+    pieces = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+        else:
+            pieces.extend(p.strip() for p in _PROSODY_BREAK.split(sentence) if p.strip())
+
+    chunks = []
+    for piece in pieces:
+        limit = first_max if len(chunks) <= 1 else max_chars
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= limit:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+class Crossfader:
+    """Joins consecutive chunks by overlapping the tail of one with the head of the next."""
+
+    def __init__(self, source, fade_frames):
+        self.source = source
+        self.fade_frames = fade_frames
+        self._tail = None
+
+    def push(self, samples):
+        if self._tail is not None:
+            fade = min(self.fade_frames, len(samples) // 2, len(self._tail))
+            if fade:
+                # Only the overlap is mixed into a new array; the rest of each chunk is pushed as a view
+                ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)[:, None]
+                head = samples[:fade] * ramp + self._tail[len(self._tail) - fade:] * (1.0 - ramp)
+                self.source.push(self._tail[:len(self._tail) - fade])
+                self.source.push(head.astype(samples.dtype))
+                samples = samples[fade:]
+            else:
+                self.source.push(self._tail)
+        # Hold back the end of this chunk until we know whether another one follows
+        hold = min(self.fade_frames, len(samples) // 2)
+        self.source.push(samples[:len(samples) - hold])
+        self._tail = samples[len(samples) - hold:]
+
+    def finish(self):
+        if self._tail is not None:
+            self.source.push(self._tail)
+            self._tail = None
+        self.source.close()
+
+
+class SpeechScheduler:
+    """Speaks a message chunk by chunk: requests run concurrently with bounded fan-out and play back in order."""
+
+    def __init__(self, assistant, max_concurrency=MAX_CONCURRENCY, crossfade_ms=CROSSFADE_MS):
+        self.assistant = assistant
+        self.max_concurrency = max_concurrency
+        self.crossfade_ms = crossfade_ms
+
+    async def _synthesize(self, semaphore, text, voice):
+        async with semaphore:
+            return await self.assistant.synthesize_speech_async(text, voice)
+
+    def speak(self, text, voice, cancel_token=None, play=None, on_first_audio=None):
+        """Plays text and returns True if the user barged in. play(source) defaults to the assistant's output."""
+        play = play or self.assistant.play_source
+        chunks = split_for_speech(text)
+        if not chunks:
+            return False
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        runtime = self.assistant.runtime
+        # Every request is queued up front; the semaphore keeps at most max_concurrency in flight
+        futures = [
+            runtime.submit(self._synthesize(semaphore, chunk, voice), timeout=CHUNK_TIMEOUT, cancel_token=cancel_token)
+            for chunk in chunks
+        ]
+        logger.info(f"Speaking {len(chunks)} chunks with up to {self.max_concurrency} concurrent requests.")
+
+        player = None
+        source = None
+        crossfader = None
+        result = {}
+        stopped = threading.Event()
+
+        def play_until_stopped():
+            # The source is only closed after the last chunk, so play() returning early means playback was cut off
+            try:
+                result["barged_in"] = play(source)
+            finally:
+                stopped.set()
+                for future in futures:
+                    future.cancel()  # Also wakes the loop below if it is waiting on a chunk
+
+        try:
+            for future in futures:
+                if stopped.is_set():
+                    break  # Barge-in or stop_audio_playback: the remaining chunks would never be heard
+                try:
+                    audio_bytes = future.result()
+                except CancelledError:
+                    if stopped.is_set():
+                        break
+                    raise
+                samples, frame_rate = decode_mp3(audio_bytes, channels=source.channels if source else None)
+                if source is None:
+                    # The first chunk fixes the stream format; later chunks are converted to match
+                    source = PCMQueueSource(
+                        samples.shape[1],
+                        frame_rate,
+                        output_rate=self.assistant.output_rate_for(frame_rate),
+                        gain=self.assistant.volume
+                    )
+                    crossfader = Crossfader(source, int(frame_rate * self.crossfade_ms / 1000))
+                else:
+                    samples = resample_pcm(samples, frame_rate, source.frame_rate)
+                crossfader.push(samples)
+                if player is None:
+                    if on_first_audio is not None:
+                        on_first_audio()
+                    player = threading.Thread(
+                        target=play_until_stopped,
+                        name="speech-playback",
+                        daemon=True
+                    )
+                    player.start()
+                if cancel_token is not None and cancel_token.cancelled:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+            if crossfader is not None:
+                crossfader.finish()
+            if player is not None:
+                player.join()
+        return result.get("barged_in", False)
@@ -2,26 +2,42 @@ import os
 import threading
 import sounddevice as sd
 import soundfile as sf
-from openai import OpenAI
 import numpy as np
 import webrtcvad
 import logging
-from utils.settings import APIKeyManager
-import mss
-from PIL import Image
-import base64
 import io
 import tempfile
 from datetime import datetime
 import time
+from concurrent.futures import CancelledError, Future
 from utils.database import ConversationDatabase
-from pydub import AudioSegment
+from utils.task_pool import PRIORITY_VOICE
+from utils.barge_in import BargeInDetector, EchoReference
+from utils.stt import create_stt_backend
+from utils.tts_scheduler import SpeechScheduler
+from utils.playback import PCMQueueSource, decode_mp3
+from utils.voice_previews import VOICES
+from utils.screen_index import parse_time_question
+from utils.screen_capture import ScreenCapture, parse_region
+from utils.speculation import SpeculationStats, SpeculativeResponder
+from utils.intents import REPLIES, IntentRecognizer, ReplyAudio
+from utils.speech_cache import SpeechCache
 from pydub.utils import make_chunks
 import queue
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Request timeouts in seconds
+RESPONSE_TIMEOUT = 60
+SPEECH_TIMEOUT = 60
+COMMAND_TIMEOUT = 5  # For the Tk thread to apply a voice command
+
+MAX_REPLY_TOKENS = 150
+
+# Whisper works at 16 kHz, so capturing at 44.1 kHz only inflates the upload
+RECORDING_RATE = 16000
+
 def timer(func):
     def wrapper(*args, **kwargs):
         start_time = time.time()
@@ -33,18 +49,81 @@ def timer(func):
     return wrapper
 
 class VoiceAssistant:
-    def __init__(self, app):
+    def __init__(self, app, history=None):
         self.app = app
         self.audiofiles_dir = os.path.join(os.path.dirname(__file__), '..', 'audiofiles')
-        self.client = OpenAI(api_key=APIKeyManager().get_api_key())
-        self.db = ConversationDatabase()
+        settings = app.settings_manager
+        self.db = ConversationDatabase(
+            max_age_days=settings.get_setting("HISTORY_RETENTION_DAYS", 30),
+            max_messages=settings.get_setting("HISTORY_MAX_MESSAGES", 5000),
+            max_bytes=int(settings.get_setting("HISTORY_MAX_MB", 2) * 1024 * 1024)
+        )
+        self.db.start_compaction()
         self.max_history_length = 10
-        self.load_conversation_history()
+        self.load_conversation_history(history)
         self.stream_active = False
         self.volume = 1.0
-
-    def load_conversation_history(self):
-        history = self.db.get_conversation_history(self.max_history_length)
+        self.input_device = None
+        self.output_device = None
+        self._active_stream = None
+        self._active_source = None
+        self._active_voice = None
+        self.muted = False
+        self._output_rates = {}  # (device, rate) -> rate the device will actually open
+        self.barge_in_preroll = None  # (samples, sample rate) heard just before a barge-in
+        self._stt_backend = None
+        self._stt_key = None
+        self._stt_lock = threading.Lock()
+        self.speech_scheduler = SpeechScheduler(self)
+        self.screen_capture = ScreenCapture()
+        self.speculation_stats = SpeculationStats()
+        self.intents = IntentRecognizer()
+        self.speech_cache = SpeechCache(self)
+        self.reply_audio = ReplyAudio(self)
+        self.ensure_stt_backend()
+
+    @property
+    def provider(self):
+        # The app owns the provider so an API key, endpoint or model change reaches the assistant too
+        return self.app.provider
+
+    @property
+    def client(self):
+        provider = self.app.provider
+        return provider.client if provider is not None else None
+
+    @property
+    def runtime(self):
+        return self.app.ai_runtime
+
+    @property
+    def stt_backend(self):
+        return self._stt_backend
+
+    def ensure_stt_backend(self):
+        """Builds the backend the settings select if it isn't the current one, and starts warming a local model.
+
+        Rebuilt only when the selection changes, so a local model stays loaded between commands. The lock
+        keeps a settings change and a voice command from building two backends at once.
+        """
+        with self._stt_lock:
+            key = (
+                self.app.settings_manager.get_setting("STT_BACKEND", "remote"),
+                self.app.settings_manager.get_setting("LOCAL_STT_MODEL", "base.en")
+            )
+            if key != self._stt_key:
+                self._stt_backend = create_stt_backend(key[0], self, local_model=key[1])
+                self._stt_key = key
+                logging.info(f"Speech-to-text backend: {self._stt_backend.name}")
+                if self._stt_backend.name == "local":
+                    # Load the local model in the background so the first command after a switch doesn't pay for it
+                    threading.Thread(target=self._stt_backend.warm_up, name="stt-warm-up", daemon=True).start()
+            return self._stt_backend
+
+    def load_conversation_history(self, history=None):
+        # history is the tail restored from a session checkpoint, oldest first; otherwise it comes from the database
+        if history is None:
+            history = [(role, content) for role, content in reversed(self.db.get_conversation_history(self.max_history_length))]
         self.conversation_history = [
             {"role": "system", "content": (
                 "As a voice-activated personal productivity coach AI within a Pomodoro app, your primary role is to enhance the user's productivity and time management skills with extremely brief, spoken responses. "
@@ -60,7 +139,7 @@ class VoiceAssistant:
                 "Remember, your entire response must fit within one sentence, focusing on the most important aspect of productivity or task completion."
             )}
         ]
-        for role, content in reversed(history):
+        for role, content in history[-self.max_history_length:]:
             self.conversation_history.append({"role": role, "content": content})
 
         if not os.path.exists(self.audiofiles_dir):
@@ -68,118 +147,191 @@ class VoiceAssistant:
 
     @timer
     def capture_screenshot(self):
+        """Returns image_url payloads for the screens selected in settings, or None on failure."""
+        settings = self.app.settings_manager
         try:
-            with mss.mss() as sct:
-                # Get all monitors
-                monitors = sct.monitors
-
-                # Find the primary monitor (usually the one with left and top coordinates as 0)
-                primary_monitor = next((m for m in monitors if m["left"] == 0 and m["top"] == 0), monitors[1])
-
-                screenshot = sct.grab(primary_monitor)
-                img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-                
-                # Calculate new dimensions while maintaining aspect ratio
-                max_width = 3840  # 4K resolution width
-                max_height = 2160  # 4K resolution height
-                
-                if img.width > max_width or img.height > max_height:
-                    aspect_ratio = img.width / img.height
-                    if img.width > img.height:
-                        new_width = max_width
-                        new_height = int(new_width / aspect_ratio)
-                    else:
-                        new_height = max_height
-                        new_width = int(new_height * aspect_ratio)
-                    
-                    # Resize image
-                    img = img.resize((new_width, new_height), Image.LANCZOS)
-                
-                # Convert to base64
-                buffered = io.BytesIO()
-                img.save(buffered, format="PNG", compress_level=1)  # Use minimum compression
-                screenshot_base64 = base64.b64encode(buffered.getvalue()).decode()
-                
-                logging.info(f"Screenshot captured. Size: {len(screenshot_base64)} bytes, Dimensions: {img.size}")
-                return screenshot_base64
+            images = self.screen_capture.capture(
+                mode=settings.get_setting("SCREEN_CAPTURE_MODE", "primary"),
+                region=parse_region(settings.get_setting("SCREEN_CAPTURE_REGION", "")),
+                layout=settings.get_setting("SCREEN_CAPTURE_LAYOUT", "tiled")
+            )
+            logging.info(f"Screenshot captured. {len(images)} image(s), {sum(len(image['url']) for image in images)} bytes")
+            return images
         except Exception as e:
             logging.error(f"Error capturing screenshot: {e}")
             return None
 
     @timer
-    def record_audio_vad(self, filename="output.wav", fs=44100, duration=5):
-        filename = os.path.join(self.audiofiles_dir, filename)
+    def record_audio_vad(self, fs=RECORDING_RATE, duration=5):
+        """Records from the mic and returns the capture as a float32 array, or None on failure."""
         logging.info("Starting recording...")
         
         try:
             recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, device=self.input_device)
             sd.wait()
-            
-            sf.write(filename, recording, fs)
-            logging.info(f"Recording finished and saved to {filename}")
-            return True
+
+            # Keep the words the user spoke over the assistant's last reply
+            preroll = self.take_barge_in_preroll(fs)
+            if preroll is not None:
+                recording = np.concatenate([preroll.reshape(-1, 1), recording])
+
+            logging.info(f"Recording finished: {len(recording) / fs:.1f} seconds")
+            return recording
         except Exception as e:
             logging.error(f"Error during recording: {e}")
-            return False
+            return None
+
+    def encode_recording(self, recording, fs=RECORDING_RATE):
+        """Encodes a capture to FLAC in memory and returns the (filename, bytes) pair the transcription API accepts."""
+        buffer = io.BytesIO()
+        sf.write(buffer, recording, fs, format="FLAC", subtype="PCM_16")
+        audio_bytes = buffer.getvalue()
+        logging.info(f"Encoded recording to FLAC: {len(audio_bytes)} bytes")
+
+        if self.app.settings_manager.get_setting("SAVE_RECORDINGS", False):
+            # Disk copies are for debugging only; each gets a unique name so concurrent captures can't clobber each other
+            filename = os.path.join(self.audiofiles_dir, f"recording_{datetime.now():%Y%m%d_%H%M%S_%f}.flac")
+            with open(filename, "wb") as f:
+                f.write(audio_bytes)
+            logging.info(f"Recording saved to {filename}")
+        return ("speech.flac", audio_bytes)
+
+    def take_barge_in_preroll(self, fs):
+        if self.barge_in_preroll is None:
+            return None
+        samples, rate = self.barge_in_preroll
+        self.barge_in_preroll = None
+        if rate != fs and len(samples):
+            positions = np.linspace(0, len(samples) - 1, int(len(samples) * fs / rate))
+            samples = np.interp(positions, np.arange(len(samples)), samples)
+        return samples.astype(np.float32)
 
     @timer
-    def transcribe_audio(self, filename="output.wav"):
-        filename = os.path.join(self.audiofiles_dir, filename)
+    def transcribe_audio(self, recording, fs=RECORDING_RATE, cancel_token=None, on_partial=None):
+        """Returns the final transcript; on_partial(text) sees each partial if the backend streams them."""
         try:
-            with open(filename, "rb") as audio_file:
-                transcription = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file
-                )
-            logging.info(f"Transcription result: {transcription.text}")
-            return transcription.text
+            backend = self.stt_backend
+            if on_partial is None or not backend.supports_partials:
+                text = backend.transcribe(recording, fs, cancel_token=cancel_token)
+            else:
+                text = ""
+                for text, is_final in backend.transcribe_stream(recording, fs, cancel_token):
+                    if not is_final:
+                        on_partial(text)
+            logging.info(f"Transcription result ({backend.name}): {text}")
+            return text
         except Exception as e:
             logging.error(f"Error during transcription: {e}")
             return ""
 
+    def answer_from_screen_history(self, text):
+        """Answers "what was I working on at 3pm?" from the local screen history, or returns None."""
+        tracker = getattr(self.app, "screen_tracker", None)
+        if tracker is None:
+            return None
+        when = parse_time_question(text)
+        if when is None:
+            return None
+        answer = tracker.index.describe(when) or "I don't have any screen history for that time."
+        self.db.add_message("user", text)
+        self.conversation_history.append({"role": "user", "content": text})
+        self.remember_reply(answer)
+        return answer
+
+    def match_command(self, text):
+        """(intent, argument) if text is a timer command to handle locally, else None."""
+        if not self.app.settings_manager.get_setting("VOICE_COMMANDS", True):
+            return None
+        return self.intents.match(text)
+
     @timer
-    def generate_response(self, text, screenshot_base64=None):
-        try:
-            # Start with the system message
-            messages = [self.conversation_history[0]]  # System message
-            
-            # Add context about conversation history
-            if len(self.conversation_history) > 1:
-                context_message = {
-                    "role": "system",
-                    "content": "The following messages are from the previous conversation. Use them as context for your response:"
-                }
-                messages.append(context_message)
-                
-                # Add the most recent messages from the conversation history
-                messages.extend(self.conversation_history[1:self.max_history_length])
-            
-            # Add a separator to indicate the start of the new interaction
-            messages.append({
+    def run_command(self, intent, cancel_token=None):
+        """Applies a recognized command on the Tk thread and speaks its cached reply."""
+        name, argument = intent
+        applied = Future()
+
+        def apply():
+            try:
+                applied.set_result(self.app.apply_intent(name, argument))
+            except Exception as e:
+                applied.set_exception(e)
+
+        self.app.master.after(0, apply)
+        key = applied.result(timeout=COMMAND_TIMEOUT)
+        logging.info(f"Handled voice command locally: {name} ({argument}) -> {key}")
+        self.app.update_user_feedback(REPLIES[key])
+        self.reply_audio.speak(self.app.settings_manager.get_setting("AI_VOICE", "onyx"), key, cancel_token=cancel_token)
+
+    def build_messages(self, text, screenshots=None):
+        # Start with the system message
+        messages = [self.conversation_history[0]]  # System message
+        
+        # Add context about conversation history
+        if len(self.conversation_history) > 1:
+            context_message = {
                 "role": "system",
-                "content": "The following is the latest message from the user. Respond to this message while considering the context above:"
-            })
+                "content": "The following messages are from the previous conversation. Use them as context for your response:"
+            }
+            messages.append(context_message)
             
-            # Add the new user message
-            user_message = {"role": "user", "content": text}
+            # Add the most recent messages from the conversation history
+            messages.extend(self.conversation_history[1:self.max_history_length])
+        
+        # Add a separator to indicate the start of the new interaction
+        messages.append({
+            "role": "system",
+            "content": "The following is the latest message from the user. Respond to this message while considering the context above:"
+        })
+        
+        # Add the new user message
+        messages.append({"role": "user", "content": text})
+
+        # Include screenshots in the current request if available
+        if screenshots:
+            current_message = messages[-1].copy()
+            current_message["content"] = [{"type": "text", "text": text}] + [
+                {"type": "image_url", "image_url": image} for image in screenshots
+            ]
+            messages[-1] = current_message
+            logging.info(f"{len(screenshots)} screenshot(s) included in the current request")
+        return messages
+
+    def request_reply(self, use_case, messages):
+        # The system prompt asks for one sentence, so cap the reply to keep generation short
+        return self.provider.complete(use_case, messages, max_tokens=MAX_REPLY_TOKENS)
+
+    def remember_reply(self, reply):
+        self.db.add_message("assistant", reply)
+        self.conversation_history.append({"role": "assistant", "content": reply})
+        
+        # Trim the in-memory conversation history if it exceeds the max length
+        if len(self.conversation_history) > self.max_history_length + 1:  # +1 for the system message
+            self.conversation_history = self.conversation_history[:1] + self.conversation_history[-(self.max_history_length):]
+        # The session checkpoint carries this tail, so save it now rather than at the next periodic checkpoint
+        if hasattr(self.app, "request_checkpoint"):
+            self.app.master.after(0, self.app.request_checkpoint)
+
+    def create_speculator(self, cancel_token):
+        """A SpeculativeResponder for this turn, or None when speculation can't help or can't be right."""
+        settings = self.app.settings_manager
+        if self.client is None:
+            return None
+        if not settings.get_setting("SPECULATIVE_REPLIES", True) or not self.stt_backend.supports_partials:
+            return None  # The remote backend returns the whole transcript at once
+        if settings.get_setting("AI_SCREEN_VISION", False):
+            return None  # The reply depends on a screenshot taken after the final transcript
+        return SpeculativeResponder(self, cancel_token=cancel_token, skip=self.answered_locally)
+
+    def answered_locally(self, text):
+        if self.match_command(text) is not None:
+            return True
+        return getattr(self.app, "screen_tracker", None) is not None and parse_time_question(text) is not None
+
+    @timer
+    def generate_response(self, text, screenshots=None, cancel_token=None):
+        try:
+            messages = self.build_messages(text, screenshots)
             self.db.add_message("user", text)
-            messages.append(user_message)
-
-            # Include screenshot in the current request if available
-            if screenshot_base64:
-                current_message = messages[-1].copy()
-                current_message["content"] = [
-                    {"type": "text", "text": text},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64,{screenshot_base64}",
-                            "detail": "auto"
-                        }
-                    }
-                ]
-                messages[-1] = current_message
-                logging.info("Screenshot included in the current request")
 
             # Log the messages being sent to the AI
             print("\n" + "="*50)
@@ -198,21 +350,15 @@ class VoiceAssistant:
                     print(f"   Content: {content[:100]}...")
                 print("-" * 30)
 
-            logging.info(f"Sending request to OpenAI with {len(messages)} messages")
+            use_case = "vision" if screenshots else "dialogue"
+            logging.info(f"Sending request to {self.provider.model_for(use_case)} with {len(messages)} messages")
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                max_tokens=2000
+            generated_response = self.runtime.run(
+                self.request_reply(use_case, messages),
+                timeout=RESPONSE_TIMEOUT,
+                cancel_token=cancel_token
             )
-            
-            generated_response = response.choices[0].message.content
-            self.db.add_message("assistant", generated_response)
-            self.conversation_history.append({"role": "assistant", "content": generated_response})
-            
-            # Trim the in-memory conversation history if it exceeds the max length
-            if len(self.conversation_history) > self.max_history_length + 1:  # +1 for the system message
-                self.conversation_history = self.conversation_history[:1] + self.conversation_history[-(self.max_history_length):]
+            self.remember_reply(generated_response)
             
             logging.info("Response generated successfully")
             
@@ -235,118 +381,273 @@ class VoiceAssistant:
         ]
 
     @timer
-    def text_to_speech(self, text):
+    def text_to_speech(self, text, cancel_token=None):
         if not text:
             logging.warning("Empty text provided for text-to-speech conversion. Skipping.")
             return
 
         user_voice = self.app.settings_manager.get_setting("AI_VOICE", "onyx")
-        valid_voices = {"alloy", "echo", "fable", "onyx", "nova", "shimmer"}
-
-        if user_voice not in valid_voices:
+        if user_voice not in VOICES:
             logging.error(f"Invalid voice setting '{user_voice}'. Using default 'onyx'.")
             user_voice = "onyx"
 
+        if cancel_token is not None and cancel_token.cancelled:
+            logging.info("Text-to-speech cancelled before synthesis.")
+            return
+
         try:
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice=user_voice,
-                input=text,
-                response_format="mp3"
-            )
-            logging.info("Text to speech conversion successful")
-            self.play_audio_from_stream(response)
+            # Long messages are split into sentences that download in parallel and start playing with the first one
+            self.speech_scheduler.speak(text, user_voice, cancel_token=cancel_token)
+        except CancelledError:
+            logging.info("Text-to-speech cancelled.")
         except Exception as e:
             logging.error(f"Error in text-to-speech conversion: {e}")
 
-    @timer
-    def play_audio_from_stream(self, response):
+    def synthesize_speech(self, text, voice, cancel_token=None):
+        """Downloads the mp3 for text on the shared event loop and returns its bytes."""
+        return self.runtime.run(self.synthesize_speech_async(text, voice), timeout=SPEECH_TIMEOUT, cancel_token=cancel_token)
+
+    async def synthesize_speech_async(self, text, voice):
         CHUNK_SIZE = 4096  # 4 KB chunks
+        buffer = io.BytesIO()
+        async with self.client.audio.speech.with_streaming_response.create(
+            model=self.provider.model_for("speech"),
+            voice=voice,
+            input=text,
+            response_format="mp3"
+        ) as response:
+            async for chunk in response.iter_bytes(chunk_size=CHUNK_SIZE):
+                buffer.write(chunk)
+        logging.info(f"Download complete. Total bytes: {buffer.tell()}")
+        return buffer.getvalue()
 
-        def download_thread():
-            try:
-                buffer = io.BytesIO()
-                total_bytes = 0
-                for chunk in response.iter_bytes(chunk_size=CHUNK_SIZE):
-                    buffer.write(chunk)
-                    total_bytes += len(chunk)
-                
-                buffer.seek(0)
-                audio = AudioSegment.from_mp3(buffer)
-                logging.info(f"Download complete. Total bytes: {total_bytes}")
-                return audio
-            except Exception as e:
-                logging.error(f"Error in download thread: {e}")
-                return None
+    @timer
+    def play_audio_bytes(self, audio_bytes, cancel_token=None):
+        if not audio_bytes:
+            logging.error("Failed to download audio stream")
+            return
+        if cancel_token is not None and cancel_token.cancelled:
+            return
 
-        def playback_thread(audio):
+        try:
+            samples, frame_rate = decode_mp3(audio_bytes)
+        except Exception as e:
+            logging.error(f"Error decoding audio: {e}")
+            return
+        # The decoded PCM is played straight from pydub's buffer; gain is applied in the stream callback
+        source = PCMQueueSource(samples.shape[1], frame_rate, output_rate=self.output_rate_for(frame_rate))
+        source.push(samples)
+        source.close()
+        return self.play_source(source, cancel_token=cancel_token)
+
+    def uses_mixer(self):
+        # Only when the output device could not be opened for the mixer does speech get a stream of its own
+        return self.app.mixer is not None
+
+    def output_rate_for(self, frame_rate):
+        """Returns the rate a source should produce: the mixer's, frame_rate if the device accepts it, or the device default."""
+        if self.uses_mixer():
+            return self.app.mixer.rate
+        key = (self.output_device, frame_rate)
+        if key not in self._output_rates:
             try:
-                if audio is None:
-                    return
-
-                logging.info("Playback started")
-                samples = np.array(audio.get_array_of_samples())
-                samples = (samples * self.volume).astype(np.int16)
-                
-                sd.play(samples, audio.frame_rate)
-                sd.wait()
-                
-                logging.info(f"Audio playback completed. Total samples: {len(samples)}")
-            except Exception as e:
-                logging.error(f"Error in playback thread: {e}")
+                sd.check_output_settings(device=self.output_device, samplerate=frame_rate)
+                self._output_rates[key] = frame_rate
+            except Exception:
+                device_rate = int(sd.query_devices(self.output_device, 'output')['default_samplerate'])
+                logging.info(f"Output device does not support {frame_rate} Hz. Resampling to {device_rate} Hz.")
+                self._output_rates[key] = device_rate
+        return self._output_rates[key]
+
+    def play_source(self, source, cancel_token=None):
+        """Plays a PCMQueueSource on the mixer's speech channel until it runs dry. Returns True on barge-in.
+
+        With BARGE_IN on, the microphone is watched while it plays and playback stops as soon as the user talks over it.
+        """
+        # Stop playback if the owning task is cancelled mid-sentence
+        if cancel_token is not None:
+            cancel_token.add_callback(self.stop_audio_playback)
+        barged_in = False
+        source.gain = 0.0 if self.muted else self.volume
+        self._active_source = source  # set_volume and set_muted adjust it while it plays
+        try:
+            logging.info("Playback started")
+            if not self.uses_mixer() or source.output_rate != self.app.mixer.rate:
+                self.play_without_mixer(source)
+            elif self.app.settings_manager.get_setting("BARGE_IN", True):
+                barged_in = self.play_with_barge_in(source)
+            else:
+                self.play_through_mixer(source)
+            logging.info(f"Audio playback completed. Barge-in: {barged_in}")
+        except Exception as e:
+            logging.error(f"Error in playback: {e}")
+        finally:
+            self._active_source = None
+            if cancel_token is not None:
+                cancel_token.remove_callback(self.stop_audio_playback)
+
+        if barged_in:
+            logging.info("User started speaking over the assistant. Listening for the new request.")
+            self.app.master.after(0, self.app.handle_talk_to_ai)
+        return barged_in
+
+    def play_through_mixer(self, source):
+        voice = self.app.mixer.play("speech", source)
+        self._active_voice = voice
+        try:
+            voice.wait()
+        finally:
+            self._active_voice = None
+
+    def play_without_mixer(self, source):
+        finished = threading.Event()
+
+        def callback(outdata, frames, time_info, status):
+            source.fill(outdata)
+            if source.done:
+                raise sd.CallbackStop
+
+        stream = sd.OutputStream(
+            samplerate=source.output_rate,
+            channels=source.channels,
+            dtype='float32',
+            device=self.output_device,
+            callback=callback,
+            finished_callback=finished.set
+        )
+        self._run_stream(stream, finished)
+
+    def play_with_barge_in(self, source):
+        """Plays on the mixer while an input stream listens for the user, with the mixed speech as the echo reference."""
+        mixer = self.app.mixer
+        detector = BargeInDetector(mixer.rate)
+        reference = EchoReference(mixer.rate)
+        voice = None
+
+        def callback(indata, frames, time_info, status):
+            # One 20 ms block per callback keeps the stop latency well under 100 ms
+            if detector.process(indata[:, 0], reference.read(frames)) and voice is not None:
+                mixer.cancel(voice)
+                raise sd.CallbackStop
 
-        # Download the entire audio stream
-        audio = download_thread()
+        try:
+            stream = sd.InputStream(
+                samplerate=mixer.rate,
+                blocksize=detector.frame_len,
+                channels=1,
+                dtype='float32',
+                latency='low',
+                device=self.input_device,
+                callback=callback
+            )
+        except Exception as e:
+            logging.warning(f"Could not open the microphone for barge-in, playing without it: {e}")
+            self.play_through_mixer(source)
+            return False
 
-        # Play the audio only after it's fully downloaded
-        if audio:
-            playback_thread(audio)
-        else:
-            logging.error("Failed to download audio stream")
+        mixer.add_speech_tap(reference.write)
+        try:
+            with stream:
+                voice = mixer.play("speech", source)
+                self._active_voice = voice
+                voice.wait()
+        finally:
+            self._active_voice = None
+            mixer.remove_speech_tap(reference.write)
+
+        if detector.triggered:
+            self.barge_in_preroll = (detector.preroll(), mixer.rate)
+        return detector.triggered
+
+    def _run_stream(self, stream, finished):
+        self._active_stream = stream
+        try:
+            with stream:
+                finished.wait()
+        finally:
+            self._active_stream = None
 
     def stop_audio_playback(self):
         self.stream_active = False
         sd.stop()
+        stream = self._active_stream
+        if stream is not None:
+            stream.abort()
+        voice = self._active_voice
+        if voice is not None:
+            self.app.mixer.cancel(voice)
         logging.info("Audio playback stopped.")
 
     def set_volume(self, volume):
         self.volume = max(0.0, min(1.0, volume))
+        source = self._active_source
+        if source is not None and not self.muted:
+            source.gain = self.volume  # Takes effect on the next callback block
         logging.info(f"Volume set to {self.volume}")
 
+    def set_muted(self, muted):
+        """Muting silences speech through its gain instead of skipping it."""
+        self.muted = muted
+        source = self._active_source
+        if source is not None:
+            source.gain = 0.0 if muted else self.volume
+        logging.info(f"Speech {'muted' if muted else 'unmuted'}")
+
     @timer
     def handle_voice_command(self):
-        def background_task():
+        def background_task(cancel_token):
             timings = {}
+            speculator = None
             try:
+                # Local speech recognition can still drive the timer without an API key
+                if self.client is None and self.ensure_stt_backend().name != "local":
+                    self.app.update_user_feedback("Set an API key in settings.")
+                    return
+
                 self.app.update_user_feedback("Listening...")
                 
                 # Record audio (don't time this)
-                speech_detected = self.record_audio_vad()
+                recording = self.record_audio_vad()
                 
-                if not speech_detected:
+                if recording is None:
                     self.app.update_user_feedback("No speech detected. Try again.")
                     logging.warning("No speech detected during recording.")
                     return
 
                 self.app.update_user_feedback("Thinking...")
                 
-                # Transcribe audio
+                # Transcribe audio, starting the reply early from a stable partial when the backend streams them
+                speculator = self.create_speculator(cancel_token)
                 transcribe_start = time.time()
-                transcription = self.transcribe_audio()
+                transcription = self.transcribe_audio(
+                    recording, cancel_token=cancel_token, on_partial=speculator.feed if speculator else None
+                )
                 timings['transcription'] = time.time() - transcribe_start
                 
                 if transcription:
-                    screenshot_base64 = None
-                    if self.app.settings_manager.get_setting("AI_SCREEN_VISION", False):
+                    # Timer commands are applied locally; only open-ended requests go to the model
+                    intent = self.match_command(transcription)
+                    if intent is not None:
+                        self.run_command(intent, cancel_token=cancel_token)
+                        return
+                    if self.client is None:
+                        self.app.update_user_feedback("Set an API key in settings.")
+                        return
+
+                    screenshots = None
+                    response = self.answer_from_screen_history(transcription)
+                    if response is not None:
+                        logging.info("Answered from the local screen history; no screenshot or AI request needed.")
+                    elif self.app.settings_manager.get_setting("AI_SCREEN_VISION", False):
                         self.app.update_user_feedback("Looking at screen...")
                         logging.info("AI Screen Vision is enabled. Looking at screen...")
                         
                         # Capture screenshot
                         screenshot_start = time.time()
-                        screenshot_base64 = self.capture_screenshot()
+                        screenshots = self.capture_screenshot()
                         timings['screenshot'] = time.time() - screenshot_start
                         
-                        if screenshot_base64:
+                        if screenshots:
                             logging.info("Screenshot captured successfully")
                         else:
                             logging.warning("Failed to capture screenshot")
@@ -354,33 +655,43 @@ class VoiceAssistant:
                         logging.info("AI Screen Vision is disabled. No screenshot captured.")
                     
                     # Generate response
-                    response_start = time.time()
-                    response = self.generate_response(transcription, screenshot_base64)
-                    timings['response_generation'] = time.time() - response_start
+                    if response is None and speculator is not None:
+                        response = speculator.resolve(transcription)
+                        if response is not None:
+                            self.db.add_message("user", transcription)
+                            self.remember_reply(response)
+                            logging.info(f"Committed the speculative reply. Speculation so far: {self.speculation_stats.as_dict()}")
+                    if response is None:
+                        response_start = time.time()
+                        response = self.generate_response(transcription, screenshots, cancel_token=cancel_token)
+                        timings['response_generation'] = time.time() - response_start
                     
                     self.app.update_user_feedback("Speaking...")
                     
                     # Text to speech conversion (don't include playback time)
                     tts_start = time.time()
-                    tts_response = self.client.audio.speech.create(
-                        model="tts-1",
-                        voice=self.app.settings_manager.get_setting("AI_VOICE", "onyx"),
-                        input=response,
-                        response_format="mp3"
+                    audio_bytes = self.synthesize_speech(
+                        response,
+                        self.app.settings_manager.get_setting("AI_VOICE", "onyx"),
+                        cancel_token=cancel_token
                     )
                     timings['text_to_speech'] = time.time() - tts_start
                     
                     # Play audio (don't time this)
-                    self.play_audio_from_stream(tts_response)
+                    self.play_audio_bytes(audio_bytes, cancel_token=cancel_token)
                     
                     self.app.master.after(1000, lambda: self.app.update_user_feedback("Press to Talk"))
                 else:
                     logging.error("No transcription result.")
                     self.app.update_user_feedback("Try speaking again.")
+            except CancelledError:
+                logging.info("Voice command cancelled.")
             except Exception as e:
                 logging.error(f"Error handling voice command: {e}", exc_info=True)
                 self.app.update_user_feedback("Error. Check log.")
             finally:
+                if speculator is not None:
+                    speculator.cancel()  # A no-op once the reply was committed
                 self.app.master.after(0, lambda: self.app.user_feedback_var.set("Press to Talk"))
                 self.app.enable_talk_to_ai_button()
                 
@@ -392,8 +703,13 @@ class VoiceAssistant:
                     percentage = (duration / total_processing_time) * 100
                     logging.info(f"  {step:<20}: {duration:6.2f} seconds ({percentage:5.1f}%)")
 
-        thread = threading.Thread(target=background_task)
-        thread.start()
+        # A voice reply preempts any motivational quote that is queued or still speaking
+        self.app.task_pool.cancel_group("quote")
+        try:
+            self.app.task_pool.submit(background_task, priority=PRIORITY_VOICE, group="voice")
+        except queue.Full:
+            self.app.update_user_feedback("Busy. Try again.")
+            self.app.enable_talk_to_ai_button()
 
     def update_audio_devices(self, input_device, output_device):
         self.input_device = input_device
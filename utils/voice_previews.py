@@ -0,0 +1,93 @@
+# voice_previews.py keeps one decoded sample of every TTS voice on disk so the settings window can play it instantly
+
+import threading
+import logging
+
+from utils.playback import PCMQueueSource
+
+logger = logging.getLogger(__name__)
+
+VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+PREVIEW_TEXT = "Hi! This is how I sound. Let's get some focused work done."
+WARM_TEXT = "Hi."  # Smallest useful request; it opens the connection and loads the voice on the server
+
+
+class VoicePreviews:
+    """Plays a short sample per voice, synthesized once into the assistant's speech cache.
+
+    A cached preview needs neither a network request nor an mp3 decode. warm() also sends one tiny
+    request in the selected voice at startup so the first real utterance skips the connection and
+    model cold start.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.cache = app.voice_assistant.speech_cache
+        self._playing = None  # Mixer voice of the preview that is currently playing
+
+    def get(self, voice):
+        """Returns (samples, frame rate) if the voice has been sampled, else None."""
+        return self.cache.get(voice, PREVIEW_TEXT)
+
+    async def fetch(self, voice):
+        """Returns the voice's sample, synthesizing and storing it first if needed."""
+        return await self.cache.fetch(voice, PREVIEW_TEXT)
+
+    def play(self, voice, on_started=None, on_error=None):
+        """Plays the voice's sample, from the cache if present. Must be called on the Tk thread."""
+        def start(sample):
+            self.play_sample(*sample)
+            if on_started is not None:
+                on_started()
+
+        sample = self.get(voice)
+        if sample is not None:
+            start(sample)
+            return
+        if self.app.provider is None:
+            if on_error is not None:
+                on_error(RuntimeError("No AI provider configured"))
+            return
+        self.app.ai_runtime.post_to_tk(self.app.master, self.fetch(voice), on_result=start, on_error=on_error)
+
+    def play_sample(self, samples, frame_rate):
+        assistant = self.app.voice_assistant
+        mixer = self.app.mixer
+        if mixer is not None:
+            # Previews skip barge-in and replace each other, so flicking through voices stays snappy
+            if self._playing is not None:
+                mixer.cancel(self._playing)
+            source = PCMQueueSource(1, frame_rate, output_rate=mixer.rate, gain=0.0 if assistant.muted else assistant.volume)
+            source.push(samples)
+            source.close()
+            self._playing = mixer.play("speech", source)
+            return
+        source = PCMQueueSource(1, frame_rate, output_rate=assistant.output_rate_for(frame_rate))
+        source.push(samples)
+        source.close()
+        assistant.stop_audio_playback()
+        threading.Thread(target=assistant.play_source, args=(source,), name="voice-preview", daemon=True).start()
+
+    def warm(self, voice):
+        """Warms the TTS path for voice in the background, then fills in the samples of the other voices."""
+        if self.app.provider is None:
+            return None
+        return self.app.ai_runtime.submit(self._warm(voice))
+
+    async def _warm(self, voice):
+        try:
+            if self.get(voice) is None:
+                await self.fetch(voice)  # The preview request doubles as the warm-up
+            else:
+                await self.app.voice_assistant.synthesize_speech_async(WARM_TEXT, voice)
+            logger.info(f"Warmed text-to-speech for voice '{voice}'.")
+        except Exception as e:
+            logger.warning(f"Could not warm text-to-speech for voice '{voice}': {e}")
+            return
+        # One at a time, so the remaining samples never compete with real speech for bandwidth
+        for other in VOICES:
+            if other != voice and self.get(other) is None:
+                try:
+                    await self.fetch(other)
+                except Exception as e:
+                    logger.warning(f"Could not sample voice '{other}': {e}")
@@ -0,0 +1,237 @@
+# wake_word.py is the always-on, low-power listener that triggers the voice assistant hands-free
+
+import os
+import queue
+import threading
+import logging
+import numpy as np
+import sounddevice as sd
+import webrtcvad
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME_LEN = SAMPLE_RATE * FRAME_MS // 1000
+RING_FRAMES = 100  # 2 seconds of audio
+MAX_UTTERANCE_FRAMES = 75  # Wake phrases longer than 1.5 s are ignored
+MIN_UTTERANCE_FRAMES = 10
+END_SILENCE_FRAMES = 12  # 240 ms of silence closes an utterance
+PREROLL_FRAMES = 3
+
+
+def _mel_filterbank(n_fft, n_mels, sample_rate):
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    mels = np.linspace(hz_to_mel(60), hz_to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for i in range(1, n_mels + 1):
+        left, center, right = bins[i - 1], bins[i], bins[i + 1]
+        if center > left:
+            bank[i - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[i - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+
+class TemplateMatcher:
+    """Matches an utterance against recorded samples of the wake phrase with DTW over log-mel features."""
+
+    def __init__(self, templates_dir, threshold=0.55, n_mels=20):
+        self.templates_dir = templates_dir
+        self.threshold = threshold
+        self.win = 400  # 25 ms
+        self.hop = 160  # 10 ms
+        self.n_fft = 512
+        self.window = np.hanning(self.win).astype(np.float32)
+        self.filterbank = _mel_filterbank(self.n_fft, n_mels, SAMPLE_RATE)
+        self.templates = []
+        self.load_templates()
+
+    def load_templates(self):
+        self.templates = []
+        if os.path.isdir(self.templates_dir):
+            for name in sorted(os.listdir(self.templates_dir)):
+                if name.endswith(".npy"):
+                    self.templates.append(np.load(os.path.join(self.templates_dir, name)))
+        logger.info(f"Loaded {len(self.templates)} wake word template(s).")
+
+    def features(self, samples):
+        samples = samples.astype(np.float32) / 32768
+        if len(samples) < self.win:
+            samples = np.pad(samples, (0, self.win - len(samples)))
+        n_frames = 1 + (len(samples) - self.win) // self.hop
+        idx = np.arange(self.win)[None, :] + self.hop * np.arange(n_frames)[:, None]
+        spectrum = np.abs(np.fft.rfft(samples[idx] * self.window, self.n_fft)) ** 2
+        logmel = np.log(spectrum @ self.filterbank.T + 1e-8)
+        # Mean/variance normalization makes the match independent of mic gain
+        return (logmel - logmel.mean(axis=0)) / (logmel.std(axis=0) + 1e-5)
+
+    @staticmethod
+    def dtw_distance(a, b):
+        cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)) / np.sqrt(a.shape[1])
+        acc = np.full((len(a) + 1, len(b) + 1), np.inf)
+        acc[0, 0] = 0
+        for i in range(1, len(a) + 1):
+            for j in range(1, len(b) + 1):
+                acc[i, j] = cost[i - 1, j - 1] + min(acc[i - 1, j], acc[i, j - 1], acc[i - 1, j - 1])
+        return acc[-1, -1] / (len(a) + len(b))
+
+    def matches(self, samples):
+        if not self.templates:
+            return False
+        feats = self.features(samples)
+        best = min(self.dtw_distance(feats, template) for template in self.templates)
+        logger.info(f"Wake word distance: {best:.3f} (threshold {self.threshold})")
+        return best < self.threshold
+
+    def enroll(self, samples):
+        os.makedirs(self.templates_dir, exist_ok=True)
+        path = os.path.join(self.templates_dir, f"template_{len(self.templates) + 1}.npy")
+        feats = self.features(samples)
+        np.save(path, feats)
+        self.templates.append(feats)
+        logger.info(f"Wake word template saved to {path}")
+
+
+class WakeWordListener:
+    """Runs an energy gate and VAD on 20 ms frames; the template matcher only runs once the gate has opened.
+
+    Frames are copied into a fixed, preallocated ring buffer, so the idle path allocates nothing per frame.
+    """
+
+    def __init__(self, on_wake, templates_dir, input_device=None, energy_threshold=0.01, vad_aggressiveness=3):
+        self.on_wake = on_wake
+        self.input_device = input_device
+        self.matcher = TemplateMatcher(templates_dir)
+        self.vad = webrtcvad.Vad(vad_aggressiveness)
+        self.energy_threshold = (energy_threshold * 32768) ** 2 * FRAME_LEN  # Compared against the raw sum of squares
+
+        self.ring = np.zeros((RING_FRAMES, FRAME_LEN), dtype=np.int16)
+        self._scratch = np.zeros(FRAME_LEN, dtype=np.float32)
+        self._write = 0
+        self._utterance_start = None
+        self._utterance_frames = 0
+        self._silent_frames = 0
+
+        self._utterances = queue.Queue(maxsize=2)
+        self._matcher_thread = None
+        self.stream = None
+        self.frames_seen = 0
+        self.gate_openings = 0
+
+    def start(self):
+        if self.stream is not None:
+            return
+        self.stream = sd.InputStream(
+            samplerate=SAMPLE_RATE,
+            blocksize=FRAME_LEN,
+            channels=1,
+            dtype='int16',
+            device=self.input_device,
+            callback=self._callback
+        )
+        self.stream.start()
+        if self._matcher_thread is None:
+            self._matcher_thread = threading.Thread(target=self._match_loop, name="wake-word", daemon=True)
+            self._matcher_thread.start()
+        logger.info("Wake word listener started.")
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+            logger.info("Wake word listener stopped.")
+
+    def pause(self):
+        # Release the mic while the assistant is recording or speaking
+        if self.stream is not None and self.stream.active:
+            self.stream.stop()
+        self._reset_utterance()
+
+    def resume(self):
+        if self.stream is not None and not self.stream.active:
+            self.stream.start()
+
+    def close(self):
+        self.stop()
+        if self._matcher_thread is not None:
+            self._utterances.put(None)
+            self._matcher_thread.join(1.0)
+            self._matcher_thread = None
+
+    def _callback(self, indata, frames, time_info, status):
+        self.process_frame(indata[:, 0])
+
+    def process_frame(self, frame):
+        slot = self._write
+        self.ring[slot] = frame
+        self._write = (slot + 1) % RING_FRAMES
+        self.frames_seen += 1
+
+        np.multiply(self.ring[slot], 1.0, out=self._scratch)
+        energy = np.dot(self._scratch, self._scratch)
+        gate_open = energy > self.energy_threshold
+
+        if self._utterance_start is None:
+            if gate_open and self.vad.is_speech(self.ring[slot].tobytes(), SAMPLE_RATE):
+                self.gate_openings += 1
+                self._utterance_start = (slot - PREROLL_FRAMES) % RING_FRAMES
+                self._utterance_frames = PREROLL_FRAMES + 1
+                self._silent_frames = 0
+            return
+
+        self._utterance_frames += 1
+        if gate_open and self.vad.is_speech(self.ring[slot].tobytes(), SAMPLE_RATE):
+            self._silent_frames = 0
+        else:
+            self._silent_frames += 1
+
+        if self._utterance_frames >= MAX_UTTERANCE_FRAMES:
+            self._reset_utterance()
+        elif self._silent_frames >= END_SILENCE_FRAMES:
+            if self._utterance_frames - self._silent_frames >= MIN_UTTERANCE_FRAMES:
+                # Copy the utterance out of the ring before it is overwritten; this happens once per phrase
+                idx = (self._utterance_start + np.arange(self._utterance_frames)) % RING_FRAMES
+                try:
+                    self._utterances.put_nowait(self.ring[idx].reshape(-1))
+                except queue.Full:
+                    pass
+            self._reset_utterance()
+
+    def _reset_utterance(self):
+        self._utterance_start = None
+        self._utterance_frames = 0
+        self._silent_frames = 0
+
+    def _match_loop(self):
+        while True:
+            samples = self._utterances.get()
+            if samples is None:
+                return
+            try:
+                if self.matcher.matches(samples):
+                    logger.info("Wake word detected.")
+                    self.on_wake()
+            except Exception as e:
+                logger.error(f"Error matching wake word: {e}")
+
+    def enroll_from_microphone(self, seconds=1.5):
+        """Records one sample of the wake phrase and stores it as a template."""
+        recording = sd.rec(int(seconds * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype='int16', device=self.input_device)
+        sd.wait()
+        self.matcher.enroll(self._trim_silence(recording[:, 0]))
+
+    def _trim_silence(self, samples):
+        # Templates should start and end on speech, like the utterances the gate hands to the matcher
+        frames = samples[:len(samples) // FRAME_LEN * FRAME_LEN].reshape(-1, FRAME_LEN)
+        energies = (frames.astype(np.float32) ** 2).sum(axis=1)
+        voiced = np.nonzero(energies > self.energy_threshold)[0]
+        if not len(voiced):
+            return samples
+        return frames[voiced[0]:voiced[-1] + 1].reshape(-1)
@@ -1,6 +1,8 @@
 # window_utils.py
 import tkinter as tk
 import os
+import subprocess
+import sys
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,4 +16,55 @@ def set_window_icon(master, icon_filename):
         icon = tk.PhotoImage(file=icon_path)
         master.iconphoto(False, icon)
     except Exception as e:
-        logger.error(f"Failed to load window icon from {icon_path}: {e}")
\ No newline at end of file
+        logger.error(f"Failed to load window icon from {icon_path}: {e}")
+
+
+def active_window_title():
+    """Title of the focused window on the desktop, or "" when it can't be read on this platform."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            user32 = ctypes.windll.user32
+            hwnd = user32.GetForegroundWindow()
+            length = user32.GetWindowTextLengthW(hwnd)
+            buffer = ctypes.create_unicode_buffer(length + 1)
+            user32.GetWindowTextW(hwnd, buffer, length + 1)
+            return buffer.value
+        if sys.platform == "darwin":
+            script = ('tell application "System Events" to tell (first process whose frontmost is true) '
+                      'to get {name, name of front window}')
+            command = ["osascript", "-e", script]
+        else:
+            command = ["xdotool", "getactivewindow", "getwindowname"]  # X11 only
+        result = subprocess.run(command, capture_output=True, text=True, timeout=1)
+        return result.stdout.strip().replace(", ", " - ", 1) if result.returncode == 0 else ""
+    except (OSError, subprocess.SubprocessError, AttributeError) as e:
+        logger.debug(f"Could not read the active window title: {e}")
+        return ""
+
+
+def active_window_rect():
+    """Screen rectangle of the focused window as an mss-style dict, or None when it can't be read."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            import ctypes.wintypes
+            rect = ctypes.wintypes.RECT()
+            ctypes.windll.user32.GetWindowRect(ctypes.windll.user32.GetForegroundWindow(), ctypes.byref(rect))
+            left, top, width, height = rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top
+        elif sys.platform == "darwin":
+            script = ('tell application "System Events" to tell (first process whose frontmost is true) '
+                      'to get {position, size} of front window')
+            result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=1)
+            left, top, width, height = (int(value) for value in result.stdout.split(","))
+        else:
+            result = subprocess.run(["xdotool", "getactivewindow", "getwindowgeometry", "--shell"],
+                                    capture_output=True, text=True, timeout=1)
+            fields = dict(line.split("=", 1) for line in result.stdout.split() if "=" in line)
+            left, top, width, height = (int(fields[key]) for key in ("X", "Y", "WIDTH", "HEIGHT"))
+    except (OSError, subprocess.SubprocessError, AttributeError, KeyError, ValueError) as e:
+        logger.debug(f"Could not read the active window position: {e}")
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    return {"left": left, "top": top, "width": width, "height": height}